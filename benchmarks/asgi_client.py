@@ -0,0 +1,52 @@
+"""
+Minimal in-process ASGI client for the benchmarks
+
+Drives the app directly (no sockets), so the numbers reflect the cost of the
+framework and the handlers only.
+"""
+
+import json
+from urllib.parse import urlencode
+
+
+async def request(app, method, path, params=None, headers=None, json_body=None, body=b""):
+    """Send one request through the ASGI app and return (status, headers, body)"""
+    raw_headers = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    if json_body is not None:
+        body = json.dumps(json_body).encode()
+        raw_headers.append((b"content-type", b"application/json"))
+    raw_headers.append((b"content-length", str(len(body)).encode()))
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(params or {}).encode(),
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8000),
+    }
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    response = {"status": None, "headers": [], "body": bytearray()}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return response["status"], response["headers"], bytes(response["body"])
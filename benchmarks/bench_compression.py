@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Response compression benchmark
+
+For the third-party catalog's first page (volatile analyzed_at) and the fixture persona
+list (fully static), compares compressing the rendered body on every request
+with the pre-encoded paths: stitched gzip around pre-deflated static parts,
+and cached bytes. Usage: python benchmarks/bench_compression.py
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["MOCK_DB_PATH"] = os.path.join(_tmp.name, "bench.db")
+
+from mock_compression import ENCODINGS, compress  # noqa: E402
+from mock_fixtures import fixtures  # noqa: E402
+from mock_projects import DEFAULT_PAGE_SIZE  # noqa: E402
+from mock_thirdparty import thirdparty  # noqa: E402
+
+
+def per_call_us(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    thirdparty_body = thirdparty.first_page(DEFAULT_PAGE_SIZE)
+    catalog_values = {"analyzed_at": datetime.now().isoformat()}
+    catalog = thirdparty_body.render(**catalog_values)
+    personas_body = fixtures.routes["get_userpersonas"].variants[0].body
+    personas = personas_body.render()
+
+    print(f"{'body':<28}{'bytes':>8}{'out':>8}{'µs':>10}")
+    for label, body in (("catalog", catalog), ("personas", personas)):
+        for encoding in ENCODINGS:
+            out = compress(body, encoding)
+            us = per_call_us(lambda: compress(body, encoding), args.repeat)
+            print(f"{label + ' ' + encoding + ' per request':<28}{len(body):>8}{len(out):>8}{us:>10.1f}")
+
+    stitched = thirdparty_body.compressed("gzip", catalog_values, catalog)
+    assert gzip.decompress(stitched) == catalog
+    us = per_call_us(lambda: thirdparty_body.compressed("gzip", catalog_values, catalog), args.repeat)
+    print(f"{'catalog gzip stitched':<28}{len(catalog):>8}{len(stitched):>8}{us:>10.1f}")
+    for encoding in ENCODINGS:
+        cached = personas_body.compressed(encoding, {}, personas)
+        us = per_call_us(lambda: personas_body.compressed(encoding, {}, personas), args.repeat)
+        print(f"{'personas ' + encoding + ' cached':<28}{len(personas):>8}{len(cached):>8}{us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Project event stream benchmark
+
+Starts the mock backend with one worker and opens --subscribers idle SSE
+streams (/api/v1/projects/{id}/events) spread over many projects, with
+--hot of them on one project; the projects are created first, since only
+their owner can follow them. Reports the server's memory per idle
+subscriber, then saves personas to the hot project a few times and times the
+upload and the fan-out (from sending the upload until every hot subscriber
+has the event). The same uploads to a project nobody follows show what the
+idle streams cost other requests.
+
+Then, in process, one subscriber that never reads is sent --slow-events
+events, to check its queue stays bounded under the slow-consumer policy.
+
+The client needs a file descriptor per stream (ulimit -n).
+
+Usage: python benchmarks/bench_events.py [--subscribers 10000] [--hot 1000]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import httpx  # noqa: E402
+
+from mock_events import EVENT_QUEUE_SIZE, EventBus  # noqa: E402
+from mock_server import free_port  # noqa: E402
+
+PERSONAS = {"selected_personas": [{"id": "persona-1", "name": "System Administrator"}]}
+IDLE_PROJECTS = 1000
+
+
+def rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+class Stream:
+    """One idle SSE connection over a raw socket; records when events arrive"""
+
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+        self.events = 0
+        self.arrived = asyncio.Event()
+        self.arrived_at = 0.0
+
+    async def open(self, port: int, project_id: str, token: str):
+        self.reader, self.writer = await asyncio.open_connection("127.0.0.1", port)
+        self.writer.write(
+            f"GET /api/v1/projects/{project_id}/events HTTP/1.1\r\nHost: bench\r\n"
+            f"Authorization: Bearer {token}\r\n\r\n".encode("ascii")
+        )
+        status = await self.reader.readline()
+        if b" 200 " not in status:
+            raise RuntimeError(f"stream rejected: {status!r}")
+        while await self.reader.readline() != b"\r\n":
+            pass
+
+    async def listen(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                return
+            if b"event: " in line:
+                self.events += 1
+                self.arrived_at = time.perf_counter()
+                self.arrived.set()
+
+    def close(self):
+        self.writer.close()
+
+
+async def create_projects(client: httpx.AsyncClient, count: int, batch: int = 100) -> list:
+    ids = []
+    for start in range(0, count, batch):
+        created = await asyncio.gather(*(
+            client.post("/api/v1/projects", json={"name": f"bench {i}"})
+            for i in range(start, min(count, start + batch))
+        ))
+        ids.extend(response.json()["id"] for response in created)
+    return ids
+
+
+async def open_streams(port: int, token: str, count: int, hot: int, projects: list, batch: int = 500) -> list:
+    """Streams on projects[0] for the first `hot`, the rest spread over the other projects"""
+    streams = []
+    idle = projects[1:]
+    for start in range(0, count, batch):
+        group = [Stream() for _ in range(min(batch, count - start))]
+        await asyncio.gather(*(
+            stream.open(port, projects[0] if start + i < hot else idle[(start + i) % len(idle)], token)
+            for i, stream in enumerate(group)
+        ))
+        streams.extend(group)
+    return streams
+
+
+async def run_server_bench(args, port: int, pid: int):
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+        login = await client.post("/api/v1/auth/login", data={"username": "bench@example.com", "password": "bench"})
+        token = login.json()["access_token"]
+        personas = {**PERSONAS, "user_id": login.json()["user"]["id"]}
+        client.headers["Authorization"] = f"Bearer {token}"
+        projects = await create_projects(client, 1 + IDLE_PROJECTS)
+        # A warm-up upload, so first-call costs are not counted
+        await client.post("/api/upload_userpersonas", json={**personas, "project_id": "warmup"})
+        before = rss_kb(pid)
+        start = time.perf_counter()
+        streams = await open_streams(port, token, args.subscribers, args.hot, projects)
+        opened = time.perf_counter() - start
+        listeners = [asyncio.create_task(stream.listen()) for stream in streams]
+        await asyncio.sleep(1.0)
+        after = rss_kb(pid)
+        stats = (await client.get("/api/v1/stats/events")).json()
+        print(f"{stats['subscribers']:,} idle streams over {stats['projects']:,} projects, opened in {opened:.1f} s")
+        print(f"server RSS {before / 1024:.0f} MB -> {after / 1024:.0f} MB, "
+              f"{(after - before) / max(1, args.subscribers):.1f} KB per subscriber")
+
+        hot = streams[:args.hot]
+        uploads, fanouts, quiet = [], [], []
+        for _ in range(args.rounds):
+            for stream in hot:
+                stream.arrived.clear()
+            start = time.perf_counter()
+            await client.post("/api/upload_userpersonas", json={**personas, "project_id": projects[0]})
+            uploads.append(time.perf_counter() - start)
+            await asyncio.gather(*(stream.arrived.wait() for stream in hot))
+            fanouts.append(max(stream.arrived_at for stream in hot) - start)
+
+            start = time.perf_counter()
+            await client.post("/api/upload_userpersonas", json={**personas, "project_id": "nobody"})
+            quiet.append(time.perf_counter() - start)
+
+        ms = lambda values: statistics.median(values) * 1000  # noqa: E731
+        print(f"{'median of ' + str(args.rounds) + ' uploads':<36}{'ms':>8}")
+        print(f"{'upload, ' + str(args.hot) + ' subscribers':<36}{ms(uploads):>8.1f}")
+        print(f"{'fan-out to all ' + str(args.hot):<36}{ms(fanouts):>8.1f}")
+        print(f"{'upload, no subscribers':<36}{ms(quiet):>8.1f}")
+        missing = sum(1 for stream in hot if stream.events != args.rounds)
+        stray = sum(stream.events for stream in streams[args.hot:])
+        print(f"hot streams missing events: {missing}, events on other projects' streams: {stray}")
+
+        for task in listeners:
+            task.cancel()
+        for stream in streams:
+            stream.close()
+
+
+def slow_consumer(events: int):
+    """One subscriber that never reads, in process"""
+    for policy in ("resync", "disconnect"):
+        bus = EventBus(policy=policy)
+        subscriber = bus.subscribe("slow")
+        reader = bus.subscribe("slow")
+        start = time.perf_counter()
+        longest = 0
+        for i in range(events):
+            bus.publish("slow", "user_personas.saved", {"project_id": "slow", "version": i})
+            reader.queue.clear()  # a subscriber that keeps up
+            longest = max(longest, len(subscriber.queue))
+        seconds = time.perf_counter() - start
+        print(f"{policy:<11} {events:,} events in {seconds * 1000:.0f} ms, "
+              f"slow queue peaked at {longest} (limit {EVENT_QUEUE_SIZE}), "
+              f"closed={subscriber.closed}, resyncs={bus.resyncs}, dropped={bus.dropped:,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=10_000)
+    parser.add_argument("--hot", type=int, default=1000, help="Subscribers on the project that is saved to")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--slow-events", type=int, default=100_000)
+    args = parser.parse_args()
+
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "MOCK_LOG": "off",
+            "MOCK_RATE_LIMIT": "off",
+            "MOCK_DB_PATH": os.path.join(tmp, "bench.db"),
+            "MOCK_EVENT_MAX_SUBSCRIBERS": str(args.subscribers + 100),
+        }
+        server = subprocess.Popen(
+            [sys.executable, "-W", "ignore", "mock_backend.py", "--port", str(port), "--log-level", "warning",
+             "--eager"],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    if httpx.get(f"http://127.0.0.1:{port}/api/v1/ready").status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError("server did not start")
+                time.sleep(0.1)
+            asyncio.run(run_server_bench(args, port, server.pid))
+        finally:
+            server.terminate()
+            server.wait()
+
+    slow_consumer(args.slow_events)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+PRD keyword matching benchmark
+
+Compares the compiled single-pass matcher (mock_prd.KeywordMatcher) with the
+naive approach of lowercasing the text and scanning it once per term, on
+documents from 1 KB to 50 MB. Usage: python benchmarks/bench_keywords.py
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_prd import analyze_text, get_matcher  # noqa: E402
+
+SIZES = {"1KB": 1 << 10, "64KB": 64 << 10, "1MB": 1 << 20, "10MB": 10 << 20, "50MB": 50 << 20}
+
+FILLER = (
+    "the a of to and in that is for on with as by this be are from at or an it "
+    "will can which should their into more other when than about these also"
+).split()
+
+
+def make_document(size, terms, seed=7):
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(terms) if rng.random() < 0.05 else rng.choice(FILLER)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+
+def compile_naive(terms):
+    return [(term, re.compile(r"\b" + re.escape(term) + r"(?:e?s)?\b")) for term in terms]
+
+
+def naive(text, patterns):
+    """One lowercase copy and one scan per term, like the original analysis
+
+    Terms are matched independently, so a term nested in a longer one
+    (e.g. "cart" in "shopping cart") is counted by both.
+    """
+    counts = {}
+    for term, pattern in patterns:
+        found = [match.start() for match in pattern.finditer(text.lower())]
+        if found:
+            counts[term] = len(found)
+    return counts
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1KB,64KB,1MB,10MB,50MB")
+    parser.add_argument("--skip-naive-above", default="1MB", help="naive scans get slow on large inputs")
+    args = parser.parse_args()
+
+    matcher = get_matcher()
+    terms = sorted(matcher.sections)
+    patterns = compile_naive(terms)
+    naive_limit = SIZES[args.skip_naive_above]
+    print(f"{len(terms)} terms")
+    print(f"{'size':>6} {'compiled':>10} {'MB/s':>8} {'naive':>10} {'speedup':>8}")
+
+    for name in args.sizes.split(","):
+        text = make_document(SIZES[name], terms)
+        compiled_time, analyzer = timed(analyze_text, text)
+        analyzer.summary()
+        mb_per_s = len(text) / compiled_time / 1e6
+        if SIZES[name] <= naive_limit:
+            naive_time, _ = timed(naive, text, patterns)
+            print(f"{name:>6} {compiled_time * 1000:9.1f}ms {mb_per_s:8.1f} "
+                  f"{naive_time * 1000:9.1f}ms {naive_time / compiled_time:7.1f}x")
+        else:
+            print(f"{name:>6} {compiled_time * 1000:9.1f}ms {mb_per_s:8.1f} {'skipped':>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Request logging overhead benchmark
+
+Runs the same request mix through the app in-process with request logging
+on (JSON lines to /dev/null through the queued writer) and off, and prints
+requests per second for each. Usage: python benchmarks/bench_logging.py
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["MOCK_DB_PATH"] = os.path.join(_tmp.name, "bench.db")
+# One client sending as fast as it can would be rate limited
+os.environ["MOCK_RATE_LIMIT"] = "off"
+
+import mock_logging  # noqa: E402
+from asgi_client import request  # noqa: E402
+from mock_auth import tokens  # noqa: E402
+from mock_backend import app, prd_jobs  # noqa: E402
+
+HEADERS = {"Authorization": f"Bearer {tokens.issue('bench@example.com').token}"}
+PARAMS = {"user_id": "user_bench", "project_id": "proj_bench"}
+
+REQUESTS = [
+    ("GET", "/api/get_thirdparty", PARAMS, None, 200),
+    ("GET", "/api/get_userpersonas", PARAMS, None, 200),
+    ("GET", "/api/get_branddesign", PARAMS, None, 200),
+    ("POST", "/api/upload_prd", None, {"text": "Goal: ship the feature. Requirement: fast. " * 20, **PARAMS}, 202),
+]
+
+
+async def run(iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for method, path, params, body, expected in REQUESTS:
+            status, _, _ = await request(app, method, path, params=params, headers=HEADERS, json_body=body)
+            assert status == expected, (path, status)
+        # PRD jobs run in the background; keep them from filling the queue
+        await prd_jobs.join()
+    return iterations * len(REQUESTS) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    with open(os.devnull, "w") as devnull:
+        mock_logging.configure(enabled=False)
+        asyncio.run(run(100))  # warm up
+        results = {}
+        mock_logging.configure(enabled=True, stream=devnull)
+        results["logging on"] = asyncio.run(run(args.iterations))
+        mock_logging.configure(enabled=False)
+        results["logging off"] = asyncio.run(run(args.iterations))
+        mock_logging.shutdown()
+
+    for name, rps in results.items():
+        print(f"{name:>12}: {rps:8.0f} req/s")
+    print(f"{'overhead':>12}: {(1 - results['logging on'] / results['logging off']) * 100:7.1f} %")
+
+
+if __name__ == "__main__":
+    main()
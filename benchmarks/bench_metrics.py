@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Request metrics overhead benchmark
+
+Times Histogram.observe and Metrics.observe_request on their own, then the
+whole per-request path (middleware plus route wrapper) around an ASGI app
+that does nothing, so the difference is not lost in handler noise. Finally
+runs a request mix through the real app with recording on and off.
+Usage: python benchmarks/bench_metrics.py
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["MOCK_DB_PATH"] = os.path.join(_tmp.name, "bench.db")
+os.environ["MOCK_LOG"] = "off"
+# One client sending as fast as it can would be rate limited
+os.environ["MOCK_RATE_LIMIT"] = "off"
+
+from asgi_client import request  # noqa: E402
+from mock_auth import tokens  # noqa: E402
+from mock_backend import app  # noqa: E402
+from mock_metrics import LATENCY_BUCKETS, Histogram, Metrics, MetricsMiddleware, _RouteRecorder, metrics  # noqa: E402
+
+HEADERS = {"Authorization": f"Bearer {tokens.issue('bench@example.com').token}"}
+PARAMS = {"user_id": "user_bench", "project_id": "proj_bench"}
+REQUESTS = [
+    ("GET", "/api/v1/health", None),
+    ("GET", "/api/get_thirdparty", PARAMS),
+    ("GET", "/api/get_userpersonas", PARAMS),
+    ("GET", "/api/prd_jobs/job_missing", None),
+]
+
+
+def per_call_ns(func, calls):
+    start = time.perf_counter_ns()
+    for i in range(calls):
+        func(i)
+    return (time.perf_counter_ns() - start) / calls
+
+
+async def noop_app(scope, receive, send):
+    await receive()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def run_bare(asgi_app, calls):
+    scope = {"type": "http", "method": "POST", "path": "/api/upload_prd", "app": None}
+    message = {"type": "http.request", "body": b"x" * 100, "more_body": False}
+
+    async def receive():
+        return message
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter_ns()
+    for _ in range(calls):
+        await asgi_app(dict(scope), receive, send)
+    return (time.perf_counter_ns() - start) / calls
+
+
+async def run(iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for method, path, params in REQUESTS:
+            await request(app, method, path, params=params, headers=HEADERS)
+    return (time.perf_counter() - start) / (iterations * len(REQUESTS))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--calls", type=int, default=1_000_000)
+    parser.add_argument("--rounds", type=int, default=7)
+    args = parser.parse_args()
+
+    histogram = Histogram(LATENCY_BUCKETS)
+    ns = per_call_ns(lambda i: histogram.observe((i % 1000) / 1e5), args.calls)
+    print(f"Histogram.observe        {ns:8.0f} ns")
+    registry = Metrics()
+    routes = [path for _, path, _ in REQUESTS]
+    ns = per_call_ns(lambda i: registry.observe_request("GET", routes[i & 3], 200, 0.001), args.calls)
+    print(f"Metrics.observe_request  {ns:8.0f} ns")
+
+    registry = Metrics()
+    registry._instrumented = True
+    wrapped = MetricsMiddleware(_RouteRecorder(noop_app, "/api/upload_prd", registry), registry)
+    bare = min(asyncio.run(run_bare(noop_app, args.calls // 10)) for _ in range(3))
+    full = min(asyncio.run(run_bare(wrapped, args.calls // 10)) for _ in range(3))
+    print(f"no-op ASGI app           {bare:8.0f} ns")
+    print(f"  with metrics           {full:8.0f} ns  (+{(full - bare) / 1000:.1f} µs, upload route with body counting)")
+
+    asyncio.run(run(200))  # warm up and instrument the routes
+    # Alternate the settings and compare pairs, so drift (CPU frequency, GC,
+    # neighbours on a shared machine) hits both sides alike
+    differences = []
+    for _ in range(args.rounds):
+        metrics.enabled = True
+        on = asyncio.run(run(args.iterations))
+        metrics.enabled = False
+        off = asyncio.run(run(args.iterations))
+        differences.append(on - off)
+    metrics.enabled = True
+    print(f"request mix, metrics off {off * 1e6:8.1f} µs")
+    print(f"  median difference      {statistics.median(differences) * 1e6:+8.1f} µs  over {args.rounds} rounds")
+
+
+if __name__ == "__main__":
+    main()
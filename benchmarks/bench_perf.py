@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Performance-report store benchmark
+
+Streams synthetic load-test samples (CSV, lognormal latencies over a dozen
+endpoints, 2% errors) through the same reader and store the samples
+endpoint uses, then times the report, a summary CSV export and a full
+sample export. Percentiles are checked against exact ones computed from a
+sorted copy of the first endpoint's latencies.
+
+Usage: python benchmarks/bench_perf.py [--samples 10000000]
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mock_perf import BUCKETS, INGEST_LINES, PERCENTILES, SAMPLE_BYTES, PerfStore, SampleReader  # noqa: E402
+
+ENDPOINTS = [f"/api/endpoint_{i}" for i in range(12)]
+
+
+def generate(count: int, rng: random.Random):
+    """CSV body chunks of INGEST_LINES samples, header first"""
+    yield b"offset_ms,method,endpoint,status,latency_ms\n"
+    for start in range(0, count, INGEST_LINES):
+        lines = []
+        for i in range(start, min(count, start + INGEST_LINES)):
+            status = 500 if rng.random() < 0.02 else 200
+            lines.append(f"{i // 1000},GET,{rng.choice(ENDPOINTS)},{status},{rng.lognormvariate(3, 1):.3f}\n")
+        yield "".join(lines).encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=10_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Room for the samples plus a histogram per endpoint
+    store = PerfStore(max_samples=args.samples + -(-len(ENDPOINTS) * BUCKETS * 8 // SAMPLE_BYTES))
+    run = store.create(name="bench")
+    reader = SampleReader(ndjson=False)
+    ingest_seconds = 0.0
+    for chunk in generate(args.samples, random.Random(args.seed)):
+        start = time.perf_counter()
+        lines = reader.feed(chunk)
+        if lines:
+            store.ingest(run, reader, lines)
+        ingest_seconds += time.perf_counter() - start
+    start = time.perf_counter()
+    store.ingest(run, reader, reader.finish())
+    ingest_seconds += time.perf_counter() - start
+
+    print(f"{len(run):,} samples, {len(run.endpoints)} endpoints, {run.nbytes / len(run):.0f} bytes per sample")
+    print(f"parse + store        {ingest_seconds:8.2f} s   {ingest_seconds / len(run) * 1e9:6.0f} ns/sample")
+
+    start = time.perf_counter()
+    report = b"".join(run.report_chunks())
+    print(f"report               {(time.perf_counter() - start) * 1000:8.2f} ms  {len(report):,} bytes")
+    start = time.perf_counter()
+    summary = b"".join(run.csv_export())
+    print(f"summary CSV export   {(time.perf_counter() - start) * 1000:8.2f} ms  {len(summary):,} bytes")
+    start = time.perf_counter()
+    size = sum(len(chunk) for chunk in run.csv_export(samples=True))
+    seconds = time.perf_counter() - start
+    print(f"sample CSV export    {seconds:8.2f} s   {size / seconds / 1e6:6.0f} MB/s")
+
+    # Exact percentiles of the first endpoint, for the error of the histogram
+    latencies = sorted(value for endpoint_id, value in zip(run.endpoint_ids, run.latencies) if endpoint_id == 0)
+    row = run.endpoint_report(0)
+    print(f"{'':<21}{'exact ms':>10}{'report ms':>11}{'error':>8}")
+    for pct in PERCENTILES:
+        exact = latencies[max(1, math.ceil(len(latencies) * pct / 100)) - 1] / 1000
+        reported = row[f"p{pct}_ms"]
+        print(f"  p{pct:<18}{exact:>10.3f}{reported:>11.3f}{(reported - exact) / exact:>+8.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Project search and pagination benchmark
+
+Indexes N generated project names in memory and measures the first page of
+substring searches (rare, common and missing terms), keyset pages deep into
+the list, and renames. Usage: python benchmarks/bench_projects.py [--projects 1000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_projects import ProjectIndex
+
+WORDS = [
+    "commerce", "social", "analytics", "portal", "mobile", "dashboard", "payments", "booking",
+    "health", "fitness", "travel", "learning", "crm", "inventory", "chat", "marketplace",
+    "delivery", "finance", "music", "video", "recipes", "events", "hiring", "insurance",
+]
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--projects", type=int, default=1_000_000)
+    parser.add_argument("--size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    index = ProjectIndex()
+    start = time.perf_counter()
+    for i in range(args.projects):
+        name = f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i:07d}"
+        index.add({"id": f"proj_{i}", "name": name})
+    build = time.perf_counter() - start
+    print(f"indexed {args.projects} projects in {build:.1f} s")
+
+    queries = {
+        "common word": "payments",
+        "rare id": f"{args.projects // 2:07d}",
+        "two words": "mobile chat",
+        "short (scan)": "vi",
+        "no match": "zzz",
+    }
+    for label, query in queries.items():
+        ms, (found, _, _) = timed(lambda: index.page(args.size, search=query), args.repeat)
+        print(f"search {label:<14} {query!r:<16} {ms:8.3f} ms  ({len(found)} on page)")
+
+    _, last, _ = index.page(args.size, offset=args.projects // 2)
+    ms, _ = timed(lambda: index.page(args.size, cursor=last), args.repeat)
+    print(f"keyset page mid-list                    {ms:8.3f} ms")
+    _, last, _ = index.page(args.size, search="payments", offset=5000)
+    ms, _ = timed(lambda: index.page(args.size, cursor=last, search="payments"), args.repeat)
+    print(f"keyset search page 100                  {ms:8.3f} ms")
+
+    ms, _ = timed(lambda: index.update({"id": "proj_10", "name": f"Renamed {rng.random()}"}), args.repeat)
+    print(f"rename                                  {ms:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Rate limiter and admission control overhead benchmark
+
+Times RateLimiter.check for one busy client and for many clients cycling
+through a full bucket table (every check a miss plus an eviction), then the
+whole middleware around an ASGI app that does nothing, under the limits,
+for a client with an issued token (which is looked up to find its user).
+Usage: python benchmarks/bench_ratelimit.py [--clients 200000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_auth import tokens  # noqa: E402
+from mock_ratelimit import AdmissionControl, RateLimiter, RateLimitMiddleware, parse_limits  # noqa: E402
+
+# High enough that nothing in the benchmark is ever limited
+LIMITS = parse_limits("read=1e9:1000000000,upload=1e9:1000000000")
+
+
+def per_call_ns(func, calls):
+    start = time.perf_counter_ns()
+    for i in range(calls):
+        func(i)
+    return (time.perf_counter_ns() - start) / calls
+
+
+async def noop_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def run_asgi(asgi_app, calls, token: str):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/api/get_thirdparty",
+        "query_string": b"user_id=user_bench&project_id=proj_1",
+        "headers": [(b"host", b"localhost"), (b"authorization", f"Bearer {token}".encode("latin-1"))],
+        "client": ("127.0.0.1", 50000),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter_ns()
+    for _ in range(calls):
+        await asgi_app(scope, receive, send)
+    return (time.perf_counter_ns() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=500_000)
+    parser.add_argument("--clients", type=int, default=200_000)
+    args = parser.parse_args()
+
+    limiter = RateLimiter(LIMITS)
+    ns = per_call_ns(lambda i: limiter.check("read", "token", time.monotonic()), args.calls)
+    print(f"check, one client              {ns:8.0f} ns")
+
+    limiter = RateLimiter(LIMITS, max_buckets=args.clients // 2)
+    clients = [f"token_{i}" for i in range(args.clients)]
+    ns = per_call_ns(lambda i: limiter.check("read", clients[i % args.clients], time.monotonic()), args.calls)
+    print(f"check, {args.clients} clients cycling {ns:8.0f} ns  ({len(limiter)} buckets, {limiter.evicted} evicted)")
+
+    token = tokens.issue("bench@example.com").token
+    middleware = RateLimitMiddleware(noop_app, RateLimiter(LIMITS), AdmissionControl(), enabled=True)
+    bare = min(asyncio.run(run_asgi(noop_app, args.calls // 5, token)) for _ in range(3))
+    wrapped = min(asyncio.run(run_asgi(middleware, args.calls // 5, token)) for _ in range(3))
+    print(f"no-op ASGI app                 {bare:8.0f} ns")
+    print(f"  with rate limit + admission  {wrapped:8.0f} ns  (+{(wrapped - bare) / 1000:.1f} µs)")
+
+
+if __name__ == "__main__":
+    main()
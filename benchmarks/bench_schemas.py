@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Upload schema benchmark
+
+For upload_userpersonas bodies of 1 to 1,000 personas (shaped like the
+fixture personas), times the work between the request bytes and the
+response bytes, without SQLite:
+
+- before: json.loads, validation into the old untyped model, a response
+  dict copied from it, jsonable_encoder and json.dumps for the response,
+  json.dumps again for the stored payload (what FastAPI and the handler did)
+- now: model_validate_json into the typed models, one dump_json of the
+  personas, spliced into the stored payload and the response
+  (mock_schemas.py)
+
+Both paths must produce the same response. Also times the brand design
+body. Usage: python benchmarks/bench_schemas.py [--sizes 1,10,100,1000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import BaseModel  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+
+from mock_responses import dumps  # noqa: E402
+from mock_schemas import (  # noqa: E402
+    BrandDesignUploadRequest,
+    UserPersonasUploadRequest,
+    encode_brand_design,
+    encode_personas,
+    member,
+    merge_objects,
+)
+
+SAVED_AT = "2026-01-01T00:00:00"
+
+
+class LegacyPersonasRequest(BaseModel):
+    selected_personas: list
+    user_id: Optional[str] = None
+    project_id: Optional[str] = None
+
+
+class LegacyBrandDesignRequest(BaseModel):
+    brandName: str
+    logoUrl: Optional[str] = None
+    colors: dict
+    fontFamily: str
+    brandVoice: str
+    tone: str
+    user_id: Optional[str] = None
+    project_id: Optional[str] = None
+
+
+def persona(i: int) -> dict:
+    return {
+        "id": f"persona-{i}",
+        "name": f"Persona {i}",
+        "description": "Manages user accounts, system configurations, and monitors platform health.",
+        "goals": ["Efficient user management", "System monitoring", "Access control"],
+        "painPoints": ["Complex configuration processes", "Limited visibility into system health"],
+        "keyFeatures": ["User management dashboard", "System analytics", "Role-based access control"],
+    }
+
+
+def personas_before(body: bytes) -> tuple:
+    request = LegacyPersonasRequest.model_validate(json.loads(body))
+    stored = json.dumps({"personas": request.selected_personas}, separators=(",", ":"))
+    response = {
+        "success": True,
+        "message": f"Successfully saved {len(request.selected_personas)} user persona(s)",
+        "data": {
+            "personas_saved": request.selected_personas,
+            "count": len(request.selected_personas),
+            "user_id": request.user_id,
+            "project_id": request.project_id,
+            "saved_at": SAVED_AT,
+            "next_step": "brand_design"
+        }
+    }
+    return stored, JSONResponse(jsonable_encoder(response)).body
+
+
+def personas_now(body: bytes) -> tuple:
+    request = UserPersonasUploadRequest.model_validate_json(body)
+    personas = encode_personas(request.selected_personas)
+    stored = member("personas", personas)
+    count = len(request.selected_personas)
+    data = merge_objects(member("personas_saved", personas), dumps({
+        "count": count,
+        "user_id": request.user_id,
+        "project_id": request.project_id,
+        "saved_at": SAVED_AT,
+        "next_step": "brand_design"
+    }))
+    message = dumps({"success": True, "message": f"Successfully saved {count} user persona(s)"})
+    return stored, merge_objects(message, member("data", data))
+
+
+def brand_before(body: bytes) -> tuple:
+    request = LegacyBrandDesignRequest.model_validate(json.loads(body))
+    design = {
+        "brandName": request.brandName,
+        "logoUrl": request.logoUrl,
+        "colors": request.colors,
+        "fontFamily": request.fontFamily,
+        "brandVoice": request.brandVoice,
+        "tone": request.tone,
+    }
+    stored = json.dumps(design, separators=(",", ":"))
+    response = {
+        "success": True,
+        "message": "Brand design saved successfully",
+        "data": {**design, "user_id": request.user_id, "project_id": request.project_id,
+                 "saved_at": SAVED_AT, "next_step": "business_logic"}
+    }
+    return stored, JSONResponse(jsonable_encoder(response)).body
+
+
+def brand_now(body: bytes) -> tuple:
+    request = BrandDesignUploadRequest.model_validate_json(body)
+    design = encode_brand_design(request)
+    data = merge_objects(design, dumps({"user_id": request.user_id, "project_id": request.project_id,
+                                        "saved_at": SAVED_AT, "next_step": "business_logic"}))
+    message = dumps({"success": True, "message": "Brand design saved successfully"})
+    return design, merge_objects(message, member("data", data))
+
+
+def per_call_us(func, body: bytes, budget: float) -> float:
+    """Mean µs per call over about `budget` seconds, after one warm-up call"""
+    func(body)
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        func(body)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= budget:
+            return elapsed / calls * 1e6
+
+
+def compare(label: str, count: int, body: bytes, before, now, budget: float):
+    stored_before, response_before = before(body)
+    stored_now, response_now = now(body)
+    assert json.loads(response_before) == json.loads(response_now), label
+    assert json.loads(stored_before) == json.loads(stored_now), label
+    before_us = per_call_us(before, body, budget)
+    now_us = per_call_us(now, body, budget)
+    print(f"{label:<20}{count:>6}{len(body):>10,}{before_us:>12.1f}{now_us:>10.1f}"
+          f"{now_us / count:>12.2f}{before_us / now_us:>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1,10,100,1000", help="Persona counts, comma separated")
+    parser.add_argument("--seconds", type=float, default=0.5, help="Time spent on each measurement")
+    args = parser.parse_args()
+
+    print(f"{'body':<20}{'items':>6}{'bytes':>10}{'before µs':>12}{'now µs':>10}{'µs/item':>12}{'speedup':>10}")
+    for count in (int(size) for size in args.sizes.split(",")):
+        body = json.dumps({
+            "selected_personas": [persona(i) for i in range(count)],
+            "user_id": "user_1",
+            "project_id": "proj_1",
+        }).encode()
+        compare("upload_userpersonas", count, body, personas_before, personas_now, args.seconds)
+
+    body = json.dumps({
+        "brandName": "TechCorp Solutions",
+        "logoUrl": None,
+        "colors": {"primary": "#3B82F6", "secondary": "#1E293B", "accent": "#8B5CF6",
+                   "background": "#0F172A", "foreground": "#F8FAFC"},
+        "fontFamily": "Inter",
+        "brandVoice": "Innovation Through Technology",
+        "tone": "Professional",
+        "user_id": "user_1",
+        "project_id": "proj_1",
+    }).encode()
+    compare("upload_branddesign", 1, body, brand_before, brand_now, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
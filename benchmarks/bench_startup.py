@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark
+
+Starts `python mock_backend.py` over and over and times, from spawning the
+process, the first 200 from /api/v1/health, the first 200 from
+/api/v1/ready (app loaded) and the end of a first real request. Runs the
+default lazy start and the --eager one, which loads everything before
+binding the port. One unmeasured start comes first so bytecode is compiled.
+
+CI runs it on every push (.github/workflows/cold-start.yml). --budget-ms
+and --ready-budget-ms make it exit 1 when the lazy median goes over budget;
+--output saves the results and --compare prints the change against a saved
+run.
+
+Usage: python benchmarks/bench_startup.py [--runs 10] [--budget-ms 400]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mock_server import cold_start  # noqa: E402
+
+MODES = ("lazy", "eager")
+TIMINGS = ("health_ms", "ready_ms", "first_request_ms")
+
+
+def summarize(runs: list) -> dict:
+    return {
+        timing: {
+            "min": min(run[timing] for run in runs),
+            "median": round(statistics.median(run[timing] for run in runs), 1),
+            "max": max(run[timing] for run in runs),
+        }
+        for timing in TIMINGS
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10, help="Cold starts per mode")
+    parser.add_argument("--mode", choices=("both",) + MODES, default="both")
+    parser.add_argument("--budget-ms", type=float, help="Fail when the lazy median time to health is higher")
+    parser.add_argument("--ready-budget-ms", type=float, help="Fail when the lazy median time to ready is higher")
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--compare", help="A JSON file from an earlier --output to compare against")
+    args = parser.parse_args()
+
+    modes = MODES if args.mode == "both" else (args.mode,)
+    cold_start()  # compile bytecode; not measured
+    results = {}
+    for mode in modes:
+        runs = [cold_start(eager=mode == "eager") for _ in range(args.runs)]
+        results[mode] = summarize(runs)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    print(f"median of {args.runs} cold starts, ms from spawning the process (min-max)")
+    print(f"{'mode':<7}{'timing':<18}{'median':>9}{'range':>16}{'vs baseline':>14}")
+    for mode, summary in results.items():
+        for timing in TIMINGS:
+            stats = summary[timing]
+            change = ""
+            if baseline and mode in baseline:
+                before = baseline[mode][timing]["median"]
+                change = f"{stats['median'] - before:+.1f}"
+            spread = f"{stats['min']:.0f}-{stats['max']:.0f}"
+            print(f"{mode:<7}{timing[:-3]:<18}{stats['median']:>9.1f}{spread:>16}{change:>14}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"runs": args.runs, "python": sys.version.split()[0], "results": results}, f, indent=2)
+
+    failures = []
+    lazy = results.get("lazy")
+    if lazy and args.budget_ms is not None and lazy["health_ms"]["median"] > args.budget_ms:
+        failures.append(f"time to health {lazy['health_ms']['median']} ms is over the {args.budget_ms} ms budget")
+    if lazy and args.ready_budget_ms is not None and lazy["ready_ms"]["median"] > args.ready_budget_ms:
+        failures.append(f"time to ready {lazy['ready_ms']['median']} ms is over the {args.ready_budget_ms} ms budget")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
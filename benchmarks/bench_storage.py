@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Storage read-latency benchmark
+
+Fills a scratch database with N projects and measures point reads on a hot
+project. Usage: python benchmarks/bench_storage.py [--projects 100000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_storage import Storage
+
+
+def percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))
+    return sorted_values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--projects", type=int, default=100_000)
+    parser.add_argument("--reads", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = Storage(path=os.path.join(tmp, "bench.db"), pool_size=1)
+        brand = {"brandName": "Bench", "colors": {"primary": "#000000"}, "fontFamily": "Inter"}
+
+        start = time.perf_counter()
+        with store._connection() as conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT INTO brand_designs (user_id, project_id, payload, version, updated_at, etag) "
+                "VALUES (?, ?, ?, 1, '', '')",
+                ((f"user_{i % 1000}", f"proj_{i}", '{"brandName":"Bench"}') for i in range(args.projects)),
+            )
+            conn.execute("COMMIT")
+        store.put("brand_designs", "user_hot", "proj_hot", brand)
+        print(f"Loaded {args.projects:,} projects in {time.perf_counter() - start:.2f}s")
+
+        timings = []
+        for _ in range(args.reads):
+            t0 = time.perf_counter()
+            store.get("brand_designs", "user_hot", "proj_hot")
+            timings.append(time.perf_counter() - t0)
+        timings.sort()
+
+        for pct in (50, 95, 99):
+            print(f"p{pct}: {percentile(timings, pct) * 1e6:.1f} µs")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Third-party catalog benchmark
+
+For the fixture catalog repeated --scales times (names suffixed), times the
+get_thirdparty body for a few filters, built two ways:
+
+- scan: filter the provider dicts in a loop, recount the summary over the
+  whole catalog and encode the page with dumps, as every request would
+  without indexes
+- indexed: ThirdPartyCatalog.match, page and render (posting lists, a cached
+  summary and pre-encoded providers; mock_thirdparty.py)
+
+Both must produce the same body. Then times replacing and removing one
+provider against rebuilding the catalog. Usage:
+python benchmarks/bench_thirdparty.py [--scales 1,10,100]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["MOCK_DB_PATH"] = os.path.join(_tmp.name, "bench.db")
+
+from mock_projects import encode_cursor  # noqa: E402
+from mock_responses import dumps  # noqa: E402
+from mock_thirdparty import DEFAULT_CATALOG_PATH, ThirdPartyCatalog, split_words  # noqa: E402
+
+ANALYZED_AT = "2026-01-01T00:00:00"
+PAGE_SIZE = 50
+
+# label -> (categories, required, keywords)
+QUERIES = {
+    "unfiltered": (None, None, ""),
+    "category": (["payment"], None, ""),
+    "required": (None, True, ""),
+    "keyword": (None, None, "webhook"),
+    "keyword prefix": (None, None, "auth"),
+    "category+keywords": (["sms", "email"], False, "delivery track"),
+}
+
+
+def providers_at(scale: int) -> list:
+    with open(DEFAULT_CATALOG_PATH, encoding="utf-8") as handle:
+        base = json.load(handle)["providers"]
+    if scale == 1:
+        return base
+    return [{**provider, "name": f"{provider['name']} {copy}"} for copy in range(scale) for provider in base]
+
+
+def scan(providers: list, categories, required, keywords: str) -> bytes:
+    words = split_words(keywords)
+    wanted = None if categories is None else {category.lower() for category in categories}
+    matched = []
+    for seq, provider in enumerate(providers, 1):
+        if wanted is not None and provider["category"].lower() not in wanted:
+            continue
+        if required is not None and bool(provider["required"]) != required:
+            continue
+        if words:
+            own = split_words(provider["name"])
+            for feature in provider["features"]:
+                own.extend(split_words(feature))
+            if not all(any(word.startswith(prefix) for word in own) for prefix in words):
+                continue
+        matched.append((seq, provider))
+
+    counts = {}
+    for provider in providers:
+        category = provider["category"].lower()
+        counts[category] = counts.get(category, 0) + 1
+    required_count = sum(1 for provider in providers if provider["required"])
+    page = matched[:PAGE_SIZE]
+    return dumps({
+        "apis": [provider for _, provider in page],
+        "summary": {
+            "total": len(providers),
+            "required": required_count,
+            "optional": len(providers) - required_count,
+            "categories": list(counts),
+            "category_counts": counts,
+        },
+        "matched": len(matched),
+        "next_cursor": encode_cursor(page[-1][0]) if len(matched) > PAGE_SIZE else None,
+        "analyzed_at": ANALYZED_AT,
+        "prd_version": "1.0.0",
+    })
+
+
+def indexed(catalog: ThirdPartyCatalog, categories, required, keywords: str) -> bytes:
+    seqs = catalog.match(categories, required, split_words(keywords))
+    found, next_cursor = catalog.page(seqs, PAGE_SIZE)
+    return catalog.render(found, len(seqs), next_cursor, ANALYZED_AT)
+
+
+def per_call_us(func, budget: float) -> float:
+    """Mean µs per call over about `budget` seconds, after one warm-up call"""
+    func()
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= budget:
+            return elapsed / calls * 1e6
+
+
+def build(providers: list) -> ThirdPartyCatalog:
+    catalog = ThirdPartyCatalog()
+    for provider in providers:
+        catalog.add(provider)
+    return catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scales", default="1,10,100", help="Catalog copies, comma separated")
+    parser.add_argument("--seconds", type=float, default=0.3, help="Time spent on each measurement")
+    args = parser.parse_args()
+
+    print(f"{'query':<20}{'providers':>10}{'matched':>9}{'scan µs':>11}{'indexed µs':>12}{'speedup':>10}")
+    for scale in (int(value) for value in args.scales.split(",")):
+        providers = providers_at(scale)
+        catalog = build(providers)
+        for label, (categories, required, keywords) in QUERIES.items():
+            body = indexed(catalog, categories, required, keywords)
+            assert json.loads(body) == json.loads(scan(providers, categories, required, keywords)), label
+            scan_us = per_call_us(lambda: scan(providers, categories, required, keywords), args.seconds)
+            indexed_us = per_call_us(lambda: indexed(catalog, categories, required, keywords), args.seconds)
+            print(f"{label:<20}{len(providers):>10,}{json.loads(body)['matched']:>9,}"
+                  f"{scan_us:>11.1f}{indexed_us:>12.1f}{scan_us / indexed_us:>9.1f}x")
+
+        middle = providers[len(providers) // 2]
+        changed = {**middle, "required": not middle["required"], "features": middle["features"] + ["Webhooks"]}
+        replace_us = per_call_us(lambda: (catalog.add(changed), catalog.add(middle)), args.seconds) / 2
+        remove_us = per_call_us(lambda: (catalog.remove(middle["name"]), catalog.add(middle)), args.seconds) / 2
+        rebuild_us = per_call_us(lambda: build(providers), args.seconds)
+        print(f"{'change one of ' + format(len(providers), ','):<20} replace {replace_us:.1f} µs, "
+              f"remove {remove_us:.1f} µs, rebuild {rebuild_us / 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Token store benchmark
+
+Fills a TokenStore to its ceiling, then measures token validation, issuing
+at the ceiling (which evicts) and a full sweep of expired tokens.
+Usage: python benchmarks/bench_tokens.py [--tokens 100000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_auth import TokenStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=500_000)
+    args = parser.parse_args()
+
+    store = TokenStore(ttl=3600, max_tokens=args.tokens)
+    start = time.perf_counter()
+    issued = [store.issue(f"user{i}@example.com").token for i in range(args.tokens)]
+    fill = time.perf_counter() - start
+
+    sample = random.choices(issued, k=args.lookups)
+    start = time.perf_counter()
+    for token in sample:
+        store.validate(token)
+    validate = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(10_000):
+        store.issue(f"extra{i}@example.com")
+    evict = time.perf_counter() - start
+    assert len(store) == args.tokens
+
+    expiring = TokenStore(ttl=-1, max_tokens=args.tokens)  # issued already expired
+    for i in range(args.tokens - 1):
+        expiring.issue(f"late{i}@example.com")
+    start = time.perf_counter()
+    removed = expiring.sweep()
+    sweep = time.perf_counter() - start
+
+    print(f"fill {args.tokens} tokens:    {fill / args.tokens * 1e6:8.2f} µs/token")
+    print(f"validate:              {validate / args.lookups * 1e6:8.2f} µs/lookup")
+    print(f"issue at ceiling:      {evict / 10_000 * 1e6:8.2f} µs/token (evicts)")
+    print(f"sweep {removed} expired:  {sweep * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
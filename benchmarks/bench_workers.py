@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Multi-worker scaling benchmark
+
+Starts the mock backend with 1, 2, ... N workers (state shared through
+SQLite from 2 workers up) and drives each with several load_test.py client
+processes, so the load generator does not become the bottleneck. Prints
+total throughput and latency per worker count.
+
+Usage: python benchmarks/bench_workers.py [--max-workers 4] [--duration 10]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server did not start: {url}")
+
+
+def run_point(workers, args, tmp):
+    env = {
+        **os.environ,
+        "MOCK_LOG": "off",
+        "MOCK_DB_PATH": os.path.join(tmp, f"bench_{workers}.db"),
+        "MOCK_FIXTURE_SCENARIO": "default",
+        "MOCK_RATE_LIMIT": "off",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-W", "ignore", "mock_backend.py", "--workers", str(workers), "--port", str(args.port),
+         "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        base_url = f"http://127.0.0.1:{args.port}"
+        # Health answers before the app has loaded (mock_server.py); readiness after
+        wait_until_up(f"{base_url}/api/v1/ready")
+        outputs = [os.path.join(tmp, f"w{workers}_c{i}.json") for i in range(args.clients)]
+        clients = [
+            subprocess.Popen(
+                [sys.executable, "load_test.py", "--base-url", base_url, "--scenario", args.scenario,
+                 "--concurrency", str(max(1, args.concurrency // args.clients)),
+                 "--duration", str(args.duration), "--seed", str(i), "--output", output],
+                cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            for i, output in enumerate(outputs)
+        ]
+        for client in clients:
+            client.wait()
+        reports = []
+        for output in outputs:
+            with open(output) as f:
+                reports.append(json.load(f))
+    finally:
+        server.terminate()
+        server.wait()
+
+    totals = [report["total"] for report in reports]
+    return {
+        "workers": workers,
+        "requests": sum(total["requests"] for total in totals),
+        "errors": sum(total["errors"] for total in totals),
+        "throughput_rps": round(sum(total["throughput_rps"] for total in totals), 1),
+        # Worst client's percentiles; clients see the same server so they are close
+        "p50_ms": max(total["latency_ms"]["p50"] or 0 for total in totals),
+        "p95_ms": max(total["latency_ms"]["p95"] or 0 for total in totals),
+        "p99_ms": max(total["latency_ms"]["p99"] or 0 for total in totals),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=64, help="Virtual users across all clients")
+    parser.add_argument("--clients", type=int, default=4, help="Load generator processes")
+    parser.add_argument("--scenario", default="browse")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--output", help="Write the scaling curve as JSON")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs; the load generator shares them with the server")
+    print(f"{'workers':>8}{'req/s':>10}{'speedup':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    curve = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in range(1, args.max_workers + 1):
+            point = run_point(workers, args, tmp)
+            curve.append(point)
+            speedup = point["throughput_rps"] / curve[0]["throughput_rps"] if curve[0]["throughput_rps"] else 0
+            print(
+                f"{workers:>8}{point['throughput_rps']:>10.0f}{speedup:>8.2f}x{point['p50_ms']:>9.1f}"
+                f"{point['p95_ms']:>9.1f}{point['p99_ms']:>9.1f}{point['errors']:>8}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"cpus": os.cpu_count(), "config": vars(args), "curve": curve}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Write-behind benchmark
+
+In process, --writers concurrent tasks make --saves persona saves in total,
+spread over --keys (user_id, project_id) keys, against a fresh SQLite
+database for each run. Compares:
+
+- direct: one transaction per save on the event loop (Storage.put_encoded,
+  what the upload handlers did)
+- commit: WriteBehind acknowledging once the save's batch is committed
+- buffer: WriteBehind acknowledging once the save is buffered, then flushed
+
+each with PRAGMA synchronous=NORMAL and FULL (MOCK_DB_SYNCHRONOUS). Reports
+saves per second, the transactions committed and the ack latency.
+Usage: python benchmarks/bench_writes.py [--saves 20000] [--writers 200] [--keys 1000]
+[--flush-ms 0]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PAYLOAD = json.dumps({"personas": [{
+    "id": "persona-1",
+    "name": "System Administrator",
+    "description": "Manages user accounts, system configurations, and monitors platform health.",
+    "goals": ["Efficient user management", "System monitoring", "Access control"],
+}]}, separators=(",", ":"))
+
+
+async def run(mode: str, args) -> dict:
+    from mock_storage import Storage
+    from mock_writes import WriteBehind
+
+    store = Storage(path=os.environ["MOCK_DB_PATH"], pool_size=2)
+    store.count("user_personas")  # create the tables outside the timing
+    # Never started for "direct", so stop() is a no-op and stats() counts nothing
+    writes = WriteBehind(store, durability="buffer" if mode == "direct" else mode,
+                         batch_size=args.batch_size, flush_interval=args.flush_ms / 1000)
+    if mode != "direct":
+        writes.start()
+    latencies = []
+    committed = []
+
+    async def writer(index: int):
+        for i in range(index, args.saves, args.writers):
+            key = f"proj_{i % args.keys}"
+            start = time.perf_counter()
+            if mode == "direct":
+                store.put_encoded("user_personas", "bench", key, PAYLOAD)
+                committed.append(1)
+                await asyncio.sleep(0)  # let the other writers in, as separate requests would
+            else:
+                await writes.save("user_personas", "bench", key, PAYLOAD, on_commit=committed.append)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(writer(index) for index in range(args.writers)))
+    acked = time.perf_counter() - start
+    await writes.stop()
+    durable = time.perf_counter() - start
+    stats = writes.stats()
+    assert store.count("user_personas") == min(args.keys, args.saves)
+    store.close()
+    latencies.sort()
+    return {
+        "saves_per_s": args.saves / acked,
+        "durable_s": durable,
+        "transactions": args.saves if mode == "direct" else stats["batches"],
+        "rows": len(committed),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def child(args):
+    print(json.dumps(asyncio.run(run(args.child, args))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--saves", type=int, default=20_000)
+    parser.add_argument("--writers", type=int, default=200, help="Concurrent saving tasks")
+    parser.add_argument("--keys", type=int, default=1000, help="Distinct (user_id, project_id) keys")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--flush-ms", type=float, default=0.0)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args)
+
+    print(f"{args.saves:,} saves from {args.writers} writers over {args.keys:,} keys")
+    print(f"{'synchronous':<13}{'mode':<8}{'saves/s':>10}{'all committed s':>17}{'transactions':>14}"
+          f"{'rows':>8}{'p50 ms':>9}{'p99 ms':>9}")
+    for synchronous in ("NORMAL", "FULL"):
+        for mode in ("direct", "commit", "buffer"):
+            with tempfile.TemporaryDirectory() as tmp:
+                # A fresh process per run, since the pragma is read at import
+                env = {**os.environ, "MOCK_LOG": "off", "MOCK_DB_SYNCHRONOUS": synchronous,
+                       "MOCK_DB_PATH": os.path.join(tmp, "bench.db")}
+                out = subprocess.run(
+                    [sys.executable, __file__, "--child", mode, *sys.argv[1:]],
+                    env=env, check=True, capture_output=True, text=True,
+                ).stdout
+            result = json.loads(out)
+            print(f"{synchronous:<13}{mode:<8}{result['saves_per_s']:>10,.0f}{result['durable_s']:>17.2f}"
+                  f"{result['transactions']:>14,}{result['rows']:>8,}{result['p50_ms']:>9.2f}{result['p99_ms']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Load test for the mock backend
+
+Runs scenarios from fixtures/load_scenarios.json (login → PRD → personas →
+brand → third-party) with many concurrent virtual users over a pooled
+keep-alive HTTP client, and reports p50/p95/p99 latency, throughput and
+error rate per endpoint. Results can be written as JSON and compared with an
+earlier run.
+
+--samples-out writes every request as a CSV row, in the format the mock
+backend's performance report ingests (POST /api/v1/perf/runs/{id}/samples).
+
+Usage:
+    python load_test.py --concurrency 50 --duration 30
+    python load_test.py --rps 200 --duration 60 --output results.json
+    python load_test.py --compare baseline.json --output results.json
+    python load_test.py --duration 60 --samples-out samples.csv
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+BASE_URL = "http://localhost:8000"
+SCENARIO_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "load_scenarios.json")
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(len(sorted_values) * pct / 100) - 1))
+    return sorted_values[index]
+
+
+def lookup(data, dotted):
+    """Fetch a value from nested JSON by a dotted path such as "user.id" """
+    for key in dotted.split("."):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def render(template, variables):
+    """Fill {name} placeholders in every string of a JSON-like template"""
+    if isinstance(template, str):
+        return template.format_map(variables)
+    if isinstance(template, dict):
+        return {key: render(value, variables) for key, value in template.items()}
+    if isinstance(template, list):
+        return [render(value, variables) for value in template]
+    return template
+
+
+class EndpointStats:
+    """Latencies and outcomes of one endpoint"""
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = {}
+        self.errors = 0
+
+    def record(self, latency, status, ok):
+        self.latencies.append(latency)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not ok:
+            self.errors += 1
+
+    def summary(self, elapsed):
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        ms = lambda value: None if value is None else round(value * 1000, 3)  # noqa: E731
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / count, 4) if count else 0.0,
+            "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                "mean": ms(sum(latencies) / count) if count else None,
+                "p50": ms(percentile(latencies, 50)),
+                "p95": ms(percentile(latencies, 95)),
+                "p99": ms(percentile(latencies, 99)),
+                "max": ms(latencies[-1]) if count else None,
+            },
+            "statuses": {str(status): total for status, total in sorted(self.statuses.items(), key=str)},
+        }
+
+
+class Pacer:
+    """Spaces request starts evenly to hold a target rate across all users"""
+
+    def __init__(self, rps):
+        self.interval = 1.0 / rps if rps else 0.0
+        self.next_slot = None
+
+    async def wait(self):
+        if not self.interval:
+            return
+        now = time.perf_counter()
+        if self.next_slot is None or self.next_slot < now - 1.0:
+            # Do not burst to catch up after a long stall
+            self.next_slot = now
+        slot = self.next_slot
+        self.next_slot += self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class LoadTest:
+    def __init__(self, base_url, scenarios, concurrency, rps, duration, iterations, seed, timeout, keep_samples=False):
+        self.base_url = base_url
+        self.scenarios = scenarios
+        self.concurrency = concurrency
+        self.duration = duration
+        self.iterations = iterations
+        self.seed = seed
+        self.timeout = timeout
+        self.pacer = Pacer(rps)
+        self.stats = {}
+        self.scenario_runs = 0
+        self.deadline = None
+        self.start = None
+        # (offset_ms, name, method, path, status, ok, latency_ms) per request, for --samples-out
+        self.samples = [] if keep_samples else None
+
+    async def run(self):
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=self.timeout) as client:
+            start = self.start = time.perf_counter()
+            self.deadline = start + self.duration if self.duration else None
+            await asyncio.gather(*(self.virtual_user(client, vu) for vu in range(self.concurrency)))
+            return time.perf_counter() - start
+
+    def finished(self, iteration):
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            return True
+        return self.iterations is not None and iteration >= self.iterations
+
+    async def virtual_user(self, client, vu):
+        # Each user gets its own seeded generator, so a run can be replayed
+        rng = random.Random(f"{self.seed}:{vu}")
+        names = sorted(self.scenarios)
+        iteration = 0
+        while not self.finished(iteration):
+            name = rng.choice(names)
+            variables = {
+                "vu": vu,
+                "iteration": iteration,
+                "email": f"load_{vu}@example.com",
+                "user_id": f"user_load_{vu}",
+                "project_id": f"proj_load_{vu}_{rng.randrange(1000)}",
+                "token": "",
+            }
+            await self.run_scenario(client, self.scenarios[name], variables)
+            self.scenario_runs += 1
+            iteration += 1
+
+    async def run_scenario(self, client, steps, variables):
+        for step in steps:
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                return
+            await self.pacer.wait()
+            ok, body = await self.send(client, step, variables)
+            if not ok:
+                # Later steps depend on earlier ones; start the next iteration
+                return
+            for var, path in step.get("capture", {}).items():
+                value = lookup(body, path)
+                if value is not None:
+                    variables[var] = value
+
+    async def send(self, client, step, variables):
+        name = step["name"]
+        headers = {}
+        if variables["token"]:
+            headers["Authorization"] = f"Bearer {variables['token']}"
+        kwargs = {"headers": headers}
+        if "params" in step:
+            kwargs["params"] = render(step["params"], variables)
+        if "json" in step:
+            kwargs["json"] = render(step["json"], variables)
+        if "form" in step:
+            kwargs["data"] = render(step["form"], variables)
+
+        stats = self.stats.setdefault(name, EndpointStats())
+        start = time.perf_counter()
+        try:
+            response = await client.request(step["method"], render(step["path"], variables), **kwargs)
+            body = response.content
+        except httpx.HTTPError as exc:
+            latency = time.perf_counter() - start
+            stats.record(latency, type(exc).__name__, ok=False)
+            self.keep_sample(step, start, 0, False, latency)
+            return False, None
+        latency = time.perf_counter() - start
+
+        ok = response.status_code == step.get("expect", 200)
+        stats.record(latency, response.status_code, ok)
+        self.keep_sample(step, start, response.status_code, ok, latency)
+        if not ok or not step.get("capture"):
+            return ok, None
+        try:
+            return ok, json.loads(body)
+        except ValueError:
+            return ok, None
+
+    def keep_sample(self, step, start, status, ok, latency):
+        if self.samples is not None:
+            self.samples.append((
+                # "endpoint" names a step whose path is filled in at run time
+                round((start - self.start) * 1000), step["name"], step["method"], step.get("endpoint", step["path"]),
+                status, int(ok), round(latency * 1000, 3),
+            ))
+
+    def write_samples(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("offset_ms", "name", "method", "endpoint", "status", "ok", "latency_ms"))
+            writer.writerows(self.samples)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(test, elapsed, args):
+    endpoints = {name: stats.summary(elapsed) for name, stats in sorted(test.stats.items())}
+    total = EndpointStats()
+    for stats in test.stats.values():
+        total.latencies.extend(stats.latencies)
+        total.errors += stats.errors
+        for status, count in stats.statuses.items():
+            total.statuses[status] = total.statuses.get(status, 0) + count
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "config": {
+            "base_url": args.base_url,
+            "scenarios": sorted(test.scenarios),
+            "concurrency": args.concurrency,
+            "rps": args.rps,
+            "duration": args.duration,
+            "iterations": args.iterations,
+            "seed": args.seed,
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "scenario_runs": test.scenario_runs,
+        "total": total.summary(elapsed),
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report, baseline=None):
+    def fmt(value):
+        return "-" if value is None else f"{value:.1f}"
+
+    header = f"{'endpoint':<22}{'reqs':>8}{'err%':>7}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    if baseline:
+        header += f"{'Δp95':>9}{'Δrps':>9}"
+    print("\n" + header)
+    print("-" * len(header))
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["total"])]
+    for name, row in rows:
+        latency = row["latency_ms"]
+        line = (
+            f"{name:<22}{row['requests']:>8}{row['error_rate'] * 100:>7.1f}{row['throughput_rps']:>9.1f}"
+            f"{fmt(latency['p50']):>9}{fmt(latency['p95']):>9}{fmt(latency['p99']):>9}"
+        )
+        if baseline:
+            before = baseline["total"] if name == "TOTAL" else baseline["endpoints"].get(name)
+            line += f"{delta(before, row, 'p95'):>9}{delta(before, row, 'rps'):>9}"
+        print(line)
+    print()
+
+
+def delta(before, after, metric):
+    """Relative change from a baseline row, as a signed percentage"""
+    if not before:
+        return "new"
+    if metric == "rps":
+        old, new = before["throughput_rps"], after["throughput_rps"]
+    else:
+        old, new = before["latency_ms"][metric], after["latency_ms"][metric]
+    if not old or new is None:
+        return "-"
+    return f"{(new - old) / old * 100:+.0f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the mock backend")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--scenario-file", default=SCENARIO_FILE)
+    parser.add_argument("--scenario", action="append", help="Scenario to run (repeatable, default: all)")
+    parser.add_argument("--concurrency", type=int, default=20, help="Virtual users (and pooled connections)")
+    parser.add_argument("--rps", type=float, default=0, help="Target requests per second (0 = as fast as possible)")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run (0 = until --iterations)")
+    parser.add_argument("--iterations", type=int, help="Scenario runs per virtual user")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for scenario and project choice")
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Earlier JSON report to compare against")
+    parser.add_argument("--samples-out", help="Write every request as a CSV row to this file")
+    args = parser.parse_args()
+
+    if not args.duration and args.iterations is None:
+        parser.error("--duration 0 requires --iterations")
+
+    with open(args.scenario_file) as f:
+        scenarios = json.load(f)
+    if args.scenario:
+        unknown = set(args.scenario) - set(scenarios)
+        if unknown:
+            parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+        scenarios = {name: scenarios[name] for name in args.scenario}
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print(f"🚀 {args.concurrency} users against {args.base_url}"
+          f" ({'unlimited' if not args.rps else f'{args.rps:g} req/s'},"
+          f" {f'{args.duration:g}s' if args.duration else f'{args.iterations} iterations'})")
+
+    test = LoadTest(
+        args.base_url, scenarios, args.concurrency, args.rps,
+        args.duration, args.iterations, args.seed, args.timeout,
+        keep_samples=bool(args.samples_out),
+    )
+    try:
+        elapsed = asyncio.run(test.run())
+    except KeyboardInterrupt:
+        sys.exit(130)
+
+    report = build_report(test, elapsed, args)
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Report written to {args.output}")
+    if args.samples_out:
+        test.write_samples(args.samples_out)
+        print(f"📄 {len(test.samples)} samples written to {args.samples_out}")
+    if report["total"]["requests"] == report["total"]["errors"]:
+        print("❌ No request succeeded. Is the mock backend running?")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
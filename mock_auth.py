@@ -0,0 +1,312 @@
+"""
+Bearer token sessions
+
+login issues tokens into an in-memory TokenStore: a dict of token -> Session
+for O(1) validation, plus a heap of expiry times so expired tokens are swept
+oldest-first without scanning the table. The table has a fixed ceiling; when
+it is full the token closest to expiry is dropped to make room.
+
+User ids are derived from the email, so the same email always gets the same
+user id, across logins and server restarts.
+
+With the sqlite state backend (multi-worker mode, see mock_state.py) tokens
+live in a shared table instead, so a token issued by one worker is valid on
+all of them; the expires_at index plays the part of the heap.
+
+Handlers take the shared `authenticate` dependency instead of parsing the
+Authorization header themselves. Missing, unknown and expired tokens are
+answered with 401. MOCK_AUTH_REQUIRED=off accepts them instead, for a
+frontend still holding a token from before a restart of the mock server.
+
+A request's token is validated once: the first of the rate limiter, the
+idempotency middleware and `authenticate` to ask (scope_session) keeps the
+session in the ASGI scope for the others, so with the sqlite backend one
+request costs one token query.
+"""
+
+import asyncio
+import hashlib
+import heapq
+import os
+import secrets
+import threading
+import time
+from typing import Optional
+
+from fastapi import HTTPException, Request
+
+from mock_state import SWEEP_BATCH, shared
+
+
+TOKEN_TTL_SECONDS = float(os.environ.get("MOCK_TOKEN_TTL", 24 * 3600))
+MAX_TOKENS = int(os.environ.get("MOCK_TOKEN_MAX", 100_000))
+SWEEP_INTERVAL_SECONDS = float(os.environ.get("MOCK_TOKEN_SWEEP_SECONDS", 60))
+AUTH_REQUIRED = os.environ.get("MOCK_AUTH_REQUIRED", "on").lower() not in ("0", "off", "false", "no")
+# Where scope_session keeps a request's validated session
+SCOPE_KEY = "mock_auth.session"
+
+
+def user_id_for(email: str) -> str:
+    """Stable user id for an email address"""
+    digest = hashlib.blake2b(email.strip().lower().encode("utf-8"), digest_size=8).hexdigest()
+    return f"user_{digest}"
+
+
+class Session:
+    """A logged-in user behind one bearer token"""
+
+    __slots__ = ("token", "user_id", "email", "expires_at")
+
+    def __init__(self, token: str, user_id: str, email: str, expires_at: float):
+        self.token = token
+        self.user_id = user_id
+        self.email = email
+        self.expires_at = expires_at
+
+
+class TokenStore:
+    """Bounded token table with heap-ordered expiry"""
+
+    def __init__(self, ttl: float = TOKEN_TTL_SECONDS, max_tokens: int = MAX_TOKENS):
+        self.ttl = ttl
+        self.max_tokens = max_tokens
+        self._sessions = {}  # token -> Session
+        self._expiry = []  # heap of (expires_at, token); may hold stale entries
+        self._lock = threading.Lock()
+        self.issued = 0
+        self.expired = 0
+        self.evicted = 0
+        self.rejected = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def issue(self, email: str) -> Session:
+        """Create a token for this email"""
+        now = time.time()
+        session = Session(f"mock_jwt_{secrets.token_urlsafe(32)}", user_id_for(email), email, now + self.ttl)
+        with self._lock:
+            if len(self._sessions) >= self.max_tokens:
+                self._sweep(now)
+            while len(self._sessions) >= self.max_tokens:
+                self._pop_soonest()
+                self.evicted += 1
+            self._sessions[session.token] = session
+            heapq.heappush(self._expiry, (session.expires_at, session.token))
+            self.issued += 1
+        return session
+
+    def validate(self, token: Optional[str]) -> Optional[Session]:
+        """The live session for a token, or None"""
+        if not token:
+            return None
+        session = self._sessions.get(token)
+        if session is None:
+            return None
+        if session.expires_at <= time.time():
+            # Left in the heap; the next sweep drops the stale entry
+            with self._lock:
+                if self._sessions.pop(token, None) is not None:
+                    self.expired += 1
+            return None
+        return session
+
+    def revoke(self, token: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(token, None) is not None
+
+    def _pop_soonest(self):
+        """Remove the live session closest to expiry (lock held)"""
+        while self._expiry:
+            expires_at, token = heapq.heappop(self._expiry)
+            session = self._sessions.get(token)
+            if session is not None and session.expires_at == expires_at:
+                del self._sessions[token]
+                return
+
+    def _sweep(self, now: float, limit: Optional[int] = None) -> int:
+        removed = 0
+        expiry = self._expiry
+        while expiry and expiry[0][0] <= now and (limit is None or removed < limit):
+            expires_at, token = heapq.heappop(expiry)
+            session = self._sessions.get(token)
+            if session is not None and session.expires_at == expires_at:
+                del self._sessions[token]
+                removed += 1
+        # Revoked and lazily expired tokens leave stale heap entries behind
+        if len(expiry) > 2 * len(self._sessions) + 1024:
+            self._expiry = [(s.expires_at, t) for t, s in self._sessions.items()]
+            heapq.heapify(self._expiry)
+        self.expired += removed
+        return removed
+
+    def sweep(self, limit: Optional[int] = None) -> int:
+        """Drop up to `limit` expired tokens and return how many were removed"""
+        with self._lock:
+            return self._sweep(time.time(), limit)
+
+    async def run_sweeper(self, interval: float = SWEEP_INTERVAL_SECONDS, batch: int = 1000):
+        """Sweep periodically until cancelled, yielding to requests between batches"""
+        while True:
+            await asyncio.sleep(interval)
+            while self.sweep(batch) == batch:
+                await asyncio.sleep(0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "tokens": len(self._sessions),
+                "heap_entries": len(self._expiry),
+                "max_tokens": self.max_tokens,
+                "ttl_seconds": self.ttl,
+                "issued": self.issued,
+                "expired": self.expired,
+                "evicted": self.evicted,
+                "rejected": self.rejected,
+                "auth_required": AUTH_REQUIRED,
+            }
+
+
+class SharedTokenStore(TokenStore):
+    """TokenStore kept in the shared database, valid across worker processes"""
+
+    def __init__(self, state, ttl: float = TOKEN_TTL_SECONDS, max_tokens: int = MAX_TOKENS):
+        super().__init__(ttl, max_tokens)
+        self.state = state
+
+    def __len__(self) -> int:
+        return self.state.token_count()
+
+    def issue(self, email: str) -> Session:
+        now = time.time()
+        session = Session(f"mock_jwt_{secrets.token_urlsafe(32)}", user_id_for(email), email, now + self.ttl)
+        count = self.state.token_count()
+        if count >= self.max_tokens:
+            count -= self.sweep()
+        if count >= self.max_tokens:
+            self.evicted += self.state.token_evict(count - self.max_tokens + 1)
+        self.state.token_put(session.token, session.user_id, session.email, session.expires_at)
+        self.issued += 1
+        return session
+
+    def validate(self, token: Optional[str]) -> Optional[Session]:
+        if not token:
+            return None
+        row = self.state.token_get(token)
+        if row is None:
+            return None
+        user_id, email, expires_at = row
+        if expires_at <= time.time():
+            return None
+        return Session(token, user_id, email, expires_at)
+
+    def revoke(self, token: str) -> bool:
+        return self.state.token_delete(token)
+
+    def sweep(self, limit: Optional[int] = None) -> int:
+        now = time.time()
+        removed = 0
+        while True:
+            batch = SWEEP_BATCH if limit is None else min(SWEEP_BATCH, limit - removed)
+            swept = self.state.token_sweep(now, batch) if batch > 0 else 0
+            removed += swept
+            if swept < batch or batch == 0:
+                break
+        self.expired += removed
+        return removed
+
+    def stats(self) -> dict:
+        # The counters are this worker's; the token count is shared
+        return {
+            "backend": "sqlite",
+            "tokens": len(self),
+            "max_tokens": self.max_tokens,
+            "ttl_seconds": self.ttl,
+            "issued": self.issued,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "rejected": self.rejected,
+            "auth_required": AUTH_REQUIRED,
+        }
+
+
+tokens = SharedTokenStore(shared) if shared is not None else TokenStore()
+
+
+class Auth:
+    """Result of the authenticate dependency"""
+
+    __slots__ = ("token", "session")
+
+    def __init__(self, token: Optional[str], session: Optional[Session]):
+        self.token = token
+        self.session = session
+
+    @property
+    def user_id(self) -> Optional[str]:
+        return self.session.user_id if self.session else None
+
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    """Token from an `Authorization: Bearer <token>` header"""
+    if authorization and authorization.startswith("Bearer "):
+        return authorization[7:]
+    return None
+
+
+def scope_session(scope) -> Optional[Session]:
+    """The live session of a request's bearer token, validated once per request"""
+    try:
+        return scope[SCOPE_KEY]
+    except KeyError:
+        pass
+    token = None
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            token = bearer_token(value.decode("latin-1"))
+            break
+    session = scope[SCOPE_KEY] = tokens.validate(token)
+    return session
+
+
+def admit(token: Optional[str], session: Optional[Session]) -> Optional[Auth]:
+    """Auth for a token and its session; None when it is rejected (unless MOCK_AUTH_REQUIRED=off)"""
+    if session is None and AUTH_REQUIRED:
+        tokens.rejected += 1
+        return None
+    return Auth(token, session)
+
+
+def resolve(token: Optional[str]) -> Optional[Auth]:
+    """admit, validating the token here"""
+    return admit(token, tokens.validate(token))
+
+
+def unauthorized(token: Optional[str]) -> HTTPException:
+    return HTTPException(
+        status_code=401,
+        detail="Invalid or expired token" if token else "Not authenticated",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def authenticate(request: Request) -> Auth:
+    """FastAPI dependency that resolves the bearer token to a session"""
+    token = bearer_token(request.headers.get("authorization"))
+    auth = admit(token, scope_session(request.scope))
+    if auth is None:
+        raise unauthorized(token)
+    return auth
+
+
+async def authenticate_stream(request: Request, token: Optional[str] = None) -> Auth:
+    """authenticate, also taking the token from ?token= (EventSource cannot set headers)"""
+    header_token = bearer_token(request.headers.get("authorization"))
+    if header_token:
+        auth = admit(header_token, scope_session(request.scope))
+    else:
+        auth = resolve(token)
+    if auth is None:
+        raise unauthorized(header_token or token)
+    return auth
@@ -1,13 +1,66 @@
-from fastapi import FastAPI, HTTPException, Form, Header
+if __name__ == "__main__":
+    # Start through mock_server before importing FastAPI, so the port is bound and
+    # /api/v1/health answers while the app loads in the background
+    import mock_server
+
+    mock_server.main()
+    raise SystemExit
+
+from fastapi import Depends, FastAPI, HTTPException, Form, Header, Request, Response, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
-import uvicorn
+import asyncio
+import hashlib
 from datetime import datetime, timedelta
+import logging
 import secrets
 
+from mock_auth import Auth, authenticate, authenticate_stream, bearer_token, resolve, tokens
+from mock_blobs import IMMUTABLE_HEADERS, MAX_BLOB_BYTES, BlobError, absolute_url, blob_url, blobs, is_data_url
+from mock_compression import CompressionMiddleware, compression_counters
+from mock_events import EventBus, TooManySubscribers, project_topic, sse_stream, websocket_stream
+from mock_fixtures import fixtures
+from mock_idempotency import IdempotencyMiddleware, idempotency
+from mock_jobs import JobQueue, JobQueueFull, job_events, remote_job_events
+from mock_logging import get_logger, token_preview
+from mock_metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, metrics
+from mock_perf import DEFAULT_SLO_MS, PerfRun, RunFull, SampleError, SampleReader, perf_runs
+from mock_prd import MAX_STORED_TEXT_CHARS, PRDAnalyzer, analyze_cached, normalize_text, prd_cache, utf8_decoder
+from mock_projects import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor, projects
+from mock_ratelimit import RateLimitMiddleware, admission, rate_limiter
+from mock_responses import (
+    JSONBytesResponse,
+    conditional_response,
+    dumps,
+    etag_counters,
+    etag_matches,
+    format_etag,
+    json_response,
+)
+from mock_schemas import (
+    BrandDesignUploadRequest,
+    UserPersonasUploadRequest,
+    body_schema,
+    encode_brand_design,
+    encode_personas,
+    member,
+    merge_objects,
+    read_model,
+)
+from mock_state import shared
+from mock_storage import storage
+from mock_thirdparty import split_words, thirdparty
+from mock_writes import write_behind
+
 app = FastAPI(title="CodeBenders API", version="1.0.0")
 
+# Innermost, so replayed uploads still get fresh CORS headers and compression
+app.add_middleware(IdempotencyMiddleware, store=idempotency)
+# Inside CORS, so browsers can read 429/503 rejections (mock_ratelimit.py)
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter, admission=admission)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -15,7 +68,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Idempotent-Replayed", "Retry-After"],
 )
+app.add_middleware(CompressionMiddleware)
+# Added last so it is outermost and times the whole request (mock_metrics.py)
+app.add_middleware(MetricsMiddleware, metrics=metrics)
 
 
 # Request models
@@ -33,6 +90,41 @@ class PRDUploadResponse(BaseModel):
     data: dict
 
 
+# Background PRD analysis jobs
+prd_jobs = JobQueue(state=shared)
+
+# Change events for the wizard pages, per project (mock_events.py)
+project_events = EventBus(state=shared)
+
+# Periodic sweep of expired bearer tokens
+token_sweeper = None
+# Event-loop lag probe for /metrics
+lag_probe = None
+
+
+@app.on_event("startup")
+async def startup():
+    global token_sweeper, lag_probe
+    token_sweeper = asyncio.create_task(tokens.run_sweeper())
+    project_events.start()
+    write_behind.start()
+    if metrics.enabled:
+        lag_probe = asyncio.create_task(metrics.run_lag_probe())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    if token_sweeper is not None:
+        token_sweeper.cancel()
+    if lag_probe is not None:
+        lag_probe.cancel()
+    await prd_jobs.shutdown()
+    # Buffered saves are committed, and their events published, before the streams close
+    await write_behind.stop()
+    await project_events.stop()
+    storage.close()
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -45,6 +137,84 @@ async def health_check():
     return {"status": "healthy", "service": "codebenders-api"}
 
 
+@app.get("/api/v1/ready")
+async def readiness_check():
+    """Readiness check; mock_server answers 503 here until the app has loaded"""
+    return {"status": "ready"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Request, payload and event-loop metrics in the Prometheus text format"""
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/api/v1/stats/etags")
+async def etag_stats():
+    """Conditional GET hit (304) and miss (200) counters per route"""
+    return {"routes": etag_counters.snapshot()}
+
+
+@app.get("/api/v1/stats/compression")
+async def compression_stats():
+    """Compressed responses per encoding, bytes before and after, and small bodies left alone"""
+    return compression_counters.snapshot()
+
+
+@app.get("/api/v1/stats/idempotency")
+async def idempotency_stats():
+    """Stored upload responses, replays, coalesced retries and key reuse with another body"""
+    return idempotency.stats()
+
+
+@app.get("/api/v1/stats/rate_limits")
+async def rate_limit_stats():
+    """Token buckets per route class, admission queue and shed requests"""
+    return {"rate_limits": rate_limiter.stats(), "admission": admission.stats()}
+
+
+@app.get("/api/v1/stats/perf")
+async def perf_stats():
+    """Stored load-test runs, samples and the memory their columns take"""
+    return perf_runs.stats()
+
+
+@app.get("/api/v1/stats/prd_cache")
+async def prd_cache_stats():
+    """PRD analysis cache size, hit, miss and eviction counters"""
+    return prd_cache.stats()
+
+
+@app.get("/api/v1/stats/fixtures")
+async def fixture_stats():
+    """Active fixture scenario and how often each variant was served"""
+    return fixtures.stats()
+
+
+@app.get("/api/v1/stats/tokens")
+async def token_stats():
+    """Bearer token table size, ceiling and expiry counters"""
+    return tokens.stats()
+
+
+@app.get("/api/v1/stats/prd_jobs")
+async def prd_job_stats():
+    """PRD job queue depth, capacity and rejections"""
+    return prd_jobs.stats()
+
+
+@app.get("/api/v1/stats/writes")
+async def write_stats():
+    """Write-behind buffer: durability mode, buffered and coalesced saves, batches committed"""
+    return write_behind.stats()
+
+
+@app.get("/api/v1/stats/events")
+async def event_stats():
+    """Project event subscribers, queued events and slow-consumer counters"""
+    return project_events.stats()
+
+
 @app.post("/api/v1/auth/login")
 async def login(username: str = Form(...), password: str = Form(...)):
     """
@@ -75,15 +245,15 @@ async def login(username: str = Form(...), password: str = Form(...)):
             detail="Invalid credentials"
         )
     
-    # Generate a mock JWT-like token
-    mock_token = f"mock_jwt_{secrets.token_urlsafe(32)}"
+    # Issue a mock JWT-like token; the user id is stable per email
+    session = tokens.issue(username)
     
     # Extract name from email
     user_name = username.split('@')[0] if '@' in username else username
     
     # Create mock user object
     user_data = {
-        "id": f"user_{secrets.token_hex(8)}",
+        "id": session.user_id,
         "email": username,
         "name": user_name.capitalize(),
         "is_verified": True,
@@ -91,16 +261,73 @@ async def login(username: str = Form(...), password: str = Form(...)):
     }
     
     return {
-        "access_token": mock_token,
+        "access_token": session.token,
         "token_type": "bearer",
         "user": user_data
     }
 
 
-@app.post("/api/upload_prd", response_model=PRDUploadResponse)
+def publish_saved(event_type: str, record, user_id: Optional[str], project_id: Optional[str]):
+    """Tell the project's event subscribers that a document was saved"""
+    if project_id:
+        project_events.publish(project_topic(user_id, project_id), event_type, {
+            "project_id": project_id,
+            "user_id": user_id,
+            "version": record.version,
+            "etag": format_etag(record.etag),
+            "saved_at": record.updated_at
+        })
+
+
+def save_prd(
+    user_id: Optional[str],
+    project_id: Optional[str],
+    source: Optional[str],
+    char_count: int,
+    summary: dict,
+    text: Optional[str]
+) -> dict:
+    """Build the PRD response data from a finished analysis and persist it"""
+    
+    # Keep the PRD id stable across re-uploads for the same project
+    existing = storage.get("prds", user_id, project_id)
+    prd_id = existing.data["prd_id"] if existing else f"prd_{secrets.token_hex(6)}"
+    
+    # Mock response data
+    response_data = {
+        "prd_id": prd_id,
+        "user_id": user_id,
+        "project_id": project_id,
+        "text_length": char_count,
+        "word_count": summary["word_count"],
+        "source": source,
+        "analysis": summary["analysis"],
+        # Vocabulary terms found in the PRD, grouped by section
+        "extracted_sections": {
+            "overview": "Mock project overview extracted from PRD",
+            **summary["extracted_sections"]
+        },
+        "next_steps": [
+            "Review generated user personas",
+            "Select target audience",
+            "Define brand design",
+            "Configure business logic"
+        ],
+        "timestamp": datetime.now().isoformat()
+    }
+    
+    # Persist the PRD text alongside its analysis so get_prd can return it
+    stored = {**response_data, "text": text} if text is not None else response_data
+    record = storage.put("prds", user_id, project_id, stored)
+    publish_saved("prd.saved", record, user_id, project_id)
+    
+    return response_data
+
+
+@app.post("/api/upload_prd", response_model=PRDUploadResponse, status_code=202)
 async def upload_prd(
     request: PRDUploadRequest,
-    authorization: Optional[str] = Header(None)
+    auth: Auth = Depends(authenticate)
 ):
     """
     Mock endpoint for PRD upload
@@ -113,78 +340,179 @@ async def upload_prd(
     
     Headers:
     - Authorization: Bearer token (automatically sent by frontend)
+    - Idempotency-Key: Optional; a retry with the same key gets the first response back
+    
+    The PRD is analyzed in the background. The response (202 Accepted) holds
+    the job id; follow the job at events_url (Server-Sent Events) or poll
+    status_url. The final event carries the usual PRDUploadResponse.
     
     Returns:
-    - success: Boolean indicating if processing was successful
+    - success: Boolean indicating if the PRD was accepted
     - message: Human-readable message
-    - data: Processed PRD data
-    """
+    - data: job_id, status, queue_position, status_url and events_url
     
-    # Extract token from Authorization header
-    token = None
-    if authorization and authorization.startswith("Bearer "):
-        token = authorization.replace("Bearer ", "")
+    Returns 503 with Retry-After when the job queue is full.
+    """
     
     # Log the incoming request for debugging
-    print(f"\n📥 PRD Upload Request:")
-    print(f"   🔑 Token: {token[:20] + '...' if token else 'None'}")
-    print(f"   👤 User ID: {request.user_id}")
-    print(f"   📁 Project ID: {request.project_id}")
-    print(f"   📄 Source: {request.source}")
-    print(f"   📝 Text Length: {len(request.text)} characters\n")
+    log = get_logger("upload_prd")
+    log.info(
+        "request",
+        token=token_preview(auth.token),
+        user_id=request.user_id,
+        project_id=request.project_id,
+        source=request.source,
+        text_length=len(request.text),
+    )
+    
+    normalized = normalize_text(request.text)
     
     # Validate that text is not empty
-    if not request.text or len(request.text.strip()) == 0:
+    if not normalized:
         raise HTTPException(
             status_code=400,
             detail="PRD text cannot be empty"
         )
     
-    # Mock processing of the PRD text
-    word_count = len(request.text.split())
-    char_count = len(request.text)
+    async def process(job):
+        # Re-uploads of the same text are served from the analysis cache
+        summary = await analyze_cached(normalized, job.report)
+        response_data = save_prd(
+            request.user_id, request.project_id, request.source, len(request.text), summary, request.text
+        )
+        log.info("processed", job_id=job.id, word_count=summary["word_count"])
+        return PRDUploadResponse(
+            success=True,
+            message="PRD processed successfully",
+            data=response_data
+        ).model_dump()
+    
+    try:
+        job = prd_jobs.submit(process)
+    except JobQueueFull:
+        log.warning("rejected", reason="job queue full")
+        raise HTTPException(
+            status_code=503,
+            detail="PRD processing queue is full, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
     
-    # Extract some mock insights
-    has_features = "feature" in request.text.lower()
-    has_requirements = "requirement" in request.text.lower()
-    has_goals = "goal" in request.text.lower()
+    return PRDUploadResponse(
+        success=True,
+        message="PRD accepted for processing",
+        data={
+            "job_id": job.id,
+            "status": job.status,
+            "queue_position": prd_jobs.position(job),
+            "status_url": f"/api/prd_jobs/{job.id}",
+            "events_url": f"/api/prd_jobs/{job.id}/events"
+        }
+    )
+
+
+@app.get("/api/prd_jobs/{job_id}")
+async def get_prd_job(job_id: str):
+    """
+    Status of a background PRD job
     
-    # Mock response data
-    response_data = {
-        "prd_id": "prd_mock_12345",
-        "user_id": request.user_id,
-        "project_id": request.project_id,
-        "text_length": char_count,
-        "word_count": word_count,
-        "source": request.source,
-        "analysis": {
-            "contains_features": has_features,
-            "contains_requirements": has_requirements,
-            "contains_goals": has_goals,
-            "estimated_complexity": "medium" if word_count > 100 else "low",
-        },
-        "extracted_sections": {
-            "overview": "Mock project overview extracted from PRD",
-            "target_users": ["User type 1", "User type 2"],
-            "key_features": [
-                "Feature 1 from PRD",
-                "Feature 2 from PRD",
-                "Feature 3 from PRD"
-            ],
-            "technical_requirements": [
-                "Backend API",
-                "Database",
-                "Frontend UI"
-            ]
-        },
-        "next_steps": [
-            "Review generated user personas",
-            "Select target audience",
-            "Define brand design",
-            "Configure business logic"
-        ],
-        "timestamp": datetime.now().isoformat()
-    }
+    Returns:
+    - job_id, status (queued, running, completed, failed), progress (0-1),
+      queue_position, and result (the PRDUploadResponse) once completed
+    """
+    
+    job = prd_jobs.get(job_id)
+    if job is not None:
+        return {**job.snapshot(), "queue_position": prd_jobs.position(job), "result": job.result}
+    
+    # Accepted by another worker
+    snapshot = prd_jobs.get_shared(job_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {**snapshot, "queue_position": 0}
+
+
+@app.get("/api/prd_jobs/{job_id}/events")
+async def prd_job_events(job_id: str):
+    """
+    Server-Sent Events stream for a background PRD job
+    
+    Events:
+    - progress: job status and progress (sent on every change)
+    - result: the final PRDUploadResponse
+    - error: the failure reason if the job failed
+    """
+    
+    job = prd_jobs.get(job_id)
+    if job is not None:
+        events = job_events(job)
+    elif prd_jobs.get_shared(job_id) is not None:
+        # Accepted by another worker
+        events = remote_job_events(prd_jobs, job_id)
+    else:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/api/upload_prd/stream", response_model=PRDUploadResponse)
+async def upload_prd_stream(
+    request: Request,
+    user_id: Optional[str] = None,
+    project_id: Optional[str] = None,
+    source: Optional[str] = "stream",
+    auth: Auth = Depends(authenticate)
+):
+    """
+    Streaming PRD upload for large documents
+    
+    Accepts:
+    - Request body: the raw PRD text (UTF-8), typically sent with
+      Transfer-Encoding: chunked
+    
+    Query Parameters:
+    - user_id: ID of the user uploading the PRD (optional)
+    - project_id: ID of the project this PRD belongs to (optional)
+    - source: Origin of the text (default "stream")
+    
+    The body is analyzed chunk by chunk as it arrives, so memory use does not
+    grow with the document size. The text itself is only stored (for get_prd)
+    when it is at most MOCK_PRD_STORE_LIMIT characters.
+    
+    Returns:
+    - Same response as /api/upload_prd
+    """
+    
+    log = get_logger("upload_prd_stream")
+    log.info("request", token=token_preview(auth.token), user_id=user_id, project_id=project_id, source=source)
+    
+    analyzer = PRDAnalyzer()
+    decoder = utf8_decoder()
+    kept_chunks = []
+    async for data in request.stream():
+        chunk = decoder.decode(data)
+        analyzer.feed(chunk)
+        if kept_chunks is not None:
+            kept_chunks.append(chunk)
+            if analyzer.char_count > MAX_STORED_TEXT_CHARS:
+                kept_chunks = None
+    tail = decoder.decode(b"", True)
+    analyzer.feed(tail)
+    
+    if analyzer.is_empty:
+        raise HTTPException(
+            status_code=400,
+            detail="PRD text cannot be empty"
+        )
+    
+    text = None
+    if kept_chunks is not None and analyzer.char_count <= MAX_STORED_TEXT_CHARS:
+        text = "".join(kept_chunks) + tail
+    
+    log.info("analyzed", text_length=analyzer.char_count, word_count=analyzer.word_count, text_stored=text is not None)
+    response_data = save_prd(user_id, project_id, source, analyzer.char_count, analyzer.summary(), text)
     
     return PRDUploadResponse(
         success=True,
@@ -193,25 +521,261 @@ async def upload_prd(
     )
 
 
+@app.get("/api/get_prd")
+async def get_prd(
+    user_id: Optional[str] = None,
+    project_id: Optional[str] = None,
+    auth: Auth = Depends(authenticate)
+):
+    """
+    Endpoint for getting the last uploaded PRD of a project
+    
+    Query Parameters:
+    - user_id: ID of the user (optional)
+    - project_id: ID of the project (optional)
+    
+    Returns:
+    - The stored PRD (including its text), or an empty object if none was uploaded
+    """
+    
+    log = get_logger("get_prd")
+    log.info("request", token=token_preview(auth.token), user_id=user_id, project_id=project_id)
+    
+    record = storage.get("prds", user_id, project_id)
+    if record is None:
+        return {}
+    return record.data
+
+
+class ProjectCreateRequest(BaseModel):
+    name: str
+    description: Optional[str] = None
+    user_id: Optional[str] = None
+
+
+class ProjectUpdateRequest(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[str] = None
+    user_id: Optional[str] = None
+
+
+def validate_project_name(name: Optional[str]) -> str:
+    name = (name or "").strip()
+    if not name:
+        raise HTTPException(status_code=400, detail="Project name is required")
+    if len(name) > 255:
+        raise HTTPException(status_code=400, detail="Project name must be at most 255 characters")
+    return name
+
+
 @app.get("/api/v1/projects")
-async def get_projects():
-    """Mock endpoint for getting projects"""
+async def get_projects(
+    page: int = 1,
+    size: int = DEFAULT_PAGE_SIZE,
+    search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    user_id: Optional[str] = None,
+    auth: Auth = Depends(authenticate),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Mock endpoint for listing projects, newest first
+    
+    Query Parameters:
+    - page: Page number (default 1), ignored when cursor is given
+    - size: Projects per page (default 50, at most 200)
+    - search: Case-insensitive substring of the project name (optional)
+    - cursor: next_cursor from the previous page, for keyset pagination (optional)
+    - user_id: Owner of the projects, when not logged in (optional)
+    
+    Headers:
+    - Authorization: Bearer token (automatically sent by frontend)
+    
+    Returns:
+    - projects: The page of projects
+    - total: Number of projects (null when searching)
+    - page, size: The page returned
+    - next_cursor: Cursor for the next page, or null on the last page
+    """
+    
+    if page < 1 or not 1 <= size <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"page must be >= 1 and size between 1 and {MAX_PAGE_SIZE}")
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    owner = auth.user_id or user_id
+    index = projects.index(owner)
+    
+    # The revision changes on every create, rename and delete
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{owner}|{projects.revision(index)}|{page}|{size}|{search}|{cursor}".encode("utf-8"))
+    
+    def build():
+        found, last, more = index.page(size, cursor=after, search=search, offset=0 if cursor else (page - 1) * size)
+        return json_response({
+            "success": True,
+            "projects": found,
+            "total": None if search and search.strip() else len(index),
+            "page": page,
+            "size": size,
+            "next_cursor": encode_cursor(last) if more else None,
+        })
+    
+    return conditional_response("get_projects", if_none_match, format_etag(digest.hexdigest(), weak=True), build)
+
+
+@app.post("/api/v1/projects", status_code=201)
+async def create_project(request: ProjectCreateRequest, auth: Auth = Depends(authenticate)):
+    """
+    Mock endpoint for creating a project
+    
+    Accepts:
+    - name: Project name (required, at most 255 characters)
+    - description: Project description (optional)
+    - user_id: Owner of the project, when not logged in (optional)
+    
+    Returns:
+    - The created project (201 Created)
+    """
+    
+    log = get_logger("create_project")
+    log.info("request", token=token_preview(auth.token), user_id=auth.user_id or request.user_id)
+    
+    name = validate_project_name(request.name)
+    return projects.create(auth.user_id or request.user_id, name, request.description)
+
+
+@app.patch("/api/v1/projects/{project_id}")
+async def update_project(project_id: str, request: ProjectUpdateRequest, auth: Auth = Depends(authenticate)):
+    """
+    Mock endpoint for renaming or updating a project
+    
+    Accepts:
+    - name, description, status: Fields to change (all optional)
+    - user_id: Owner of the project, when not logged in (optional)
+    
+    Returns:
+    - The updated project
+    """
+    
+    log = get_logger("update_project")
+    log.info("request", token=token_preview(auth.token), user_id=auth.user_id or request.user_id, project_id=project_id)
+    
+    fields = request.model_dump(exclude_unset=True, exclude={"user_id"})
+    if "name" in fields:
+        fields["name"] = validate_project_name(fields["name"])
+    project = projects.update(auth.user_id or request.user_id, project_id, **fields)
+    if project is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return project
+
+
+@app.delete("/api/v1/projects/{project_id}", status_code=204)
+async def delete_project(project_id: str, user_id: Optional[str] = None, auth: Auth = Depends(authenticate)):
+    """Mock endpoint for deleting a project"""
+    
+    log = get_logger("delete_project")
+    log.info("request", token=token_preview(auth.token), user_id=auth.user_id or user_id, project_id=project_id)
+    
+    if not projects.delete(auth.user_id or user_id, project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+    return Response(status_code=204)
+
+
+def owned_project_topic(owner: Optional[str], project_id: str) -> Optional[str]:
+    """The event topic of the project, or None if the owner has no such project"""
+    if projects.index(owner).get(project_id) is None:
+        return None
+    return project_topic(owner, project_id)
+
+
+@app.get("/api/v1/projects/{project_id}/events")
+async def stream_project_events(
+    project_id: str,
+    user_id: Optional[str] = None,
+    auth: Auth = Depends(authenticate_stream),
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    Server-Sent Events stream of a project's changes
+    
+    Only the project's owner can follow it, and gets the events of their own
+    saves (those sent with their user_id); anyone else gets 404.
+    
+    Query Parameters:
+    - token: Bearer token, for EventSource, which cannot send headers (optional)
+    - user_id: Owner of the project, when not logged in (optional)
+    
+    Headers:
+    - Last-Event-ID: Sent by EventSource when it reconnects; missed events are replayed
+    
+    Events (data: project_id, user_id, version, etag, saved_at):
+    - prd.saved, user_personas.saved, brand_design.saved: a save committed;
+      refetch with If-None-Match set to etag
+    - resync: events were dropped (slow reader, or too long away); refetch everything
+    """
+    
+    topic = owned_project_topic(auth.user_id or user_id, project_id)
+    if topic is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    try:
+        project_events.check_capacity()
+    except TooManySubscribers:
+        raise HTTPException(status_code=503, detail="Too many event streams, retry later", headers={"Retry-After": "5"})
+    return StreamingResponse(
+        sse_stream(project_events, topic, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.websocket("/api/v1/projects/{project_id}/ws")
+async def project_events_websocket(
+    websocket: WebSocket,
+    project_id: str,
+    token: Optional[str] = None,
+    user_id: Optional[str] = None,
+    last_event_id: Optional[str] = None
+):
+    """
+    The project event stream over a WebSocket
+    
+    Every event is one text message: {"id": ..., "event": ..., "data": {...}}.
+    The token, user_id (when not logged in) and the last event id seen are
+    query parameters. A missing token or a project the caller does not own
+    closes the socket with code 1008. A stream the server drops (a slow
+    reader under MOCK_EVENT_SLOW_POLICY=disconnect, or shutdown) is closed
+    with code 1013, try again later.
+    """
+    
+    auth = resolve(bearer_token(websocket.headers.get("authorization")) or token)
+    if auth is None:
+        await websocket.close(code=1008)
+        return
+    topic = owned_project_topic(auth.user_id or user_id, project_id)
+    if topic is None:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    try:
+        subscriber = project_events.subscribe(topic, last_event_id)
+    except TooManySubscribers:
+        await websocket.close(code=1013)
+        return
+    await websocket_stream(project_events, subscriber, websocket)
+
+
+def stored_personas(record) -> dict:
+    """get_userpersonas body for saved personas"""
     return {
         "success": True,
-        "projects": [
-            {
-                "id": "proj_1",
-                "name": "E-commerce Platform",
-                "status": "in_progress",
-                "created_at": "2024-10-01T10:00:00Z"
-            },
-            {
-                "id": "proj_2",
-                "name": "Social Media App",
-                "status": "draft",
-                "created_at": "2024-10-05T15:30:00Z"
-            }
-        ]
+        "personas": record.data["personas"] if record else [],
+        "message": "User personas retrieved successfully"
     }
 
 
@@ -219,7 +783,8 @@ async def get_projects():
 async def get_userpersonas(
     user_id: Optional[str] = None,
     project_id: Optional[str] = None,
-    authorization: Optional[str] = Header(None)
+    auth: Auth = Depends(authenticate),
+    if_none_match: Optional[str] = Header(None)
 ):
     """
     Mock endpoint for getting user personas
@@ -236,102 +801,45 @@ async def get_userpersonas(
     - personas: List of user personas (empty if none exist)
     """
     
-    # Extract token from Authorization header
-    token = None
-    if authorization and authorization.startswith("Bearer "):
-        token = authorization.replace("Bearer ", "")
-    
     # Log the incoming request for debugging
-    print(f"\n📥 Get User Personas Request:")
-    print(f"   🔑 Token: {token[:20] + '...' if token else 'None'}")
-    print(f"   👤 User ID: {user_id}")
-    print(f"   📁 Project ID: {project_id}\n")
-    
-    # For demonstration, return empty personas 50% of the time
-    # You can change this logic based on your needs
-    import random
-    
-    # Uncomment line below to always return data for testing
-    # has_personas = True
-    
-    # Uncomment line below to always return empty for testing
-    # has_personas = False
-    
-    # Random behavior for testing both scenarios
-    has_personas = random.choice([True, False])
-    
-    if has_personas:
-        # Return mock personas when data exists
-        mock_personas = [
-            {
-                "id": "persona-1",
-                "name": "System Administrator",
-                "description": "Manages user accounts, system configurations, and monitors platform health. Requires comprehensive dashboard with admin controls.",
-                "goals": ["Efficient user management", "System monitoring", "Access control"],
-                "painPoints": ["Complex configuration processes", "Limited visibility into system health"],
-                "keyFeatures": ["User management dashboard", "System analytics", "Role-based access control"]
-            },
-            {
-                "id": "persona-2",
-                "name": "Business Analyst",
-                "description": "Analyzes business data, generates reports, and makes data-driven decisions. Needs intuitive analytics and reporting tools.",
-                "goals": ["Data visualization", "Report generation", "Trend analysis"],
-                "painPoints": ["Difficulty in accessing real-time data", "Complex reporting interfaces"],
-                "keyFeatures": ["Interactive dashboards", "Custom report builder", "Data export capabilities"]
-            },
-            {
-                "id": "persona-3",
-                "name": "End User/Customer",
-                "description": "Primary user of the application who interacts with core features. Expects simple, intuitive interface with quick task completion.",
-                "goals": ["Quick task completion", "Easy navigation", "Reliable service"],
-                "painPoints": ["Complicated workflows", "Slow response times"],
-                "keyFeatures": ["Streamlined workflows", "Quick actions", "Responsive interface"]
-            },
-            {
-                "id": "persona-4",
-                "name": "Developer/Technical User",
-                "description": "Integrates systems, manages APIs, and customizes functionality. Requires technical documentation and developer tools.",
-                "goals": ["API integration", "System customization", "Technical documentation"],
-                "painPoints": ["Poor API documentation", "Limited customization options"],
-                "keyFeatures": ["API documentation", "Developer console", "Webhook management"]
-            }
-        ]
+    log = get_logger("get_userpersonas")
+    log.info("request", token=token_preview(auth.token), user_id=user_id, project_id=project_id)
+    
+    # Return the personas saved for this project, if any
+    etag = write_behind.get_etag("user_personas", user_id, project_id)
+    if etag is not None:
+        def build():
+            return json_response(stored_personas(write_behind.get("user_personas", user_id, project_id)))
         
-        return {
-            "success": True,
-            "personas": mock_personas,
-            "message": "User personas retrieved successfully"
-        }
-    else:
-        # Return empty personas
-        return {
-            "success": True,
-            "personas": [],
-            "message": "No user personas found"
-        }
-
-
-class UserPersonasUploadRequest(BaseModel):
-    selected_personas: list
-    user_id: Optional[str] = None
-    project_id: Optional[str] = None
+        return conditional_response("get_userpersonas", if_none_match, format_etag(etag), build)
+    
+    # Otherwise answer from the active fixture scenario (mock_fixtures.py)
+    variant = fixtures.choose("get_userpersonas", project_id)
+    log.debug("fixture", variant=variant.name)
+    return conditional_response("get_userpersonas", if_none_match, variant.body.etag, variant.body.response)
 
 
-@app.post("/api/upload_userpersonas")
+@app.post("/api/upload_userpersonas", openapi_extra=body_schema(UserPersonasUploadRequest))
 async def upload_userpersonas(
-    request: UserPersonasUploadRequest,
-    authorization: Optional[str] = Header(None)
+    http_request: Request,
+    auth: Auth = Depends(authenticate)
 ):
     """
     Mock endpoint for uploading selected user personas
     
     Accepts:
-    - selected_personas: List of selected persona objects
+    - selected_personas: List of selected persona objects (name required;
+      id, description, goals, painPoints, keyFeatures typed; other fields kept as sent)
     - user_id: ID of the user (optional)
     - project_id: ID of the project (optional)
     
     Headers:
     - Authorization: Bearer token (automatically sent by frontend)
+    - Idempotency-Key: Optional; a retry with the same key gets the first response back
+    
+    The body is validated straight from JSON and the personas are encoded
+    once; the same bytes are stored and echoed (mock_schemas.py). The save
+    is committed in a batch by the write-behind buffer (mock_writes.py).
     
     Returns:
     - success: Boolean indicating if upload was successful
@@ -339,48 +847,72 @@ async def upload_userpersonas(
     - data: Saved personas data
     """
     
-    # Extract token from Authorization header
-    token = None
-    if authorization and authorization.startswith("Bearer "):
-        token = authorization.replace("Bearer ", "")
+    request = await read_model(http_request, UserPersonasUploadRequest)
     
     # Log the incoming request for debugging
-    print(f"\n📤 Upload User Personas Request:")
-    print(f"   🔑 Token: {token[:20] + '...' if token else 'None'}")
-    print(f"   👤 User ID: {request.user_id}")
-    print(f"   📁 Project ID: {request.project_id}")
-    print(f"   👥 Selected Personas Count: {len(request.selected_personas)}")
-    print(f"   📋 Personas: {[p.get('name', 'Unknown') for p in request.selected_personas]}\n")
+    log = get_logger("upload_userpersonas")
+    if log.enabled_for(logging.INFO):
+        log.info(
+            "request",
+            token=token_preview(auth.token),
+            user_id=request.user_id,
+            project_id=request.project_id,
+            persona_count=len(request.selected_personas),
+            personas=[p.name for p in request.selected_personas],
+        )
     
     # Validate that at least one persona is selected
-    if not request.selected_personas or len(request.selected_personas) == 0:
+    if not request.selected_personas:
         raise HTTPException(
             status_code=400,
             detail="At least one persona must be selected"
         )
     
-    # Mock response data
-    response_data = {
-        "personas_saved": request.selected_personas,
-        "count": len(request.selected_personas),
-        "user_id": request.user_id,
-        "project_id": request.project_id,
-        "saved_at": datetime.now().isoformat(),
-        "next_step": "brand_design"
-    }
+    personas = encode_personas(request.selected_personas)
+    record = await write_behind.save(
+        "user_personas", request.user_id, request.project_id, member("personas", personas),
+        on_commit=lambda committed: publish_saved("user_personas.saved", committed, request.user_id, request.project_id)
+    )
+    
+    count = len(request.selected_personas)
+    response_data = merge_objects(
+        member("personas_saved", personas),
+        dumps({
+            "count": count,
+            "user_id": request.user_id,
+            "project_id": request.project_id,
+            "saved_at": record.updated_at,
+            "next_step": "brand_design"
+        })
+    )
     
+    return JSONBytesResponse(content=merge_objects(
+        dumps({
+            "success": True,
+            "message": f"Successfully saved {count} user persona(s)"
+        }),
+        member("data", response_data)
+    ))
+
+
+def stored_brand_design(record, base_url: str) -> dict:
+    """get_branddesign body for a saved brand design"""
+    if record is None:
+        return {}
     return {
-        "success": True,
-        "message": f"Successfully saved {len(request.selected_personas)} user persona(s)",
-        "data": response_data
+        **record.data,
+        "logoUrl": absolute_url(record.data.get("logoUrl"), base_url),
+        "timestamp": record.updated_at
     }
 
 
 @app.get("/api/get_branddesign")
 async def get_branddesign(
+    request: Request,
     user_id: Optional[str] = None,
     project_id: Optional[str] = None,
-    authorization: Optional[str] = Header(None)
+    auth: Auth = Depends(authenticate),
+    if_none_match: Optional[str] = Header(None)
 ):
     """
     Mock endpoint for getting brand design configuration
@@ -396,71 +928,42 @@ async def get_branddesign(
     - Brand design data or empty object if no data exists
     """
     
-    # Extract token from Authorization header
-    token = None
-    if authorization and authorization.startswith("Bearer "):
-        token = authorization.replace("Bearer ", "")
-    
     # Log the incoming request for debugging
-    print(f"\n📥 Get Brand Design Request:")
-    print(f"   🔑 Token: {token[:20] + '...' if token else 'None'}")
-    print(f"   👤 User ID: {user_id}")
-    print(f"   📁 Project ID: {project_id}\n")
-    
-    # For demonstration, return empty brand design 50% of the time
-    # You can change this logic based on your needs
-    import random
-    
-    # Uncomment line below to always return data for testing
-    # has_brand_design = True
-    
-    # Uncomment line below to always return empty for testing (use defaults)
-    # has_brand_design = False
-    
-    # Random behavior for testing both scenarios
-    has_brand_design = random.choice([True, False])
-    
-    if has_brand_design:
-        # Return mock brand design when data exists
-        mock_brand_design = {
-            "brandName": "TechCorp Solutions",
-            "logoUrl": None,  # No logo uploaded
-            "colors": {
-                "primary": "#3B82F6",     # Blue
-                "secondary": "#1E293B",   # Dark slate
-                "accent": "#8B5CF6",      # Purple
-                "background": "#0F172A",  # Very dark blue
-                "foreground": "#F8FAFC"   # Off-white
-            },
-            "fontFamily": "Inter",
-            "brandVoice": "Innovation Through Technology",
-            "tone": "Professional",
-            "timestamp": datetime.now().isoformat()
-        }
+    log = get_logger("get_branddesign")
+    log.info("request", token=token_preview(auth.token), user_id=user_id, project_id=project_id)
+    
+    # Return the brand design saved for this project, if any
+    etag = write_behind.get_etag("brand_designs", user_id, project_id)
+    if etag is not None:
+        base_url = str(request.base_url)
         
-        print("   ✅ Returning saved brand design data")
-        return mock_brand_design
-    else:
-        # Return empty object - frontend will use defaults (black, orange, white with Montserrat)
-        print("   ⚠️  No brand design found - frontend will use defaults")
-        return {}
-
-
-class BrandDesignUploadRequest(BaseModel):
-    brandName: str
-    logoUrl: Optional[str] = None
-    colors: dict
-    fontFamily: str
-    brandVoice: str
-    tone: str
-    user_id: Optional[str] = None
-    project_id: Optional[str] = None
+        def build():
+            record = write_behind.get("brand_designs", user_id, project_id)
+            return json_response(stored_brand_design(record, base_url))
+        
+        # logoUrl is made absolute against the request's host, so the tag covers it too
+        digest = hashlib.blake2b(etag.encode("ascii"), digest_size=16)
+        digest.update(base_url.encode("utf-8"))
+        log.debug("brand_design_found")
+        return conditional_response("get_branddesign", if_none_match, format_etag(digest.hexdigest()), build)
+    
+    # Otherwise answer from the active fixture scenario (mock_fixtures.py). The
+    # "empty" variant is an empty object, so the frontend uses its defaults
+    # (black, orange, white with Montserrat)
+    variant = fixtures.choose("get_branddesign", project_id)
+    log.debug("fixture", variant=variant.name)
+    return conditional_response(
+        "get_branddesign",
+        if_none_match,
+        variant.body.etag,
+        lambda: variant.body.response(timestamp=datetime.now().isoformat())
+    )
 
 
-@app.post("/api/upload_branddesign")
+@app.post("/api/upload_branddesign", openapi_extra=body_schema(BrandDesignUploadRequest))
 async def upload_branddesign(
-    request: BrandDesignUploadRequest,
-    authorization: Optional[str] = Header(None)
+    http_request: Request,
+    auth: Auth = Depends(authenticate)
 ):
     """
     Mock endpoint for uploading/saving brand design configuration
@@ -468,7 +971,7 @@ async def upload_branddesign(
     Accepts:
     - brandName: Brand name
     - logoUrl: Logo URL or base64 (optional)
-    - colors: Object with primary, secondary, accent, background, foreground colors
+    - colors: Object with primary, secondary, accent, background, foreground colors (all required)
     - fontFamily: Font family name
     - brandVoice: Brand voice/tagline
     - tone: Brand tone
@@ -477,6 +980,11 @@ async def upload_branddesign(
     
     Headers:
     - Authorization: Bearer token (automatically sent by frontend)
+    - Idempotency-Key: Optional; a retry with the same key gets the first response back
+    
+    A base64 data URL logo is stored in the blob store; the saved design and
+    the response carry its /api/blobs/ URL instead of the image data. The save
+    is committed in a batch by the write-behind buffer (mock_writes.py).
     
     Returns:
     - success: Boolean indicating if upload was successful
@@ -484,21 +992,22 @@ async def upload_branddesign(
     - data: Saved brand design data
     """
     
-    # Extract token from Authorization header
-    token = None
-    if authorization and authorization.startswith("Bearer "):
-        token = authorization.replace("Bearer ", "")
+    request = await read_model(http_request, BrandDesignUploadRequest)
     
     # Log the incoming request for debugging
-    print(f"\n📤 Upload Brand Design Request:")
-    print(f"   🔑 Token: {token[:20] + '...' if token else 'None'}")
-    print(f"   👤 User ID: {request.user_id}")
-    print(f"   📁 Project ID: {request.project_id}")
-    print(f"   🎨 Brand Name: {request.brandName}")
-    print(f"   🎨 Font Family: {request.fontFamily}")
-    print(f"   🎨 Brand Voice: {request.brandVoice}")
-    print(f"   🎨 Tone: {request.tone}")
-    print(f"   🎨 Colors: {request.colors}\n")
+    log = get_logger("upload_branddesign")
+    if log.enabled_for(logging.INFO):
+        log.info(
+            "request",
+            token=token_preview(auth.token),
+            user_id=request.user_id,
+            project_id=request.project_id,
+            brand_name=request.brandName,
+            font_family=request.fontFamily,
+            brand_voice=request.brandVoice,
+            tone=request.tone,
+            colors=request.colors.model_dump(),
+        )
     
     # Validate required fields
     if not request.brandName or len(request.brandName.strip()) == 0:
@@ -507,40 +1016,112 @@ async def upload_branddesign(
             detail="Brand name is required"
         )
     
-    if not request.colors:
-        raise HTTPException(
-            status_code=400,
-            detail="Brand colors are required"
-        )
+    logo_url = request.logoUrl
+    if is_data_url(logo_url):
+        try:
+            logo_url = blob_url(blobs.put_data_url(logo_url))
+        except BlobError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        request.logoUrl = logo_url
+    
+    brand_design = encode_brand_design(request)
+    record = await write_behind.save(
+        "brand_designs", request.user_id, request.project_id, brand_design,
+        on_commit=lambda committed: publish_saved("brand_design.saved", committed, request.user_id, request.project_id)
+    )
     
-    # Mock response data
-    response_data = {
-        "brandName": request.brandName,
-        "logoUrl": request.logoUrl,
-        "colors": request.colors,
-        "fontFamily": request.fontFamily,
-        "brandVoice": request.brandVoice,
-        "tone": request.tone,
-        "user_id": request.user_id,
-        "project_id": request.project_id,
-        "saved_at": datetime.now().isoformat(),
-        "next_step": "business_logic"
-    }
+    # The response links the logo by absolute URL; the stored design keeps the path
+    public_logo_url = absolute_url(logo_url, str(http_request.base_url))
+    if public_logo_url != logo_url:
+        request.logoUrl = public_logo_url
+        brand_design = encode_brand_design(request)
+    
+    response_data = merge_objects(
+        brand_design,
+        dumps({
+            "user_id": request.user_id,
+            "project_id": request.project_id,
+            "saved_at": record.updated_at,
+            "next_step": "business_logic"
+        })
+    )
+    
+    log.debug("brand_design_saved")
+    
+    return JSONBytesResponse(content=merge_objects(
+        dumps({
+            "success": True,
+            "message": "Brand design saved successfully"
+        }),
+        member("data", response_data)
+    ))
+
+
+@app.post("/api/blobs", status_code=201)
+async def upload_blob(request: Request, auth: Auth = Depends(authenticate)):
+    """
+    Store an image as a raw request body, without base64
+    
+    Headers:
+    - Content-Type: image/png, image/jpeg, image/gif, image/webp or image/svg+xml
+    
+    Returns:
+    - data: id (<sha256>.<ext>), url, size and media_type of the stored blob
+    """
     
-    print("   ✅ Brand design saved successfully")
+    media_type = (request.headers.get("content-type") or "").split(";")[0].strip().lower()
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > MAX_BLOB_BYTES:
+            raise HTTPException(status_code=413, detail=f"Blob is larger than {MAX_BLOB_BYTES} bytes")
+        chunks.append(chunk)
+    try:
+        name = blobs.put(b"".join(chunks), media_type)
+    except BlobError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     
     return {
         "success": True,
-        "message": "Brand design saved successfully",
-        "data": response_data
+        "data": {
+            "id": name,
+            "url": absolute_url(blob_url(name), str(request.base_url)),
+            "size": size,
+            "media_type": media_type
+        }
     }
 
 
+@app.get("/api/blobs/{name}", name="get_blob")
+async def get_blob(name: str, if_none_match: Optional[str] = Header(None)):
+    """
+    Serve a stored blob (e.g. a brand logo)
+    
+    Blobs are immutable: the response can be cached for a year, and a
+    matching If-None-Match gets an empty 304.
+    """
+    
+    found = blobs.locate(name)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Blob not found")
+    etag = f'"{found[2]}"'
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, **IMMUTABLE_HEADERS})
+    return blobs.response(found)
+
+
 @app.get("/api/get_thirdparty")
 async def get_thirdparty(
     user_id: Optional[str] = None,
     project_id: Optional[str] = None,
-    authorization: Optional[str] = Header(None)
+    category: Optional[str] = None,
+    required: Optional[bool] = None,
+    keywords: Optional[str] = None,
+    size: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    auth: Auth = Depends(authenticate),
+    if_none_match: Optional[str] = Header(None)
 ):
     """
     Mock endpoint for getting third-party API requirements
@@ -548,173 +1129,354 @@ async def get_thirdparty(
     Query Parameters:
     - user_id: ID of the user (optional)
     - project_id: ID of the project (optional)
+    - category: Comma-separated categories; providers in any of them (optional)
+    - required: true for required providers only, false for optional ones (optional)
+    - keywords: Words that must each start a word of the provider's name or
+      features, e.g. "webhook refund" (optional)
+    - size: Providers per page (default 50, at most 200)
+    - cursor: next_cursor from the previous page (optional)
     
     Headers:
     - Authorization: Bearer token (automatically sent by frontend)
     
     Returns:
-    - Third-party API data based on PRD analysis, or empty object if no APIs needed
+    - apis: The page of providers that pass the filters, in catalog order
+    - summary: total, required, optional, categories and category_counts of
+      the whole catalog
+    - matched: Number of providers that pass the filters
+    - next_cursor: Cursor for the next page, or null on the last page
     """
     
-    # Extract token from Authorization header
-    token = None
-    if authorization and authorization.startswith("Bearer "):
-        token = authorization.replace("Bearer ", "")
-    
     # Log the request
-    print(f"\n📡 Get Third-Party APIs Request:")
-    print(f"   🔑 Token: {token[:20] + '...' if token else 'None'}")
-    print(f"   👤 User ID: {user_id}")
-    print(f"   📁 Project ID: {project_id}\n")
+    log = get_logger("get_thirdparty")
+    log.info("request", token=token_preview(auth.token), user_id=user_id, project_id=project_id)
+    
+    if not 1 <= size <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"size must be between 1 and {MAX_PAGE_SIZE}")
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    categories = [name.strip() for name in category.split(",") if name.strip()] if category else None
+    words = split_words(keywords or "")
     
-    # Simulate different responses based on conditions
     # In a real implementation, this would analyze the PRD and determine required APIs
+    if categories is None and required is None and not words and after is None:
+        # The unfiltered first page is pre-encoded; analyzed_at is spliced in per request
+        body = thirdparty.first_page(size)
+        response = conditional_response(
+            "get_thirdparty",
+            if_none_match,
+            body.etag,
+            lambda: body.response(analyzed_at=datetime.now().isoformat())
+        )
+    else:
+        # The revision changes whenever the catalog does
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{thirdparty.revision}|{categories}|{required}|{words}|{size}|{cursor}".encode("utf-8"))
+        
+        def build():
+            seqs = thirdparty.match(categories, required, words)
+            found, next_cursor = thirdparty.page(seqs, size, after)
+            return JSONBytesResponse(
+                content=thirdparty.render(found, len(seqs), next_cursor, datetime.now().isoformat())
+            )
+        
+        response = conditional_response("get_thirdparty", if_none_match, format_etag(digest.hexdigest(), weak=True), build)
     
-    # Example 1: Return empty when no third-party APIs needed
-    # return {}
-    
-    # Example 2: Return list of third-party APIs
-    mock_third_party_apis = {
-        "apis": [
-            {
-                "name": "Stripe",
-                "category": "payment",
-                "provider": "Stripe Inc.",
-                "description": "Payment processing and subscription management",
-                "purpose": "Handle secure payments, subscriptions, and invoicing",
-                "required": True,
-                "features": [
-                    "Credit card processing",
-                    "Subscription billing",
-                    "Invoice generation",
-                    "Payment webhooks"
-                ],
-                "endpoints": [
-                    "POST /v1/payment_intents",
-                    "POST /v1/customers",
-                    "POST /v1/subscriptions"
-                ],
-                "documentation": "https://stripe.com/docs/api"
-            },
-            {
-                "name": "Google Maps",
-                "category": "maps",
-                "provider": "Google",
-                "description": "Location services and mapping",
-                "purpose": "Provide location search, geocoding, and map visualization",
-                "required": True,
-                "features": [
-                    "Geocoding",
-                    "Place search",
-                    "Distance matrix",
-                    "Static maps"
-                ],
-                "endpoints": [
-                    "GET /maps/api/geocode/json",
-                    "GET /maps/api/place/nearbysearch/json",
-                    "GET /maps/api/distancematrix/json"
-                ],
-                "documentation": "https://developers.google.com/maps/documentation"
-            },
-            {
-                "name": "Auth0",
-                "category": "oauth",
-                "provider": "Auth0",
-                "description": "Authentication and authorization platform",
-                "purpose": "Manage user authentication with OAuth 2.0 and social login",
-                "required": False,
-                "features": [
-                    "Social login (Google, Facebook, etc.)",
-                    "Multi-factor authentication",
-                    "Single sign-on",
-                    "User management"
-                ],
-                "endpoints": [
-                    "POST /oauth/token",
-                    "GET /userinfo",
-                    "POST /dbconnections/signup"
-                ],
-                "documentation": "https://auth0.com/docs/api"
-            },
-            {
-                "name": "Twilio",
-                "category": "sms",
-                "provider": "Twilio",
-                "description": "SMS and communication services",
-                "purpose": "Send SMS notifications and verification codes",
-                "required": False,
-                "features": [
-                    "SMS messaging",
-                    "Phone verification",
-                    "Two-factor authentication",
-                    "Delivery tracking"
-                ],
-                "endpoints": [
-                    "POST /2010-04-01/Accounts/{AccountSid}/Messages.json",
-                    "GET /2010-04-01/Accounts/{AccountSid}/Messages/{MessageSid}.json"
-                ],
-                "documentation": "https://www.twilio.com/docs/sms"
-            },
-            {
-                "name": "SendGrid",
-                "category": "email",
-                "provider": "Twilio SendGrid",
-                "description": "Email delivery and marketing platform",
-                "purpose": "Send transactional and marketing emails",
-                "required": True,
-                "features": [
-                    "Transactional emails",
-                    "Email templates",
-                    "Email analytics",
-                    "Bounce handling"
-                ],
-                "endpoints": [
-                    "POST /v3/mail/send",
-                    "GET /v3/stats"
-                ],
-                "documentation": "https://docs.sendgrid.com/api-reference"
-            }
-        ],
-        "summary": {
-            "total": 5,
-            "required": 3,
-            "optional": 2,
-            "categories": ["payment", "maps", "oauth", "sms", "email"]
-        },
-        "analyzed_at": datetime.now().isoformat(),
-        "prd_version": "1.0.0"
-    }
+    log.debug("third_party_apis_returned")
+    
+    return response
+
+
+# Sections of the wizard state; each loader returns the encoded body its own
+# get_* endpoint would send. They run in worker threads, so the storage
+# reads of different sections overlap.
+def userpersonas_section(user_id, project_id, base_url) -> bytes:
+    record = write_behind.get("user_personas", user_id, project_id)
+    if record is not None:
+        return dumps(stored_personas(record))
+    return fixtures.choose("get_userpersonas", project_id).body.render()
+
+
+def branddesign_section(user_id, project_id, base_url) -> bytes:
+    record = write_behind.get("brand_designs", user_id, project_id)
+    if record is not None:
+        return dumps(stored_brand_design(record, base_url))
+    return fixtures.choose("get_branddesign", project_id).body.render(timestamp=datetime.now().isoformat())
+
+
+def thirdparty_section(user_id, project_id, base_url) -> bytes:
+    return thirdparty.first_page(DEFAULT_PAGE_SIZE).render(analyzed_at=datetime.now().isoformat())
+
+
+def prd_section(user_id, project_id, base_url) -> bytes:
+    record = storage.get("prds", user_id, project_id)
+    return dumps(record.data if record else {})
+
+
+WIZARD_SECTIONS = {
+    "userpersonas": userpersonas_section,
+    "branddesign": branddesign_section,
+    "thirdparty": thirdparty_section,
+    "prd": prd_section,
+}
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def parse_sections(sections: Optional[str]) -> list:
+    if not sections:
+        return list(WIZARD_SECTIONS)
+    names = list(dict.fromkeys(name.strip() for name in sections.split(",") if name.strip()))
+    unknown = [name for name in names if name not in WIZARD_SECTIONS]
+    if unknown or not names:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown sections {', '.join(unknown)}; expected some of {', '.join(WIZARD_SECTIONS)}"
+        )
+    return names
+
+
+async def load_section(name: str, user_id, project_id, base_url) -> tuple:
+    """(name, body bytes, error message)"""
+    try:
+        body = await asyncio.to_thread(WIZARD_SECTIONS[name], user_id, project_id, base_url)
+        return name, body, None
+    except Exception as exc:
+        get_logger("get_wizard_state").error("section_failed", section=name, error=str(exc))
+        return name, None, f"{type(exc).__name__}: {exc}"
+
+
+@app.get("/api/get_wizard_state")
+async def get_wizard_state(
+    request: Request,
+    project_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    sections: Optional[str] = None,
+    auth: Auth = Depends(authenticate),
+    accept: Optional[str] = Header(None)
+):
+    """
+    Load several wizard sections of a project in one round trip
     
-    print("   ✅ Returning third-party API requirements")
+    Query Parameters:
+    - project_id: ID of the project (optional)
+    - user_id: ID of the user (optional)
+    - sections: Comma-separated subset of userpersonas, branddesign,
+      thirdparty, prd (default: all)
     
-    # To simulate "no third-party APIs needed", uncomment the line below:
-    # return {}
+    Headers:
+    - Authorization: Bearer token (automatically sent by frontend)
+    - Accept: application/x-ndjson to stream one line per section as soon
+      as it is ready, in completion order
     
-    return mock_third_party_apis
+    Returns:
+    - success, project_id and sections: each section holds exactly the body
+      of its get_* endpoint. Sections that failed are listed in errors
+    """
+    
+    log = get_logger("get_wizard_state")
+    names = parse_sections(sections)
+    log.info("request", token=token_preview(auth.token), user_id=user_id, project_id=project_id, sections=",".join(names))
+    
+    base_url = str(request.base_url)
+    tasks = [asyncio.ensure_future(load_section(name, user_id, project_id, base_url)) for name in names]
+    
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        async def lines():
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    name, body, error = await next_done
+                    if error is None:
+                        yield b'{"section":' + dumps(name) + b',"data":' + body + b"}\n"
+                    else:
+                        yield dumps({"section": name, "error": error}) + b"\n"
+                yield b'{"done":true}\n'
+            finally:
+                for task in tasks:
+                    task.cancel()
+        
+        return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+    
+    results = await asyncio.gather(*tasks)
+    # Section bodies are already encoded; splice them in instead of decoding them
+    parts = [dumps(name) + b":" + body for name, body, error in results if error is None]
+    errors = {name: error for name, _, error in results if error is not None}
+    payload = b"".join([
+        b'{"success":', b"false" if errors else b"true",
+        b',"project_id":', dumps(project_id),
+        b',"sections":{', b",".join(parts), b"}",
+        b',"errors":' + dumps(errors) if errors else b"",
+        b"}",
+    ])
+    return JSONBytesResponse(content=payload)
 
 
-if __name__ == "__main__":
-    print("=" * 60)
-    print("🚀 CodeBenders Mock API Server Starting...")
-    print("=" * 60)
-    print("📍 Server URL: http://localhost:8000")
-    print("📚 API Docs: http://localhost:8000/docs")
-    print("📊 Health Check: http://localhost:8000/api/v1/health")
-    print("🔐 Login: POST http://localhost:8000/api/v1/auth/login")
-    print("📝 PRD Upload: POST http://localhost:8000/api/upload_prd")
-    print("📂 Projects: GET http://localhost:8000/api/v1/projects")
-    print("👥 Get Personas: GET http://localhost:8000/api/get_userpersonas")
-    print("💾 Save Personas: POST http://localhost:8000/api/upload_userpersonas")
-    print("🎨 Get Brand Design: GET http://localhost:8000/api/get_branddesign")
-    print("💾 Save Brand Design: POST http://localhost:8000/api/upload_branddesign")
-    print("🔌 Get Third-Party APIs: GET http://localhost:8000/api/get_thirdparty")
-    print("=" * 60)
-    print("\n⚡ Starting server...\n")
-    
-    uvicorn.run(
-        app,
-        host="0.0.0.0",
-        port=8000,
-        log_level="info"
+class PerfRunCreateRequest(BaseModel):
+    name: str = "Load test"
+    test_type: Optional[str] = None
+    max_users: Optional[int] = None
+    slo_ms: float = DEFAULT_SLO_MS
+    project_id: Optional[str] = None
+
+
+def require_single_process():
+    """503 with the shared state backend: runs live in one worker's memory and another may answer"""
+    if shared is not None:
+        raise HTTPException(
+            status_code=503,
+            detail="Load-test runs are kept in one process's memory; run the server with a single worker",
+        )
+
+
+def get_perf_run(run_id: str, auth: Auth) -> PerfRun:
+    """The run, if it belongs to the caller's session; other users' runs are 404 too"""
+    require_single_process()
+    run = perf_runs.get(run_id)
+    if run is None or run.user_id != auth.user_id:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return run
+
+
+@app.post("/api/v1/perf/runs", status_code=201)
+async def create_perf_run(request: PerfRunCreateRequest, auth: Auth = Depends(authenticate)):
+    """
+    Mock endpoint for starting a load-test run for the performance report
+    
+    Accepts:
+    - name: Run name (default "Load test")
+    - test_type: Kind of test, shown in the report (optional)
+    - max_users: Peak virtual users (optional)
+    - slo_ms: p95 latency an endpoint must stay under to pass (default 1000)
+    - project_id: Project the run belongs to (optional)
+    
+    The run belongs to the session's user and only they can see it. Clients
+    without a session share the anonymous runs. Runs are kept in this
+    process's memory, so with several workers (the shared state backend)
+    every perf endpoint answers 503.
+    
+    Returns:
+    - The run, with the run_id to send samples to (201 Created)
+    """
+    
+    log = get_logger("create_perf_run")
+    log.info("request", token=token_preview(auth.token), user_id=auth.user_id, project_id=request.project_id)
+    
+    require_single_process()
+    if request.slo_ms <= 0:
+        raise HTTPException(status_code=400, detail="slo_ms must be positive")
+    run = perf_runs.create(
+        name=request.name,
+        test_type=request.test_type,
+        max_users=request.max_users,
+        slo_ms=request.slo_ms,
+        user_id=auth.user_id,
+        project_id=request.project_id,
     )
+    return run.listing()
+
+
+@app.get("/api/v1/perf/runs")
+async def list_perf_runs(project_id: Optional[str] = None, auth: Auth = Depends(authenticate)):
+    """The caller's load-test runs, newest first, optionally of one project"""
+    require_single_process()
+    return {"runs": [run.listing() for run in perf_runs.runs(auth.user_id, project_id)]}
+
+
+@app.post("/api/v1/perf/runs/{run_id}/samples")
+async def upload_perf_samples(run_id: str, request: Request, auth: Auth = Depends(authenticate)):
+    """
+    Mock endpoint for adding raw load-test samples to a run
+    
+    Accepts:
+    - Request body: one sample per line, streamed or in one piece, either
+      - CSV (the default) with a header line naming the columns, or
+      - NDJSON (Content-Type: application/x-ndjson), one object per line
+    
+    Columns: endpoint and latency_ms (required), method (default GET),
+    status (default 200), ok (default: status below 400), name, and either
+    timestamp (Unix seconds) or offset_ms (since the run started).
+    
+    The body can be sent in several requests. Rows that cannot be parsed are
+    skipped and counted.
+    
+    Returns:
+    - accepted, rejected and the run's total samples
+    """
+    
+    run = get_perf_run(run_id, auth)
+    content_type = request.headers.get("content-type", "")
+    reader = SampleReader(ndjson=content_type.startswith((NDJSON_MEDIA_TYPE, "application/json")))
+    accepted = rejected = 0
+    try:
+        async for data in request.stream():
+            lines = reader.feed(data)
+            if lines:
+                # Parsing holds the GIL either way; the thread lets other requests in between
+                counts = await asyncio.to_thread(perf_runs.ingest, run, reader, lines)
+                accepted += counts[0]
+                rejected += counts[1]
+        counts = await asyncio.to_thread(perf_runs.ingest, run, reader, reader.finish())
+        accepted += counts[0]
+        rejected += counts[1]
+    except RunFull as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+    except SampleError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    
+    log = get_logger("upload_perf_samples")
+    log.info("stored", token=token_preview(auth.token), run_id=run_id, accepted=accepted, rejected=rejected)
+    return {"run_id": run_id, "accepted": accepted, "rejected": rejected, "samples": len(run)}
+
+
+@app.get("/api/v1/perf/runs/{run_id}/report")
+async def get_perf_report(run_id: str, auth: Auth = Depends(authenticate)):
+    """
+    The performance report of a run
+    
+    Returns:
+    - Totals (requests, pass rate, average and percentile latency,
+      throughput) and one row per endpoint with its percentiles and a
+      Pass / Fair / Fail status against the run's slo_ms
+    """
+    run = get_perf_run(run_id, auth)
+    return StreamingResponse(run.report_chunks(), media_type="application/json")
+
+
+@app.get("/api/v1/perf/runs/{run_id}/export")
+async def export_perf_report(
+    run_id: str, format: str = "json", samples: bool = False, auth: Auth = Depends(authenticate)
+):
+    """
+    Download a run's report as a file
+    
+    Query Parameters:
+    - format: json or csv (default json)
+    - samples: Include every raw sample (default false); the CSV is then in
+      the format the samples endpoint accepts
+    
+    Written while it is sent, so memory use stays flat for millions of samples.
+    """
+    run = get_perf_run(run_id, auth)
+    if format == "json":
+        chunks, media_type = run.json_export(samples), "application/json"
+    elif format == "csv":
+        chunks, media_type = run.csv_export(samples), "text/csv; charset=utf-8"
+    else:
+        raise HTTPException(status_code=400, detail="format must be json or csv")
+    filename = f"performance-report-{run_id}{'-samples' if samples else ''}.{format}"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 
+@app.delete("/api/v1/perf/runs/{run_id}", status_code=204)
+async def delete_perf_run(run_id: str, auth: Auth = Depends(authenticate)):
+    """Delete a load-test run and its samples"""
+    if not perf_runs.delete(get_perf_run(run_id, auth).run_id):
+        raise HTTPException(status_code=404, detail="Run not found")
+    return Response(status_code=204)
@@ -0,0 +1,159 @@
+"""
+Content-addressed blob store for uploaded images
+
+Brand logos arrive as base64 data URLs inside the brand design JSON. They
+are decoded once, written to local disk under their SHA-256 and replaced
+in the saved record by a short path (/api/blobs/<sha256>.<ext>). The same
+image uploaded twice is stored once.
+
+Blobs never change once written, so they are served with an immutable,
+year-long Cache-Control and their digest as the ETag. Reads go through
+mmap; small blobs are kept in an LRU cache, larger ones are streamed as
+files so the server can use sendfile where it supports it.
+"""
+
+import base64
+import binascii
+import hashlib
+import mmap
+import os
+import re
+import stat
+import tempfile
+from typing import Optional
+
+from fastapi import Response
+from fastapi.responses import FileResponse
+
+from mock_cache import LRUCache
+
+
+DEFAULT_BLOB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_blobs")
+BLOB_DIR = os.environ.get("MOCK_BLOB_DIR", DEFAULT_BLOB_DIR)
+MAX_BLOB_BYTES = int(os.environ.get("MOCK_BLOB_MAX_BYTES", 5 * 1024 * 1024))
+
+# Blobs up to this size are served from memory after the first read
+CACHED_BLOB_BYTES = 1024 * 1024
+blob_cache = LRUCache("blobs", max_entries=256, max_bytes=int(os.environ.get("MOCK_BLOB_CACHE_BYTES", 32 * 1024 * 1024)))
+
+URL_PREFIX = "/api/blobs/"
+
+MEDIA_TYPES = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/gif": "gif",
+    "image/webp": "webp",
+    "image/svg+xml": "svg",
+}
+EXTENSIONS = {ext: media_type for media_type, ext in MEDIA_TYPES.items()}
+
+IMMUTABLE_HEADERS = {"Cache-Control": "public, max-age=31536000, immutable"}
+
+_DATA_URL = re.compile(r"data:([\w.+-]+/[\w.+-]+)(?:;[\w-]+=[\w.-]+)*;base64,", re.ASCII)
+_BLOB_NAME = re.compile(r"([0-9a-f]{64})\.([a-z]+)", re.ASCII)
+
+
+class BlobError(ValueError):
+    """Raised for data that cannot be stored as a blob"""
+
+
+def is_data_url(value: Optional[str]) -> bool:
+    return bool(value) and value.startswith("data:")
+
+
+def decode_data_url(url: str) -> tuple:
+    """(media_type, bytes) of a base64 image data URL"""
+    match = _DATA_URL.match(url)
+    if match is None:
+        raise BlobError("Logo must be a base64 data URL")
+    media_type = match.group(1).lower()
+    if media_type not in MEDIA_TYPES:
+        raise BlobError(f"Unsupported image type {media_type}")
+    encoded = url[match.end():]
+    # base64 grows data by 4/3; reject oversized payloads before decoding them
+    if len(encoded) * 3 // 4 > MAX_BLOB_BYTES + 2:
+        raise BlobError(f"Logo is larger than {MAX_BLOB_BYTES} bytes")
+    try:
+        data = base64.b64decode(encoded, validate=True)
+    except (binascii.Error, ValueError):
+        raise BlobError("Logo is not valid base64")
+    return media_type, data
+
+
+class BlobStore:
+    """Immutable files named by the SHA-256 of their content"""
+
+    def __init__(self, directory: str = BLOB_DIR):
+        self.directory = directory
+
+    def _path(self, digest: str, ext: str) -> str:
+        return os.path.join(self.directory, digest[:2], f"{digest}.{ext}")
+
+    def put(self, data: bytes, media_type: str) -> str:
+        """Store the bytes and return the blob name (<sha256>.<ext>)"""
+        if len(data) > MAX_BLOB_BYTES:
+            raise BlobError(f"Blob is larger than {MAX_BLOB_BYTES} bytes")
+        ext = MEDIA_TYPES.get(media_type)
+        if ext is None:
+            raise BlobError(f"Unsupported image type {media_type}")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest, ext)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write under a temporary name and rename, so readers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        return f"{digest}.{ext}"
+
+    def put_data_url(self, url: str) -> str:
+        media_type, data = decode_data_url(url)
+        return self.put(data, media_type)
+
+    def locate(self, name: str) -> Optional[tuple]:
+        """(path, media_type, digest, os.stat result) of a stored blob, or None"""
+        match = _BLOB_NAME.fullmatch(name)
+        if match is None or match.group(2) not in EXTENSIONS:
+            return None
+        digest, ext = match.groups()
+        path = self._path(digest, ext)
+        try:
+            info = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(info.st_mode):
+            return None
+        return path, EXTENSIONS[ext], digest, info
+
+    def response(self, found: tuple) -> Response:
+        """Response for a blob found by locate, without looking the file up again"""
+        path, media_type, digest, info = found
+        headers = {"ETag": f'"{digest}"', **IMMUTABLE_HEADERS}
+
+        body = blob_cache.get(digest)
+        if body is None:
+            if info.st_size > CACHED_BLOB_BYTES or info.st_size == 0:
+                return FileResponse(path, media_type=media_type, headers=headers, stat_result=info)
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                body = mapped[:]
+            blob_cache.put(digest, body, len(body))
+        return Response(content=body, media_type=media_type, headers=headers)
+
+
+def blob_url(name: str) -> str:
+    return f"{URL_PREFIX}{name}"
+
+
+def absolute_url(value: Optional[str], base_url: str) -> Optional[str]:
+    """Expand a stored blob path to a URL the browser can load from another origin"""
+    if value and value.startswith(URL_PREFIX):
+        return base_url.rstrip("/") + value
+    return value
+
+
+blobs = BlobStore()
@@ -0,0 +1,128 @@
+"""
+Bounded in-memory caches
+
+LRUCache holds computed results bounded by entry count and total size, with
+least-recently-used eviction. get_or_compute adds single-flight semantics:
+concurrent requests for the same missing key wait on the first computation
+instead of repeating it.
+"""
+
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable
+
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entries and bytes"""
+
+    def __init__(self, name: str, max_entries: int, max_bytes: int):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> asyncio.Future of the running computation
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: Hashable, count_miss: bool = True):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if count_miss:
+                    self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get(self, key: Hashable, default=None):
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def put(self, key: Hashable, value, size: int):
+        """Insert a value; entries larger than the whole cache are not stored"""
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.total_bytes += size
+            while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+
+    def discard(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.total_bytes -= entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Awaitable],
+        size_of: Callable[[object], int],
+    ):
+        """Return the cached value, computing it at most once per key at a time"""
+        # A miss is counted only by the call that computes; waiters count as coalesced
+        value = self._lookup(key, count_miss=False)
+        if value is not _MISSING:
+            return value
+
+        running = self._inflight.get(key)
+        if running is not None:
+            self.coalesced += 1
+            # shield: a waiter giving up must not cancel the shared computation
+            return await asyncio.shield(running)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved when nobody was waiting
+            raise
+        else:
+            self.put(key, value, size_of(value))
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._inflight),
+            }
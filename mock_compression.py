@@ -0,0 +1,207 @@
+"""
+Negotiated response compression
+
+CompressionMiddleware compresses JSON and text responses with brotli or gzip,
+whichever the client's Accept-Encoding prefers, once the body reaches
+MIN_BYTES; small bodies such as the health check are sent as they are.
+Streaming responses (SSE, NDJSON, large files) pass through untouched, so
+their events are not held back.
+
+Pre-encoded bodies (mock_responses.PrecomputedBody) never reach the
+middleware uncompressed. Their static bytes are compressed once per encoding
+at the highest level and kept. When a body has volatile fields spliced in per
+request, only gzip is offered: the static chunks are kept as raw deflate
+blocks ending on a byte boundary and only the spliced values are compressed
+per request (gzip_stitched). Brotli streams cannot be joined that way.
+
+brotli is optional; without it only gzip is offered.
+
+MOCK_COMPRESSION=off disables compression, MOCK_COMPRESS_MIN_BYTES sets the
+threshold (default 1024).
+"""
+
+import asyncio
+import gzip
+import os
+import struct
+import zlib
+from typing import Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+ENABLED = os.environ.get("MOCK_COMPRESSION", "on").lower() not in ("0", "off", "false", "no")
+MIN_BYTES = int(os.environ.get("MOCK_COMPRESS_MIN_BYTES", 1024))
+
+# Per-request compression favours speed; bodies compressed once use the maximum
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = 11
+# Larger bodies are compressed in a worker thread to keep the event loop free
+THREAD_BYTES = 256 * 1024
+
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+COMPRESSIBLE_TYPES = ("application/json", "text/", "image/svg+xml", "application/javascript")
+
+# gzip header: magic, deflate, no flags, no mtime, no extra flags, unknown OS
+_GZIP_HEADER = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+# A final, empty fixed-Huffman deflate block
+_DEFLATE_END = b"\x03\x00"
+
+
+def negotiate(accept_encoding: Optional[str], offered: Iterable[str] = ENCODINGS) -> Optional[str]:
+    """The offered encoding the client prefers, or None for identity"""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip().lower()] = quality
+    best = None
+    best_quality = 0.0
+    # `offered` is in server preference order, which breaks ties
+    for encoding in offered:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data: bytes, encoding: str, static: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=STATIC_BROTLI_QUALITY if static else BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=STATIC_GZIP_LEVEL if static else GZIP_LEVEL, mtime=0)
+
+
+def deflate_chunk(data: bytes, level: int = STATIC_GZIP_LEVEL) -> bytes:
+    """Raw deflate blocks for data, not final and ending on a byte boundary"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+def gzip_stitched(deflated_parts: list, values: list, body: bytes) -> bytes:
+    """A gzip stream of `body` from pre-deflated static parts and fresh values
+
+    deflated_parts are deflate_chunk() outputs of the static chunks; values are
+    the encoded volatile values that go between them.
+    """
+    chunks = [_GZIP_HEADER, deflated_parts[0]]
+    for index, value in enumerate(values):
+        chunks.append(deflate_chunk(value, GZIP_LEVEL))
+        chunks.append(deflated_parts[index + 1])
+    chunks.append(_DEFLATE_END)
+    chunks.append(struct.pack("<II", zlib.crc32(body), len(body) & 0xFFFFFFFF))
+    return b"".join(chunks)
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def weaken_etag(etag: str) -> str:
+    """The compressed bytes differ from the identity ones, so the tag can only be weak"""
+    return etag if etag.startswith("W/") else f"W/{etag}"
+
+
+class CompressionCounters:
+    """Compressed responses per encoding and the bytes saved"""
+
+    def __init__(self):
+        self.responses = dict.fromkeys(ENCODINGS, 0)
+        self.precompressed = dict.fromkeys(ENCODINGS, 0)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.skipped_small = 0
+
+    def record(self, encoding: str, size_in: int, size_out: int, precompressed: bool = False):
+        (self.precompressed if precompressed else self.responses)[encoding] += 1
+        self.bytes_in += size_in
+        self.bytes_out += size_out
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": ENABLED,
+            "min_bytes": MIN_BYTES,
+            "encodings": list(ENCODINGS),
+            "compressed": dict(self.responses),
+            "precompressed": dict(self.precompressed),
+            "skipped_small": self.skipped_small,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+        }
+
+
+compression_counters = CompressionCounters()
+
+
+class CompressionMiddleware:
+    """Compress complete JSON and text bodies of at least `minimum_size` bytes"""
+
+    def __init__(self, app, minimum_size: int = MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if not ENABLED or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+
+        async def compressing_send(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # Hold the headers until the first body chunk shows what to do
+                start = message
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            held, start = start, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=list(held.get("headers", ())))
+            if (
+                message.get("more_body")
+                or "content-encoding" in headers
+                or not is_compressible(headers.get("content-type"))
+            ):
+                await send(held)
+                await send(message)
+                return
+            if len(body) < self.minimum_size:
+                compression_counters.skipped_small += 1
+                await send(held)
+                await send(message)
+                return
+
+            if len(body) >= THREAD_BYTES:
+                compressed = await asyncio.to_thread(compress, body, encoding)
+            else:
+                compressed = compress(body, encoding)
+            compression_counters.record(encoding, len(body), len(compressed))
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            if "etag" in headers:
+                headers["etag"] = weaken_etag(headers["etag"])
+            await send({**held, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, compressing_send)
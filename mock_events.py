@@ -0,0 +1,390 @@
+"""
+Project change events
+
+The wizard pages follow /api/v1/projects/{project_id}/events (Server-Sent
+Events) or /api/v1/projects/{project_id}/ws (WebSocket) instead of polling
+get_userpersonas and get_branddesign. upload_prd, upload_userpersonas and
+upload_branddesign publish an event once their save is committed. It holds
+the new version and ETag, not the document, so a page refetches only what
+changed, with If-None-Match.
+
+EventBus is an in-process pub/sub keyed by topic, one per owner and project
+(project_topic), so saves by one user never reach another user's streams
+even when their project ids are the same (every user has the sample
+projects). The endpoints check that the caller owns the project first.
+
+- publish encodes an event once; every subscriber gets the same bytes. The
+  cost is one loop over the project's own subscribers, so idle subscribers
+  of other projects cost nothing.
+- Every subscriber has a bounded queue. A consumer that stops reading (a
+  stalled tab, a full socket buffer) cannot make it grow. With the "resync"
+  policy (the default) a full queue is dropped and replaced by one `resync`
+  event, telling the page to refetch everything. With "disconnect" the
+  stream is closed, and EventSource reconnects on its own.
+- An idle subscriber is a deque and, while it waits, one future. The stream
+  sends a comment line (SSE) every SSE_KEEPALIVE_SECONDS so proxies keep it
+  open.
+- The last REPLAY_EVENTS events of recently active projects are kept, so a
+  client reconnecting with Last-Event-ID gets what it missed. If they are
+  no longer there, it gets a `resync`.
+- A cap on subscribers (MOCK_EVENT_MAX_SUBSCRIBERS) turns a flood of new
+  streams into 503s instead of unbounded memory.
+
+With the sqlite state backend (several workers) events go through the shared
+events table. Every worker runs one relay task that reads the new rows and
+delivers them locally, in sequence order, so event ids are the same on every
+worker.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from mock_jobs import SSE_KEEPALIVE_SECONDS
+from mock_responses import dumps
+
+
+EVENT_QUEUE_SIZE = int(os.environ.get("MOCK_EVENT_QUEUE_SIZE", 64))
+MAX_SUBSCRIBERS = int(os.environ.get("MOCK_EVENT_MAX_SUBSCRIBERS", 20_000))
+SLOW_CONSUMER_POLICY = os.environ.get("MOCK_EVENT_SLOW_POLICY", "resync").lower()
+POLICIES = ("resync", "disconnect")
+if SLOW_CONSUMER_POLICY not in POLICIES:
+    raise ValueError(f"MOCK_EVENT_SLOW_POLICY must be one of {', '.join(POLICIES)}, not {SLOW_CONSUMER_POLICY!r}")
+
+# Recent events kept per project for Last-Event-ID, and projects kept
+REPLAY_EVENTS = 32
+MAX_REPLAY_TOPICS = 10_000
+
+# How often the relay reads the shared events table when nothing woke it
+RELAY_POLL_SECONDS = 0.1
+
+# Shared event rows are kept this long, for workers that fall behind
+SHARED_EVENT_RETENTION_SECONDS = 300.0
+
+# Sent first on every SSE stream: the EventSource reconnect delay, in ms
+SSE_RETRY = b"retry: 3000\n\n"
+SSE_KEEPALIVE = b": keep-alive\n\n"
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class Event:
+    """One change event, encoded once for every subscriber"""
+
+    __slots__ = ("id", "topic", "type", "data", "_sse", "_text")
+
+    def __init__(self, event_id: Optional[int], topic: str, event_type: str, data: bytes):
+        self.id = event_id
+        self.topic = topic
+        self.type = event_type
+        self.data = data  # encoded JSON object
+        self._sse = None
+        self._text = None
+
+    def sse(self) -> bytes:
+        if self._sse is None:
+            event_id = f"id: {self.id}\n".encode("ascii") if self.id is not None else b""
+            self._sse = event_id + b"event: " + self.type.encode("ascii") + b"\ndata: " + self.data + b"\n\n"
+        return self._sse
+
+    def text(self) -> str:
+        """The event as one WebSocket text message"""
+        if self._text is None:
+            head = dumps({"id": self.id, "event": self.type})
+            self._text = (head[:-1] + b',"data":' + self.data + b"}").decode("utf-8")
+        return self._text
+
+
+def project_topic(owner: Optional[str], project_id: str) -> str:
+    """The topic of one user's project; user ids never contain '|'"""
+    return f"{owner or ''}|{project_id}"
+
+
+def resync_event(topic: str, dropped: int) -> Event:
+    return Event(None, topic, "resync", dumps({"project_id": topic.partition("|")[2], "dropped": dropped}))
+
+
+class Subscriber:
+    """A bounded queue of events for one stream"""
+
+    __slots__ = ("topic", "queue", "waiter", "closed", "dropped")
+
+    def __init__(self, topic: str):
+        self.topic = topic
+        self.queue = deque()
+        self.waiter = None  # future set by the bus while the stream waits
+        self.closed = False
+        self.dropped = 0
+
+    def wake(self):
+        waiter = self.waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def next(self, timeout: float) -> Optional[Event]:
+        """The next event; None when `timeout` passes first or the subscriber is closed"""
+        if self.queue:
+            return self.queue.popleft()
+        if self.closed:
+            return None
+        self.waiter = asyncio.get_running_loop().create_future()
+        try:
+            await asyncio.wait_for(self.waiter, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.waiter = None
+        return self.queue.popleft() if self.queue else None
+
+
+class History:
+    """A project's recent events, and the oldest event id from which none are missing"""
+
+    __slots__ = ("since", "events")
+
+    def __init__(self, since: int):
+        self.since = since
+        self.events = deque()
+
+    def append(self, event: Event):
+        if len(self.events) >= REPLAY_EVENTS:
+            self.since = self.events.popleft().id + 1
+        self.events.append(event)
+
+
+class EventBus:
+    """In-process pub/sub of project events with bounded subscriber queues"""
+
+    def __init__(self, queue_size: int = EVENT_QUEUE_SIZE, policy: str = SLOW_CONSUMER_POLICY,
+                 max_subscribers: int = MAX_SUBSCRIBERS, state=None):
+        self.queue_size = queue_size
+        self.policy = policy
+        self.max_subscribers = max_subscribers
+        self.state = state
+        self._topics = {}  # project_id -> set of subscribers
+        self._history = OrderedDict()  # project_id -> History, least recently used first
+        self._history_floor = 0  # ids up to here may be missing for projects without a History
+        self._subscribers = 0
+        self._last_id = 0  # of the newest event delivered
+        self._relay = None
+        self._relay_wakeup = None
+        self.published = 0
+        self.delivered = 0
+        self.rejected = 0
+        self.resyncs = 0
+        self.disconnects = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return self._subscribers
+
+    # Subscribing
+
+    def check_capacity(self):
+        """Raise TooManySubscribers if subscribe would, e.g. before a response starts"""
+        if self._subscribers >= self.max_subscribers:
+            self.rejected += 1
+            raise TooManySubscribers(f"{self._subscribers} event subscribers already")
+
+    def subscribe(self, topic: str, last_event_id: Optional[str] = None) -> Subscriber:
+        """A new subscriber, first sent what it missed since `last_event_id`"""
+        self.check_capacity()
+        subscriber = Subscriber(topic)
+        if last_event_id:
+            self._replay(subscriber, last_event_id)
+        self._topics.setdefault(topic, set()).add(subscriber)
+        self._subscribers += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subscribers = self._topics.get(subscriber.topic)
+        if subscribers is None or subscriber not in subscribers:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self._topics[subscriber.topic]
+        self._subscribers -= 1
+        subscriber.closed = True
+        subscriber.queue.clear()
+        subscriber.wake()
+
+    def _replay(self, subscriber: Subscriber, last_event_id: str):
+        try:
+            last = int(last_event_id)
+        except ValueError:
+            last = None
+        history = self._history.get(subscriber.topic)
+        since = history.since if history is not None else self._history_floor + 1
+        # An id from before a restart (or garbage), or older than what is kept
+        if last is None or last > self._last_id or last + 1 < since:
+            subscriber.queue.append(resync_event(subscriber.topic, 0))
+        elif history is not None:
+            subscriber.queue.extend(event for event in history.events if event.id > last)
+
+    # Publishing
+
+    def publish(self, topic: str, event_type: str, data: dict) -> Optional[Event]:
+        """Send an event to the project's subscribers (on every worker, given shared state)"""
+        self.published += 1
+        encoded = dumps(data)
+        if self.state is not None:
+            self.state.event_append(topic, event_type, encoded.decode("utf-8"))
+            # Delivered by the relay, in the shared sequence order
+            if self._relay_wakeup is not None:
+                self._relay_wakeup.set()
+            return None
+        event = Event(self._last_id + 1, topic, event_type, encoded)
+        self._deliver(event)
+        return event
+
+    def _deliver(self, event: Event):
+        topic = event.topic
+        self._last_id = event.id
+        history = self._history.get(topic)
+        if history is None:
+            history = self._history[topic] = History(since=event.id)
+            if len(self._history) > MAX_REPLAY_TOPICS:
+                _, evicted = self._history.popitem(last=False)
+                self._history_floor = max(self._history_floor, evicted.events[-1].id)
+        else:
+            self._history.move_to_end(topic)
+        history.append(event)
+
+        subscribers = self._topics.get(topic)
+        if not subscribers:
+            return
+        slow = None
+        queue_size = self.queue_size
+        for subscriber in subscribers:
+            queue = subscriber.queue
+            if len(queue) >= queue_size:
+                self.dropped += len(queue)
+                if self.policy == "disconnect":
+                    self.disconnects += 1
+                    if slow is None:
+                        slow = []
+                    slow.append(subscriber)
+                    continue
+                self.resyncs += 1
+                subscriber.dropped += len(queue)
+                queue.clear()
+                queue.append(resync_event(topic, subscriber.dropped))
+            queue.append(event)
+            self.delivered += 1
+            subscriber.wake()
+        if slow:
+            for subscriber in slow:
+                self.unsubscribe(subscriber)
+
+    # Relay from the shared events table
+
+    def start(self):
+        """Start relaying shared events to this worker's subscribers"""
+        if self.state is None or self._relay is not None:
+            return
+        self._last_id = self._history_floor = self.state.event_last_seq()
+        self._relay_wakeup = asyncio.Event()
+        self._relay = asyncio.create_task(self._run_relay())
+
+    async def stop(self):
+        relay, self._relay = self._relay, None
+        if relay is not None:
+            relay.cancel()
+            await asyncio.gather(relay, return_exceptions=True)
+        for subscribers in list(self._topics.values()):
+            for subscriber in list(subscribers):
+                self.unsubscribe(subscriber)
+
+    async def _run_relay(self):
+        state = self.state
+        wakeup = self._relay_wakeup
+        pruned_at = time.monotonic()
+        while True:
+            try:
+                await asyncio.wait_for(wakeup.wait(), RELAY_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
+            rows = state.events_since(self._last_id)
+            while rows:
+                for seq, topic, event_type, data in rows:
+                    self._deliver(Event(seq, topic, event_type, data.encode("utf-8")))
+                rows = state.events_since(self._last_id)
+            if time.monotonic() - pruned_at > SHARED_EVENT_RETENTION_SECONDS / 10:
+                state.event_prune(time.time() - SHARED_EVENT_RETENTION_SECONDS)
+                pruned_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": self._subscribers,
+            "max_subscribers": self.max_subscribers,
+            "projects": len(self._topics),
+            "queue_size": self.queue_size,
+            "slow_consumer_policy": self.policy,
+            "queued": sum(len(subscriber.queue) for subscribers in self._topics.values() for subscriber in subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "resyncs": self.resyncs,
+            "disconnects": self.disconnects,
+            "rejected": self.rejected,
+            "shared": self.state is not None,
+        }
+
+
+async def sse_stream(bus: EventBus, topic: str, last_event_id: Optional[str] = None):
+    """Server-Sent Events of a topic, until the subscriber is closed or the client leaves
+
+    Subscribes only once the response is being sent, so a response that never
+    starts leaves no subscriber behind.
+    """
+    try:
+        subscriber = bus.subscribe(topic, last_event_id)
+    except TooManySubscribers:
+        # Filled up since the endpoint checked; EventSource retries on its own
+        yield SSE_RETRY
+        return
+    try:
+        yield SSE_RETRY
+        while True:
+            event = await subscriber.next(SSE_KEEPALIVE_SECONDS)
+            if event is not None:
+                yield event.sse()
+            elif subscriber.closed:
+                return
+            else:
+                yield SSE_KEEPALIVE
+    finally:
+        bus.unsubscribe(subscriber)
+
+
+async def websocket_stream(bus: EventBus, subscriber: Subscriber, websocket):
+    """Send a subscriber's events as WebSocket text messages until either side closes"""
+    client_left = False
+
+    async def watch_client():
+        # Nothing is expected from the client; this only notices it leaving
+        nonlocal client_left
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+        client_left = True
+        bus.unsubscribe(subscriber)
+
+    watcher = asyncio.create_task(watch_client())
+    try:
+        while True:
+            event = await subscriber.next(SSE_KEEPALIVE_SECONDS)
+            if event is not None:
+                await websocket.send({"type": "websocket.send", "text": event.text()})
+            elif subscriber.closed:
+                break
+    finally:
+        watcher.cancel()
+        bus.unsubscribe(subscriber)
+    if not client_left:
+        # Dropped as a slow consumer, or the server is shutting down
+        await websocket.close(code=1013)
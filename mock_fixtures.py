@@ -0,0 +1,188 @@
+"""
+Deterministic fixture responses
+
+When nothing is saved for a project, get_userpersonas and get_branddesign
+answer from a fixture scenario instead of flipping a coin. Scenarios are JSON
+files in fixtures/scenarios/. Each one lists the response variants of a route
+(e.g. "found" and "empty") with weights and a selection mode:
+
+- project: a hash of (seed, route, project_id) picks the variant, so a
+  project always gets the same answer
+- seed: a seeded random sequence per route; the same seed and request order
+  replay exactly
+- ratio: a fixed repeating schedule that hits the weights exactly, e.g. 1:3
+  serves one "found" in every four requests
+
+A scenario can extend another and override only its routes. Every variant
+body is encoded once at load time (PrecomputedBody), so serving a fixture
+costs no more than serving a constant.
+
+MOCK_FIXTURE_SCENARIO picks the scenario (default "default"),
+MOCK_FIXTURE_SEED overrides its seed and MOCK_FIXTURE_MODE its modes.
+"""
+
+import bisect
+import hashlib
+import itertools
+import json
+import os
+import random
+import threading
+from typing import Optional
+
+from mock_responses import PrecomputedBody
+
+
+SCENARIO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "scenarios")
+MODES = ("project", "seed", "ratio")
+
+
+class FixtureError(ValueError):
+    """Raised for a missing or malformed scenario file"""
+
+
+class Variant:
+    __slots__ = ("name", "body")
+
+    def __init__(self, name: str, body: PrecomputedBody):
+        self.name = name
+        self.body = body
+
+
+def ratio_schedule(weights: list) -> list:
+    """Indexes in smooth weighted round-robin order; one cycle has sum(weights) slots"""
+    current = [0] * len(weights)
+    total = sum(weights)
+    schedule = []
+    for _ in range(total):
+        for i, weight in enumerate(weights):
+            current[i] += weight
+        best = max(range(len(weights)), key=current.__getitem__)
+        current[best] -= total
+        schedule.append(best)
+    return schedule
+
+
+class FixtureRoute:
+    """Weighted choice between the variants of one route"""
+
+    def __init__(self, route: str, mode: str, seed, variants: list, weights: list):
+        if mode not in MODES:
+            raise FixtureError(f"{route}: unknown mode {mode!r}, expected one of {', '.join(MODES)}")
+        if not variants or any(weight < 0 for weight in weights) or sum(weights) <= 0:
+            raise FixtureError(f"{route}: weights must be non-negative with a positive total")
+        self.route = route
+        self.mode = mode
+        self.seed = seed
+        self.variants = variants
+        self.total = sum(weights)
+        self._bounds = list(itertools.accumulate(weights))
+        self._schedule = ratio_schedule(weights) if mode == "ratio" else None
+        self._counter = itertools.count()
+        self._rng = random.Random(f"{seed}:{route}")
+        self._lock = threading.Lock()
+        self.served = {variant.name: 0 for variant in variants}
+
+    def _pick(self, point: int) -> Variant:
+        return self.variants[bisect.bisect_right(self._bounds, point)]
+
+    def choose(self, project_id: Optional[str]) -> Variant:
+        if self.mode == "project":
+            key = f"{self.seed}:{self.route}:{project_id or ''}".encode("utf-8")
+            point = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big") % self.total
+            variant = self._pick(point)
+        elif self.mode == "seed":
+            with self._lock:
+                point = self._rng.randrange(self.total)
+            variant = self._pick(point)
+        else:
+            variant = self.variants[self._schedule[next(self._counter) % self.total]]
+        self.served[variant.name] += 1
+        return variant
+
+    def reset(self):
+        """Restart the seed sequence and the ratio schedule"""
+        self._counter = itertools.count()
+        self._rng = random.Random(f"{self.seed}:{self.route}")
+        self.served = dict.fromkeys(self.served, 0)
+
+
+def read_scenario(name: str, directory: str = SCENARIO_DIR, _seen: tuple = ()) -> dict:
+    """A scenario with everything it extends merged in"""
+    if name in _seen:
+        raise FixtureError(f"scenario {name!r} extends itself")
+    path = os.path.join(directory, f"{name}.json")
+    try:
+        with open(path, encoding="utf-8") as f:
+            scenario = json.load(f)
+    except FileNotFoundError:
+        raise FixtureError(f"no scenario file {path}")
+    except ValueError as exc:
+        raise FixtureError(f"{path}: {exc}")
+
+    parent = scenario.get("extends")
+    if not parent:
+        return scenario
+    base = read_scenario(parent, directory, _seen + (name,))
+    responses = dict(base.get("responses", {}))
+    for route, variants in scenario.get("responses", {}).items():
+        responses[route] = {**responses.get(route, {}), **variants}
+    return {
+        **base,
+        **scenario,
+        "routes": {**base.get("routes", {}), **scenario.get("routes", {})},
+        "responses": responses,
+    }
+
+
+class FixtureSet:
+    """The routes of one loaded scenario"""
+
+    def __init__(self, name: str, directory: str = SCENARIO_DIR, seed=None, mode: Optional[str] = None):
+        scenario = read_scenario(name, directory)
+        self.name = name
+        self.description = scenario.get("description", "")
+        self.seed = scenario.get("seed", 0) if seed is None else seed
+        self.routes = {}
+        for route, config in scenario.get("routes", {}).items():
+            responses = scenario.get("responses", {}).get(route, {})
+            variants = []
+            weights = []
+            for variant_name, weight in config.get("weights", {}).items():
+                if variant_name not in responses:
+                    raise FixtureError(f"{name}: {route} has no response {variant_name!r}")
+                response = responses[variant_name]
+                body = PrecomputedBody(response.get("body", {}), volatile=response.get("volatile", ()))
+                variants.append(Variant(variant_name, body))
+                weights.append(weight)
+            self.routes[route] = FixtureRoute(route, mode or config.get("mode", "project"), self.seed, variants, weights)
+
+    def choose(self, route: str, project_id: Optional[str]) -> Variant:
+        return self.routes[route].choose(project_id)
+
+    def reset(self):
+        for route in self.routes.values():
+            route.reset()
+
+    def stats(self) -> dict:
+        return {
+            "scenario": self.name,
+            "description": self.description,
+            "seed": self.seed,
+            "routes": {
+                name: {"mode": route.mode, "served": dict(route.served)}
+                for name, route in self.routes.items()
+            },
+        }
+
+
+def load_from_env() -> FixtureSet:
+    seed = os.environ.get("MOCK_FIXTURE_SEED")
+    return FixtureSet(
+        os.environ.get("MOCK_FIXTURE_SCENARIO", "default"),
+        seed=int(seed) if seed else None,
+        mode=os.environ.get("MOCK_FIXTURE_MODE") or None,
+    )
+
+
+fixtures = load_from_env()
@@ -0,0 +1,344 @@
+"""
+Idempotency keys for the upload endpoints
+
+A client that retries upload_prd, upload_userpersonas or upload_branddesign
+sends the same `Idempotency-Key` header each time. The first request runs
+normally and its response (status, headers and body) is stored under the key;
+a retry gets those bytes back without the handler running again, marked with
+`Idempotent-Replayed: true`. A retry that arrives while the first request is
+still running waits for it instead of doing the work twice.
+
+Keys are scoped to the user and the endpoint. Reusing a key with a different
+request body is answered with 422. Server errors (5xx), 409 and 429 are not
+stored, so a retry after them runs again.
+
+The memory store is bounded by entries and bytes; every entry has the same
+TTL, so the oldest entry is always the next to expire and eviction is a pop
+from the front. With the sqlite state backend (several workers) responses live
+in a shared table instead, and a worker claims a key before running the
+request, so duplicates sent to different workers also run once. The table is
+bounded by entries: a put past MOCK_IDEMPOTENCY_MAX sweeps expired rows, then
+deletes the stored responses closest to expiry.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from starlette.datastructures import Headers
+
+from mock_auth import bearer_token, scope_session
+from mock_responses import dumps
+from mock_state import SWEEP_BATCH, shared
+
+
+TTL_SECONDS = float(os.environ.get("MOCK_IDEMPOTENCY_TTL", 24 * 3600))
+MAX_ENTRIES = int(os.environ.get("MOCK_IDEMPOTENCY_MAX", 10_000))
+MAX_BYTES = int(os.environ.get("MOCK_IDEMPOTENCY_MAX_BYTES", 64 * 1024 * 1024))
+# Larger responses are sent but not stored
+MAX_RESPONSE_BYTES = 1024 * 1024
+MAX_KEY_LENGTH = 255
+
+IDEMPOTENT_PATHS = frozenset((
+    "/api/upload_prd",
+    "/api/upload_prd/stream",
+    "/api/upload_userpersonas",
+    "/api/upload_branddesign",
+))
+REPLAY_HEADER = (b"idempotent-replayed", b"true")
+
+# How long another worker's claim blocks a key if that worker dies mid-request
+CLAIM_SECONDS = 60.0
+POLL_SECONDS = 0.05
+# Shared rows are swept every this many stored responses
+SWEEP_EVERY = 100
+
+
+def is_storable(status: int) -> bool:
+    return status < 500 and status not in (409, 429)
+
+
+class StoredResponse:
+    __slots__ = ("fingerprint", "status", "headers", "body", "expires_at")
+
+    def __init__(self, fingerprint: str, status: int, headers: list, body: bytes, expires_at: float):
+        self.fingerprint = fingerprint
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.expires_at = expires_at
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(name) + len(value) for name, value in self.headers)
+
+
+class IdempotencyStore:
+    """Stored responses by key, bounded by entries and bytes, oldest out first"""
+
+    backend = "memory"
+
+    def __init__(self, ttl: float = TTL_SECONDS, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> StoredResponse, in expiry order
+        self.total_bytes = 0
+        self.stored = 0
+        self.replayed = 0
+        self.coalesced = 0
+        self.mismatched = 0
+        self.evicted = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.time():
+            self._drop(key)
+            self.expired += 1
+            return None
+        return entry
+
+    def claim(self, key: str) -> bool:
+        """Requests in one process are coalesced by the middleware, so a claim always succeeds"""
+        return True
+
+    def release(self, key: str):
+        pass
+
+    def put(self, key: str, response: StoredResponse):
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = response
+        self.total_bytes += response.size
+        self.stored += 1
+
+        now = time.time()
+        while self._entries:
+            oldest_key, oldest = next(iter(self._entries.items()))
+            if oldest.expires_at <= now:
+                self.expired += 1
+            elif len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                self.evicted += 1
+            else:
+                break
+            self._drop(oldest_key)
+
+    def _drop(self, key: str):
+        self.total_bytes -= self._entries.pop(key).size
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "entries": len(self),
+            "bytes": self.total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "stored": self.stored,
+            "replayed": self.replayed,
+            "coalesced": self.coalesced,
+            "mismatched": self.mismatched,
+            "evicted": self.evicted,
+            "expired": self.expired,
+        }
+
+
+class SharedIdempotencyStore(IdempotencyStore):
+    """Stored responses in the shared sqlite table, visible to every worker"""
+
+    backend = "sqlite"
+
+    def __init__(self, state, ttl: float = TTL_SECONDS, max_entries: int = MAX_ENTRIES):
+        super().__init__(ttl=ttl, max_entries=max_entries)
+        self.state = state
+
+    def __len__(self) -> int:
+        return self.state.idempotency_count()
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        row = self.state.idempotency_get(key)
+        if row is None:
+            return None
+        fingerprint, status, headers, body, expires_at = row
+        if status is None or expires_at <= time.time():
+            return None
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+        return StoredResponse(fingerprint, status, headers, body, expires_at)
+
+    def claim(self, key: str) -> bool:
+        return self.state.idempotency_claim(key, "", time.time() + CLAIM_SECONDS)
+
+    def release(self, key: str):
+        self.state.idempotency_delete(key)
+
+    def put(self, key: str, response: StoredResponse):
+        headers = [(name.decode("latin-1"), value.decode("latin-1")) for name, value in response.headers]
+        self.state.idempotency_complete(
+            key, response.fingerprint, response.status, headers, response.body, response.expires_at
+        )
+        self.stored += 1
+        count = self.state.idempotency_count()
+        if count > self.max_entries or self.stored % SWEEP_EVERY == 0:
+            swept = self.state.idempotency_sweep(time.time(), SWEEP_BATCH)
+            self.expired += swept
+            count -= swept
+        if count > self.max_entries:
+            self.evicted += self.state.idempotency_evict(count - self.max_entries)
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["bytes"] = None
+        stats["max_bytes"] = None
+        return stats
+
+
+def owner_of(scope, headers: Headers) -> str:
+    """Who a key belongs to: the session's user, else a hash of an unknown token"""
+    session = scope_session(scope)
+    if session is not None:
+        return session.user_id
+    token = bearer_token(headers.get("authorization"))
+    if token:
+        return "token_" + hashlib.blake2b(token.encode("utf-8"), digest_size=8).hexdigest()
+    return "anonymous"
+
+
+async def body_fingerprint(receive) -> str:
+    """Hash the request body chunk by chunk, without holding it"""
+    hasher = hashlib.blake2b(digest_size=16)
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        hasher.update(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    return hasher.hexdigest()
+
+
+async def send_json(send, status: int, data: dict, extra_headers: list = ()):
+    body = dumps(data)
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            *extra_headers,
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    """Store and replay responses of keyed POSTs to IDEMPOTENT_PATHS"""
+
+    def __init__(self, app, store: IdempotencyStore):
+        self.app = app
+        self.store = store
+        self._inflight = {}  # key -> Future done when the running request finishes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in IDEMPOTENT_PATHS:
+            return await self.app(scope, receive, send)
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get("idempotency-key")
+        if idempotency_key is None:
+            return await self.app(scope, receive, send)
+        # Replays never reach the router, so label them for the metrics here
+        scope["metrics_route"] = scope["path"]
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            return await send_json(send, 400, {"detail": f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"})
+        key = f"{owner_of(scope, headers)}|{scope['path']}|{idempotency_key}"
+        store = self.store
+        # The body stays unread while waiting: a retry whose first request was not
+        # stored runs with it, and a replay only hashes it
+
+        while True:
+            stored = store.get(key)
+            if stored is not None:
+                return await self._replay(stored, await body_fingerprint(receive), send)
+
+            running = self._inflight.get(key)
+            if running is not None:
+                store.coalesced += 1
+                # shield: a waiter that disconnects must not cancel the running request
+                await asyncio.shield(running)
+                continue
+
+            if store.claim(key):
+                break
+            # Another worker runs this key; wait for its response
+            await asyncio.sleep(POLL_SECONDS)
+
+        await self._run(key, scope, receive, send)
+
+    async def _replay(self, stored: StoredResponse, request_fingerprint: str, send):
+        if stored.fingerprint != request_fingerprint:
+            self.store.mismatched += 1
+            return await send_json(send, 422, {"detail": "Idempotency-Key was already used with a different request body"})
+        self.store.replayed += 1
+        await send({"type": "http.response.start", "status": stored.status, "headers": [*stored.headers, REPLAY_HEADER]})
+        await send({"type": "http.response.body", "body": stored.body})
+
+    async def _run(self, key: str, scope, receive, send):
+        """Run the request and store its response under the key"""
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        hasher = hashlib.blake2b(digest_size=16)
+        body_complete = False
+        response = {"status": None, "headers": None, "chunks": [], "size": 0, "complete": False}
+
+        async def hashing_receive():
+            nonlocal body_complete
+            message = await receive()
+            if message["type"] == "http.request":
+                hasher.update(message.get("body", b""))
+                body_complete = not message.get("more_body")
+            return message
+
+        async def capturing_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = list(message.get("headers", ()))
+            elif message["type"] == "http.response.body" and response["size"] <= MAX_RESPONSE_BYTES:
+                chunk = message.get("body", b"")
+                response["chunks"].append(chunk)
+                response["size"] += len(chunk)
+                response["complete"] = not message.get("more_body")
+            await send(message)
+
+        stored = False
+        try:
+            await self.app(scope, hashing_receive, capturing_send)
+            # A handler that stopped reading early leaves the fingerprint incomplete
+            if (
+                body_complete
+                and response["complete"]
+                and response["size"] <= MAX_RESPONSE_BYTES
+                and is_storable(response["status"])
+            ):
+                self.store.put(key, StoredResponse(
+                    hasher.hexdigest(),
+                    response["status"],
+                    response["headers"],
+                    b"".join(response["chunks"]),
+                    time.time() + self.store.ttl,
+                ))
+                stored = True
+        finally:
+            del self._inflight[key]
+            if not stored:
+                self.store.release(key)
+            future.set_result(None)
+
+
+
+idempotency = SharedIdempotencyStore(shared) if shared is not None else IdempotencyStore()
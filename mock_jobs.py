@@ -0,0 +1,261 @@
+"""
+Background jobs for slow request work
+
+JobQueue runs submitted coroutines as background jobs, at most `concurrency`
+at a time, and rejects new jobs with JobQueueFull once `max_pending` are
+queued or running, so memory cannot grow without bound. Each Job tracks its
+status and progress and can be followed as a Server-Sent Events stream.
+
+CPU-bound work goes to a shared process pool (get_process_pool) so it runs
+in parallel and never holds the event loop's GIL.
+
+Given a shared state backend (multi-worker mode), the queue also publishes
+every job update there, so a worker that did not run a job can still report
+its status and stream its events (remote_job_events).
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import secrets
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Awaitable, Callable, Optional
+
+
+JOB_WORKERS = int(os.environ.get("MOCK_JOB_WORKERS", os.cpu_count() or 1))
+JOB_QUEUE_SIZE = int(os.environ.get("MOCK_JOB_QUEUE_SIZE", 64))
+
+# Finished jobs kept around for status lookups
+MAX_FINISHED_JOBS = 1000
+
+# Comment line sent on idle SSE streams so proxies keep them open
+SSE_KEEPALIVE_SECONDS = 15
+
+# How often a stream for a job running in another worker re-reads its state
+REMOTE_POLL_SECONDS = 0.25
+
+# Published job snapshots are kept this long after their last update
+SHARED_JOB_RETENTION_SECONDS = 3600
+
+_process_pool = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """The shared process pool, started on first use"""
+    global _process_pool
+    if _process_pool is None:
+        # spawn: forking a process that runs threads (logging, sqlite) is unsafe
+        _process_pool = ProcessPoolExecutor(
+            max_workers=JOB_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_pool
+
+
+class JobQueueFull(Exception):
+    """Raised by JobQueue.submit when the queue is at capacity"""
+
+
+class Job:
+    """State of one background job"""
+
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.status = "queued"
+        self.progress = 0.0
+        self.detail = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.listener = None
+        self._changed = asyncio.Event()
+
+    @property
+    def changed(self) -> asyncio.Event:
+        """Event set on the next update; fetch it before reading job state"""
+        return self._changed
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def update(self, **fields):
+        """Change job fields and wake everyone waiting on this job"""
+        for name, value in fields.items():
+            setattr(self, name, value)
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+        if self.listener is not None:
+            self.listener(self)
+
+    def report(self, done: int, total: int):
+        """Progress callback for work split into `total` steps"""
+        self.update(progress=round(done / total, 4) if total else 1.0, detail={"done": done, "total": total})
+
+    def snapshot(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "progress": self.progress,
+            "detail": self.detail,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """Bounded queue of background jobs"""
+
+    def __init__(self, concurrency: int = JOB_WORKERS, max_pending: int = JOB_QUEUE_SIZE, state=None):
+        self.state = state
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self.pending = 0
+        self._slots = None
+        self._jobs = OrderedDict()
+        self._finished = OrderedDict()
+        self._tasks = set()
+        self.rejected = 0
+
+    def submit(self, work: Callable[[Job], Awaitable]) -> Job:
+        """Start work(job) in the background and return the job right away"""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise JobQueueFull(f"{self.pending} jobs pending")
+        if self._slots is None:
+            # Created lazily so it binds to the running event loop
+            self._slots = asyncio.Semaphore(self.concurrency)
+
+        job = Job(f"job_{secrets.token_hex(8)}")
+        if self.state is not None:
+            job.listener = self._publish
+            self._publish(job)
+        self._jobs[job.id] = job
+        self.pending += 1
+        task = asyncio.create_task(self._run(job, work))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: Job, work: Callable[[Job], Awaitable]):
+        try:
+            async with self._slots:
+                job.update(status="running")
+                result = await work(job)
+            job.update(status="completed", progress=1.0, result=result)
+        except asyncio.CancelledError:
+            job.update(status="failed", error="cancelled")
+            raise
+        except Exception as exc:
+            job.update(status="failed", error=str(exc) or exc.__class__.__name__)
+        finally:
+            self.pending -= 1
+            self._finished[job.id] = None
+            while len(self._finished) > MAX_FINISHED_JOBS:
+                old_id, _ = self._finished.popitem(last=False)
+                self._jobs.pop(old_id, None)
+            if self.state is not None:
+                self.state.job_prune(time.time() - SHARED_JOB_RETENTION_SECONDS)
+
+    def _publish(self, job: Job):
+        self.state.job_put(job.id, {**job.snapshot(), "result": job.result})
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def get_shared(self, job_id: str) -> Optional[dict]:
+        """Published snapshot (with result) of a job run by any worker"""
+        if self.state is None:
+            return None
+        return self.state.job_get(job_id)
+
+    def position(self, job: Job) -> int:
+        """Number of queued jobs ahead of this one (0 once it is running)"""
+        if job.status != "queued":
+            return 0
+        ahead = 0
+        for other in self._jobs.values():
+            if other is job:
+                break
+            if other.status == "queued":
+                ahead += 1
+        return ahead
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "concurrency": self.concurrency,
+            "rejected": self.rejected,
+            "tracked_jobs": len(self._jobs),
+        }
+
+    async def join(self):
+        """Wait until every submitted job has finished"""
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def shutdown(self):
+        """Cancel unfinished jobs and stop the process pool"""
+        global _process_pool
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
+
+
+def format_sse(event: str, data) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n".encode("utf-8")
+
+
+async def job_events(job: Job):
+    """Server-Sent Events for a job: progress updates, then result or error"""
+    last = None
+    while True:
+        changed = job.changed
+        snapshot = job.snapshot()
+        if snapshot != last:
+            yield format_sse("progress", snapshot)
+            last = snapshot
+        if job.done:
+            if job.status == "completed":
+                yield format_sse("result", job.result)
+            else:
+                yield format_sse("error", {"job_id": job.id, "error": job.error})
+            return
+        try:
+            await asyncio.wait_for(changed.wait(), timeout=SSE_KEEPALIVE_SECONDS)
+        except asyncio.TimeoutError:
+            yield b": keep-alive\n\n"
+
+
+async def remote_job_events(queue: JobQueue, job_id: str):
+    """job_events for a job running in another worker, by polling its published state"""
+    last = None
+    idle = 0.0
+    while True:
+        snapshot = queue.get_shared(job_id)
+        if snapshot is None:
+            yield format_sse("error", {"job_id": job_id, "error": "job not found"})
+            return
+        result = snapshot.pop("result", None)
+        if snapshot != last:
+            yield format_sse("progress", snapshot)
+            last = snapshot
+            idle = 0.0
+        if snapshot["status"] == "completed":
+            yield format_sse("result", result)
+            return
+        if snapshot["status"] == "failed":
+            yield format_sse("error", {"job_id": job_id, "error": snapshot["error"]})
+            return
+        await asyncio.sleep(REMOTE_POLL_SECONDS)
+        idle += REMOTE_POLL_SECONDS
+        if idle >= SSE_KEEPALIVE_SECONDS:
+            yield b": keep-alive\n\n"
+            idle = 0.0
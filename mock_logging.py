@@ -0,0 +1,213 @@
+"""
+Structured request logging for the mock backend
+
+Handlers log through per-endpoint loggers instead of print(). Records are
+put on a bounded queue by a QueueHandler and formatted as JSON lines by a
+background QueueListener thread, so the event loop never waits on stdout.
+
+Environment variables:
+- MOCK_LOG: "off" disables request logging entirely
+- MOCK_LOG_LEVEL: default level (DEBUG, INFO, WARNING, ...), default INFO
+- MOCK_LOG_LEVELS: per-endpoint levels, e.g. "get_thirdparty=WARNING,upload_prd=DEBUG"
+- MOCK_LOG_SAMPLE: per-endpoint sample rates, e.g. "get_thirdparty=0.01,*=0.5"
+- MOCK_LOG_FILE: write to this file instead of stdout
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+
+QUEUE_SIZE = 10_000
+
+_config = {
+    "enabled": True,
+    "level": logging.INFO,
+    "levels": {},
+    "sample_rates": {},
+    "stream": None,
+}
+
+_loggers = {}
+_listener = None
+_handler = None
+dropped_records = 0
+
+
+def _parse_mapping(value: str) -> dict:
+    """Parse "a=1,b=2" into {"a": "1", "b": "2"}"""
+    mapping = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, setting = item.partition("=")
+        mapping[name.strip()] = setting.strip()
+    return mapping
+
+
+def _parse_level(value) -> int:
+    if isinstance(value, int):
+        return value
+    level = logging.getLevelName(str(value).upper())
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown log level: {value}")
+    return level
+
+
+class JSONLineFormatter(logging.Formatter):
+    """Render a record as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "endpoint": record.name.rpartition(".")[2],
+            "event": record.msg,
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def prepare(self, record):
+        # Formatting happens on the listener thread; fields are plain values
+        return record
+
+    def enqueue(self, record):
+        global dropped_records
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            dropped_records += 1
+
+
+class EndpointLogger:
+    """Cheap front end for a single endpoint's logger
+
+    Level and sampling checks happen here, before a LogRecord is created,
+    so filtered-out calls cost a couple of attribute lookups.
+    """
+
+    __slots__ = ("endpoint", "level", "sample_rate", "_logger")
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self._logger = logging.getLogger(f"codebenders.{endpoint}")
+        self._logger.propagate = False
+        self.refresh()
+
+    def refresh(self):
+        if not _config["enabled"]:
+            # Above CRITICAL: every call returns on the first comparison
+            self.level = logging.CRITICAL + 1
+        else:
+            self.level = _parse_level(_config["levels"].get(self.endpoint, _config["level"]))
+        rates = _config["sample_rates"]
+        self.sample_rate = float(rates.get(self.endpoint, rates.get("*", 1.0)))
+        self._logger.handlers = [_handler] if _handler is not None else []
+        self._logger.setLevel(self.level)
+
+    def enabled_for(self, level: int) -> bool:
+        return level >= self.level
+
+    def log(self, level: int, event: str, **fields):
+        if level < self.level:
+            return
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        self._logger.log(level, event, extra={"fields": fields})
+
+    def debug(self, event: str, **fields):
+        self.log(logging.DEBUG, event, **fields)
+
+    def info(self, event: str, **fields):
+        self.log(logging.INFO, event, **fields)
+
+    def warning(self, event: str, **fields):
+        self.log(logging.WARNING, event, **fields)
+
+    def error(self, event: str, **fields):
+        self.log(logging.ERROR, event, **fields)
+
+
+def get_logger(endpoint: str) -> EndpointLogger:
+    """Return the shared logger for an endpoint (usually the handler name)"""
+    logger = _loggers.get(endpoint)
+    if logger is None:
+        logger = _loggers[endpoint] = EndpointLogger(endpoint)
+    return logger
+
+
+def token_preview(token: Optional[str]) -> Optional[str]:
+    """Shorten a bearer token for logs"""
+    return token[:20] + "..." if token else None
+
+
+def shutdown():
+    """Flush queued records and stop the writer thread"""
+    global _listener, _handler
+    if _listener is not None:
+        _listener.stop()
+        for target in _listener.handlers:
+            target.flush()
+    _listener = None
+    _handler = None
+
+
+def configure(
+    enabled: Optional[bool] = None,
+    level=None,
+    levels: Optional[dict] = None,
+    sample_rates: Optional[dict] = None,
+    stream=None,
+):
+    """Apply logging settings and (re)start the background writer
+
+    Arguments left as None keep their current value.
+    """
+    global _listener, _handler
+
+    if enabled is not None:
+        _config["enabled"] = enabled
+    if level is not None:
+        _config["level"] = _parse_level(level)
+    if levels is not None:
+        _config["levels"] = {name: _parse_level(value) for name, value in levels.items()}
+    if sample_rates is not None:
+        _config["sample_rates"] = {name: float(rate) for name, rate in sample_rates.items()}
+    if stream is not None:
+        _config["stream"] = stream
+
+    shutdown()
+    if _config["enabled"]:
+        writer = logging.StreamHandler(_config["stream"] or sys.stdout)
+        writer.setFormatter(JSONLineFormatter())
+        log_queue = queue.Queue(maxsize=QUEUE_SIZE)
+        _handler = _DroppingQueueHandler(log_queue)
+        _listener = logging.handlers.QueueListener(log_queue, writer, respect_handler_level=False)
+        _listener.start()
+
+    for logger in _loggers.values():
+        logger.refresh()
+
+
+def configure_from_env():
+    log_file = os.environ.get("MOCK_LOG_FILE")
+    configure(
+        enabled=os.environ.get("MOCK_LOG", "on").lower() not in ("off", "0", "false", "no"),
+        level=os.environ.get("MOCK_LOG_LEVEL", "INFO"),
+        levels=_parse_mapping(os.environ.get("MOCK_LOG_LEVELS", "")),
+        sample_rates=_parse_mapping(os.environ.get("MOCK_LOG_SAMPLE", "")),
+        stream=open(log_file, "a", buffering=1, encoding="utf-8") if log_file else None,
+    )
+
+
+configure_from_env()
+atexit.register(shutdown)
@@ -0,0 +1,249 @@
+"""
+Prometheus-style request metrics
+
+MetricsMiddleware records, per route template (e.g. /api/prd_jobs/{job_id}),
+method and status code:
+
+- request counts and latency histograms with fixed buckets
+- requests in flight, per route and in total
+- request body sizes of the upload endpoints in PAYLOAD_ROUTES
+
+A background task also measures event-loop lag: how late a timer fires
+compared to when it was due. GET /metrics renders everything in the
+Prometheus text format.
+
+All recording happens on the event loop thread, so the counters are plain
+integers and lists with no locks; an observation is a bisect and two
+additions. With several workers every process keeps its own metrics, and a
+scrape sees whichever worker answers it.
+
+MOCK_METRICS=off disables recording. MOCK_METRICS_LAG_INTERVAL sets how often
+the event loop is probed, in seconds (default 0.25).
+"""
+
+import asyncio
+import os
+import time
+from bisect import bisect_left
+from typing import Iterable
+
+from starlette.routing import Route
+
+
+# Seconds; from 500 µs (fixture reads) to 10 s (large PRD analyses)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Bytes; from a short PRD to a base64 logo near the blob size limit
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+PAYLOAD_ROUTES = frozenset((
+    "/api/upload_prd",
+    "/api/upload_prd/stream",
+    "/api/upload_branddesign",
+    "/api/v1/perf/runs/{run_id}/samples",
+))
+UNMATCHED_ROUTE = "unmatched"
+# The response adds "; charset=utf-8"
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+ENABLED = os.environ.get("MOCK_METRICS", "on").lower() not in ("0", "off", "false", "no")
+LAG_INTERVAL_SECONDS = float(os.environ.get("MOCK_METRICS_LAG_INTERVAL", 0.25))
+
+
+class Histogram:
+    """Fixed-bucket histogram; counts are per bucket and made cumulative on export"""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Iterable[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # the last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _render_histogram(lines: list, name: str, labels: str, histogram: Histogram):
+    prefix = labels + "," if labels else ""
+    suffix = f"{{{labels}}}" if labels else ""
+    cumulative = 0
+    for bound, count in zip(histogram.bounds, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum{suffix} {histogram.sum!r}")
+    lines.append(f"{name}_count{suffix} {histogram.count}")
+
+
+class Metrics:
+    """The process's request, payload and event-loop metrics"""
+
+    def __init__(self, enabled: bool = ENABLED):
+        self.enabled = enabled
+        self.started_at = time.time()
+        self.latency = {}  # (method, route, status) -> Histogram
+        self.in_flight = {}  # route -> requests being handled
+        self.in_flight_total = 0
+        self.payload_bytes = {}  # route -> Histogram
+        self.loop_lag = Histogram(LATENCY_BUCKETS)
+        self.loop_lag_last = 0.0
+        self._instrumented = False
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        key = (method, route, status)
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram(LATENCY_BUCKETS)
+        histogram.observe(seconds)
+
+    def observe_payload(self, route: str, size: int):
+        histogram = self.payload_bytes.get(route)
+        if histogram is None:
+            histogram = self.payload_bytes[route] = Histogram(SIZE_BUCKETS)
+        histogram.observe(size)
+
+    def instrument(self, app):
+        """Wrap every route so it reports its template, in-flight count and body size"""
+        if self._instrumented:
+            return
+        self._instrumented = True
+        for route in app.routes:
+            if isinstance(route, Route):
+                route.app = _RouteRecorder(route.app, route.path, self)
+
+    async def run_lag_probe(self, interval: float = LAG_INTERVAL_SECONDS):
+        """Sleep for `interval` over and over and record how late each wake-up is"""
+        loop = asyncio.get_running_loop()
+        while True:
+            due = loop.time() + interval
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - due)
+            self.loop_lag_last = lag
+            self.loop_lag.observe(lag)
+
+    def render(self) -> bytes:
+        lines = [
+            "# HELP http_requests_total Requests handled, by route template, method and status",
+            "# TYPE http_requests_total counter",
+        ]
+        latency = sorted(self.latency.items(), key=lambda item: (item[0][1], item[0][0], item[0][2]))
+        for (method, route, status), histogram in latency:
+            lines.append(f"http_requests_total{{{_labels(method=method, route=route, status=status)}}} {histogram.count}")
+
+        lines.append("# HELP http_request_duration_seconds Time from request start to the last response byte")
+        lines.append("# TYPE http_request_duration_seconds histogram")
+        for (method, route, status), histogram in latency:
+            _render_histogram(lines, "http_request_duration_seconds", _labels(method=method, route=route, status=status), histogram)
+
+        lines.append("# HELP http_requests_in_flight Requests being handled, by route template")
+        lines.append("# TYPE http_requests_in_flight gauge")
+        for route, count in sorted(self.in_flight.items()):
+            lines.append(f"http_requests_in_flight{{{_labels(route=route)}}} {count}")
+        lines.append("# HELP http_requests_in_flight_total Requests being handled on any route")
+        lines.append("# TYPE http_requests_in_flight_total gauge")
+        lines.append(f"http_requests_in_flight_total {self.in_flight_total}")
+
+        lines.append("# HELP http_request_body_bytes Request body size of the upload endpoints")
+        lines.append("# TYPE http_request_body_bytes histogram")
+        for route, histogram in sorted(self.payload_bytes.items()):
+            _render_histogram(lines, "http_request_body_bytes", _labels(route=route), histogram)
+
+        lines.append("# HELP event_loop_lag_seconds How late event-loop timers fire")
+        lines.append("# TYPE event_loop_lag_seconds histogram")
+        _render_histogram(lines, "event_loop_lag_seconds", "", self.loop_lag)
+        lines.append("# HELP event_loop_lag_last_seconds Lag of the most recent probe")
+        lines.append("# TYPE event_loop_lag_last_seconds gauge")
+        lines.append(f"event_loop_lag_last_seconds {self.loop_lag_last!r}")
+
+        lines.append("# HELP process_start_time_seconds Start time of the process since the Unix epoch")
+        lines.append("# TYPE process_start_time_seconds gauge")
+        lines.append(f"process_start_time_seconds {self.started_at!r}")
+        lines.append("")
+        return "\n".join(lines).encode("utf-8")
+
+
+class _RouteRecorder:
+    """ASGI wrapper around one route's endpoint"""
+
+    __slots__ = ("app", "path", "metrics", "payload")
+
+    def __init__(self, app, path: str, metrics: Metrics):
+        self.app = app
+        self.path = path
+        self.metrics = metrics
+        self.payload = path in PAYLOAD_ROUTES
+
+    async def __call__(self, scope, receive, send):
+        metrics = self.metrics
+        if not metrics.enabled or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        path = self.path
+        scope["metrics_route"] = path
+        in_flight = metrics.in_flight
+        in_flight[path] = in_flight.get(path, 0) + 1
+
+        size = 0
+        if self.payload:
+            async def counting_receive():
+                nonlocal size
+                message = await receive()
+                size += len(message.get("body", b""))
+                return message
+        else:
+            counting_receive = receive
+        try:
+            await self.app(scope, counting_receive, send)
+        finally:
+            in_flight[path] -= 1
+            if self.payload:
+                metrics.observe_payload(path, size)
+
+
+class MetricsMiddleware:
+    """Outermost ASGI middleware timing every HTTP request"""
+
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        metrics = self.metrics
+        if not metrics.enabled or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        if not metrics._instrumented:
+            metrics.instrument(scope["app"])
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.in_flight_total += 1
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            metrics.in_flight_total -= 1
+            metrics.observe_request(
+                scope["method"],
+                scope.get("metrics_route", UNMATCHED_ROUTE),
+                status,
+                time.perf_counter() - start,
+            )
+
+
+metrics = Metrics()
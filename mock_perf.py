@@ -0,0 +1,689 @@
+"""
+Load-test runs for the performance report
+
+A run collects raw samples (one per request: endpoint, status, latency) sent
+as CSV or NDJSON, e.g. the file load_test.py --samples-out writes. The report
+page reads per-endpoint request counts, pass rates, averages and latency
+percentiles from it, and exports them, optionally with every sample, as JSON
+or CSV.
+
+Samples are kept column by column in typed arrays, 13 bytes each, instead of
+one dict per sample: endpoint id (uint16), latency in microseconds (uint32),
+status (uint16), pass flag (one byte) and milliseconds since the run started
+(uint32). Latency percentiles come from a log-linear histogram per endpoint
+(the HDR histogram layout: 256 sub-buckets per power of two, so any
+percentile is within 1% of the exact value), updated as samples arrive. A
+report therefore costs the same for 100 samples or 10 million.
+
+Each endpoint's histogram is 4096 uint64 counts (32 KB), as much memory as
+about 2500 samples. Runs live in memory, per process, so the perf endpoints
+refuse to serve with the shared state backend (several workers). The oldest
+runs are dropped once samples and histograms together take more than
+MOCK_PERF_MAX_SAMPLES samples would. MOCK_PERF_MAX_RUNS caps the number of
+runs.
+"""
+
+import codecs
+import csv
+import io
+import itertools
+import json
+import operator
+import os
+import secrets
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Iterator, Optional
+
+from mock_responses import dumps, orjson
+
+
+MAX_RUNS = int(os.environ.get("MOCK_PERF_MAX_RUNS", 50))
+MAX_SAMPLES = int(os.environ.get("MOCK_PERF_MAX_SAMPLES", 20_000_000))
+MAX_ENDPOINTS = 1000
+DEFAULT_SLO_MS = 1000.0
+
+# Histogram layout: values below 2**SUB_BITS get a bucket each, every power of
+# two above that is split into 2**(SUB_BITS - 1) buckets
+SUB_BITS = 8
+HALF_BITS = SUB_BITS - 1
+# Buckets per endpoint, rounded up to a power of two; uint32 microseconds need 3328
+BUCKETS = 4096
+BUCKET_SHIFT = 12
+# Bytes per stored sample, across the five sample columns
+SAMPLE_BYTES = 13
+
+COLUMNS = ("timestamp", "offset_ms", "name", "method", "endpoint", "status", "ok", "latency_ms")
+SAMPLE_COLUMNS = ("offset_ms", "name", "method", "endpoint", "status", "ok", "latency_ms")
+PERCENTILES = (50, 90, 95, 99)
+# Lines parsed and stored together while a body streams in
+INGEST_LINES = 20_000
+# Samples per exported chunk
+EXPORT_ROWS = 8192
+
+_TRUE = frozenset(("1", "true", "yes", "pass", "ok"))
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+class SampleError(ValueError):
+    """Raised for samples that cannot be stored"""
+
+
+class RunFull(SampleError):
+    """Raised when a batch would take the store over MOCK_PERF_MAX_SAMPLES"""
+
+
+def bucket_index(value: int) -> int:
+    if value < 1 << SUB_BITS:
+        return value
+    exponent = value.bit_length() - SUB_BITS
+    return (exponent << HALF_BITS) + (value >> exponent)
+
+
+def bucket_upper(index: int) -> int:
+    """Largest value that lands in bucket `index`"""
+    if index < 1 << SUB_BITS:
+        return index
+    exponent = (index >> HALF_BITS) - 1
+    mantissa = index - (exponent << HALF_BITS)
+    return ((mantissa + 1) << exponent) - 1
+
+
+def percentiles(counts, total: int, maximum: int) -> dict:
+    """Nearest-rank percentiles (PERCENTILES) of a bucket count list, in microseconds"""
+    result = {}
+    if not total:
+        return dict.fromkeys(PERCENTILES)
+    ranks = [(pct, max(1, -(-total * pct // 100))) for pct in PERCENTILES]
+    cumulative = 0
+    wanted = 0
+    for index, count in enumerate(counts):
+        if not count:
+            continue
+        cumulative += count
+        while wanted < len(ranks) and cumulative >= ranks[wanted][1]:
+            result[ranks[wanted][0]] = min(bucket_upper(index), maximum)
+            wanted += 1
+        if wanted == len(ranks):
+            break
+    return result
+
+
+def ms(microseconds: Optional[float]) -> Optional[float]:
+    return None if microseconds is None else round(microseconds / 1000, 3)
+
+
+def csv_line(values) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="").writerow(values)
+    return buffer.getvalue()
+
+
+def _ok_flag(value, status: int) -> int:
+    if value is None or value == "":
+        return 0 < status < 400
+    if isinstance(value, str):
+        return value.strip().lower() in _TRUE
+    return bool(value)
+
+
+class SampleBatch:
+    """Samples parsed into columns, not yet stored"""
+
+    __slots__ = ("methods", "endpoints", "names", "latencies", "statuses", "oks", "timestamps", "offsets")
+
+    def __init__(self, columns: dict):
+        """Convert raw columns (COLUMNS names to equal-length sequences); SampleError if any value is bad"""
+        endpoints = columns.get("endpoint")
+        latencies = columns.get("latency_ms")
+        if endpoints is None or latencies is None:
+            raise SampleError("Samples need endpoint and latency_ms columns")
+        size = len(endpoints)
+        try:
+            self.endpoints = list(map(str, endpoints))
+            methods = columns.get("method")
+            self.methods = list(map(str.upper, methods)) if methods is not None else ["GET"] * size
+            self.names = columns.get("name")
+            # Microseconds; negative or absurd latencies overflow the array type
+            self.latencies = array("I", map(round, map((1000.0).__mul__, map(float, latencies))))
+            statuses = columns.get("status")
+            self.statuses = array("H", map(int, statuses)) if statuses is not None else array("H", [200]) * size
+            oks = columns.get("ok")
+            self.oks = bytes(map(_ok_flag, oks, self.statuses)) if oks is not None else None
+            timestamps = columns.get("timestamp")
+            self.timestamps = list(map(float, timestamps)) if timestamps is not None else None
+            offsets = columns.get("offset_ms")
+            if offsets is not None:
+                try:
+                    self.offsets = array("I", map(int, offsets))
+                except ValueError:  # fractional milliseconds
+                    self.offsets = array("I", map(round, map(float, offsets)))
+            else:
+                self.offsets = None
+        except (TypeError, ValueError, OverflowError) as exc:
+            raise SampleError(f"Invalid sample value: {exc}")
+        if any(len(column) != size for column in (self.methods, self.latencies, self.statuses)):
+            raise SampleError("Sample columns differ in length")
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+
+def parse_rows(header: list, rows: list) -> tuple:
+    """(SampleBatch or None, rejected count) of CSV rows; bad rows are skipped"""
+    if not rows:
+        return None, 0
+    try:
+        if any(len(row) != len(header) for row in rows):
+            raise SampleError("Row length differs from the header")
+        return SampleBatch(dict(zip(header, zip(*rows)))), 0
+    except SampleError:
+        # One bad row: parse them one by one and keep the good ones
+        good = []
+        for row in rows:
+            if len(row) != len(header):
+                continue
+            try:
+                SampleBatch(dict(zip(header, ([value] for value in row))))
+            except SampleError:
+                continue
+            good.append(row)
+        if not good:
+            return None, len(rows)
+        return SampleBatch(dict(zip(header, zip(*good)))), len(rows) - len(good)
+
+
+def parse_csv_header(line: str) -> list:
+    header = [name.strip().lower() for name in next(csv.reader([line]))]
+    unknown = [name for name in header if name not in COLUMNS]
+    if unknown:
+        raise SampleError(f"Unknown sample column(s) {', '.join(unknown)}; expected {', '.join(COLUMNS)}")
+    if "endpoint" not in header or "latency_ms" not in header:
+        raise SampleError("The CSV header needs endpoint and latency_ms columns")
+    return header
+
+
+def parse_csv_lines(header: list, lines: list) -> tuple:
+    """(SampleBatch or None, rejected count) of CSV lines under `header`"""
+    lines = list(filter(None, map(str.rstrip, lines)))
+    if not lines:
+        return None, 0
+    width = len(header)
+    text = ",".join(lines)
+    # Without quotes and with the same number of fields on every line, one split
+    # yields every field and each column is a slice; no list per row
+    if '"' not in text and set(map(str.count, lines, itertools.repeat(","))) == {width - 1}:
+        fields = text.split(",")
+        try:
+            return SampleBatch({name: fields[index::width] for index, name in enumerate(header)}), 0
+        except SampleError:
+            pass
+    return parse_rows(header, list(csv.reader(lines)))
+
+
+def parse_ndjson_lines(lines: list) -> tuple:
+    """(SampleBatch or None, rejected count) of NDJSON lines, one sample object each"""
+    samples = []
+    rejected = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            sample = _loads(line)
+        except ValueError:
+            rejected += 1
+            continue
+        if isinstance(sample, dict):
+            samples.append(sample)
+        else:
+            rejected += 1
+    if not samples:
+        return None, rejected
+    present = [name for name in COLUMNS if any(name in sample for sample in samples)]
+    rows = [[sample.get(name) for name in present] for sample in samples]
+    # Fill what a sample left out the way an absent column would be
+    defaults = {"method": "GET", "status": 200, "name": "", "ok": None}
+    for column, name in enumerate(present):
+        if name in defaults:
+            for row in rows:
+                if row[column] is None:
+                    row[column] = defaults[name]
+    batch, bad = parse_rows(present, rows)
+    return batch, rejected + bad
+
+
+class SampleReader:
+    """Splits a streamed CSV or NDJSON body into batches of whole lines"""
+
+    def __init__(self, ndjson: bool):
+        self.ndjson = ndjson
+        self.header = None  # CSV column names, from the first line
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial = ""
+        self._lines = []
+
+    def feed(self, data: bytes) -> Optional[list]:
+        """Lines to parse once INGEST_LINES have arrived, else None"""
+        lines = (self._partial + self._decoder.decode(data)).split("\n")
+        self._partial = lines.pop()
+        self._lines.extend(lines)
+        if len(self._lines) < INGEST_LINES:
+            return None
+        lines, self._lines = self._lines, []
+        return lines
+
+    def finish(self) -> list:
+        tail = self._partial + self._decoder.decode(b"", True)
+        lines, self._lines, self._partial = self._lines, [], ""
+        if tail:
+            lines.append(tail)
+        return lines
+
+    def parse(self, lines: list) -> tuple:
+        """(SampleBatch or None, rejected count); SampleError for a bad CSV header"""
+        if self.ndjson:
+            return parse_ndjson_lines(lines)
+        if self.header is None:
+            while lines and not lines[0].strip():
+                lines = lines[1:]
+            if not lines:
+                return None, 0
+            self.header = parse_csv_header(lines[0])
+            lines = lines[1:]
+        return parse_csv_lines(self.header, lines)
+
+
+class Endpoint:
+    __slots__ = ("method", "path", "name")
+
+    def __init__(self, method: str, path: str, name: Optional[str]):
+        self.method = method
+        self.path = path
+        self.name = name or f"{method} {path}"
+
+
+class PerfRun:
+    """One load-test run: sample columns plus per-endpoint aggregates"""
+
+    def __init__(self, run_id: str, name: str, test_type: Optional[str] = None, max_users: Optional[int] = None,
+                 slo_ms: float = DEFAULT_SLO_MS, user_id: Optional[str] = None, project_id: Optional[str] = None):
+        self.run_id = run_id
+        self.name = name
+        self.test_type = test_type
+        self.max_users = max_users
+        self.slo_ms = slo_ms
+        self.user_id = user_id
+        self.project_id = project_id
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None  # epoch seconds that offset 0 stands for
+        self.duration_ms = 0
+        self.rejected = 0
+
+        self.endpoints = []  # Endpoint by id
+        self._endpoint_ids = {}  # "METHOD path" -> id
+        # Sample columns, one entry per sample
+        self.endpoint_ids = array("H")
+        self.latencies = array("I")
+        self.statuses = array("H")
+        self.oks = bytearray()
+        self.offsets = array("I")
+        # Aggregates, updated per batch
+        self.bucket_counts = array("Q")  # BUCKETS counts per endpoint, back to back
+        self.requests = []
+        self.failed = []
+        self.latency_sum = []
+        self.latency_max = []
+        self.status_counts = []  # Counter of status -> samples, per endpoint
+        # Held while a batch is added, so reports never see half of one
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def nbytes(self) -> int:
+        columns = (self.endpoint_ids, self.latencies, self.statuses, self.offsets, self.bucket_counts)
+        return sum(column.itemsize * len(column) for column in columns) + len(self.oks)
+
+    def endpoint_keys(self, batch: SampleBatch) -> list:
+        """The "METHOD path" of each sample in a batch"""
+        # Strings rather than tuples: a list of tuples would keep the garbage collector busy
+        return list(map("{} {}".format, batch.methods, batch.endpoints))
+
+    def growth(self, batch: SampleBatch, keys: list) -> int:
+        """Bytes adding the batch would take: its samples plus histograms of new endpoints"""
+        new_endpoints = len(set(keys).difference(self._endpoint_ids))
+        return len(batch) * SAMPLE_BYTES + new_endpoints * BUCKETS * self.bucket_counts.itemsize
+
+    def _add_endpoint(self, key: str, method: str, path: str, name: Optional[str]):
+        self._endpoint_ids[key] = len(self.endpoints)
+        self.endpoints.append(Endpoint(method, path, name))
+        self.bucket_counts.extend(array("Q", [0]) * BUCKETS)
+        self.requests.append(0)
+        self.failed.append(0)
+        self.latency_sum.append(0)
+        self.latency_max.append(0)
+        self.status_counts.append(Counter())
+
+    def add(self, batch: SampleBatch, keys: Optional[list] = None):
+        """Store a batch and fold it into the aggregates; `keys` as endpoint_keys() returns them"""
+        size = len(batch)
+        if batch.offsets is not None:
+            offsets = batch.offsets
+        else:
+            if batch.timestamps is not None:
+                start = min(batch.timestamps) if self.started_at is None else self.started_at
+                stamps = batch.timestamps
+            else:
+                now = time.time()
+                start = now if self.started_at is None else self.started_at
+                stamps = itertools.repeat(now, size)
+            try:
+                # Samples from before the first batch are clamped to the start
+                offsets = array("I", (round((stamp - start) * 1000) if stamp > start else 0 for stamp in stamps))
+            except OverflowError:
+                raise SampleError("Sample timestamps span more than 49 days")
+            self.started_at = start
+
+        if keys is None:
+            keys = self.endpoint_keys(batch)
+        new_keys = set(keys).difference(self._endpoint_ids)
+        if len(self.endpoints) + len(new_keys) > MAX_ENDPOINTS:
+            raise SampleError(f"A run can have at most {MAX_ENDPOINTS} endpoints")
+        if new_keys:
+            names = batch.names if batch.names is not None else itertools.repeat(None)
+            found = dict(zip(keys, zip(batch.methods, batch.endpoints, names)))
+            for key in sorted(new_keys):
+                self._add_endpoint(key, *found[key])
+        endpoint_ids = array("H", map(self._endpoint_ids.__getitem__, keys))
+        if offsets:
+            self.duration_ms = max(self.duration_ms, max(offsets))
+
+        statuses = batch.statuses
+        oks = batch.oks
+        if oks is None:
+            if 0 < min(statuses) and max(statuses) < 400:
+                oks = b"\x01" * size
+            else:
+                oks = bytes(0 < status < 400 for status in statuses)
+
+        latencies = batch.latencies
+        counts = self.bucket_counts
+        latency_sum = self.latency_sum
+        latency_max = self.latency_max
+        # The hot loop: bucket_index() inlined
+        for endpoint_id, value in zip(endpoint_ids, latencies):
+            if value < 256:
+                counts[(endpoint_id << BUCKET_SHIFT) | value] += 1
+            else:
+                exponent = value.bit_length() - SUB_BITS
+                counts[(endpoint_id << BUCKET_SHIFT) | ((exponent << HALF_BITS) + (value >> exponent))] += 1
+            latency_sum[endpoint_id] += value
+            if value > latency_max[endpoint_id]:
+                latency_max[endpoint_id] = value
+
+        for endpoint_id, count in Counter(endpoint_ids).items():
+            self.requests[endpoint_id] += count
+        if oks.count(0):
+            for endpoint_id, count in Counter(itertools.compress(endpoint_ids, map(operator.not_, oks))).items():
+                self.failed[endpoint_id] += count
+        status_counts = self.status_counts
+        for (endpoint_id, status), count in Counter(zip(endpoint_ids, statuses)).items():
+            status_counts[endpoint_id][status] += count
+
+        self.endpoint_ids.extend(endpoint_ids)
+        self.latencies.extend(latencies)
+        self.statuses.extend(statuses)
+        self.oks.extend(oks)
+        self.offsets.extend(offsets)
+
+    def endpoint_counts(self, endpoint_id: int) -> list:
+        start = endpoint_id << BUCKET_SHIFT
+        return self.bucket_counts[start:start + BUCKETS]
+
+    def status_label(self, p95_ms: Optional[float], error_rate: float) -> str:
+        """Pass within the SLO, Fair within twice it, else Fail"""
+        if p95_ms is None:
+            return "No data"
+        if p95_ms <= self.slo_ms and error_rate <= 0.01:
+            return "Pass"
+        if p95_ms <= 2 * self.slo_ms and error_rate <= 0.05:
+            return "Fair"
+        return "Fail"
+
+    def endpoint_report(self, endpoint_id: int) -> dict:
+        endpoint = self.endpoints[endpoint_id]
+        requests = self.requests[endpoint_id]
+        failed = self.failed[endpoint_id]
+        maximum = self.latency_max[endpoint_id]
+        values = percentiles(self.endpoint_counts(endpoint_id), requests, maximum)
+        error_rate = failed / requests if requests else 0.0
+        p95_ms = ms(values[95])
+        return {
+            "api_name": endpoint.name,
+            "method": endpoint.method,
+            "endpoint": endpoint.path,
+            "requests": requests,
+            "failed": failed,
+            "pass_rate": round(1 - error_rate, 4) if requests else None,
+            "avg_ms": ms(self.latency_sum[endpoint_id] / requests) if requests else None,
+            **{f"p{pct}_ms": ms(values[pct]) for pct in PERCENTILES},
+            "max_ms": ms(maximum) if requests else None,
+            "statuses": {str(status): count for status, count in sorted(self.status_counts[endpoint_id].items())},
+            "status": self.status_label(p95_ms, error_rate),
+        }
+
+    def summary(self) -> dict:
+        """Run totals; the per-endpoint rows come from endpoint_report()"""
+        total = len(self)
+        failed = sum(self.failed)
+        merged = [sum(counts) for counts in zip(*(self.endpoint_counts(i) for i in range(len(self.endpoints))))]
+        maximum = max(self.latency_max, default=0)
+        values = percentiles(merged, total, maximum)
+        duration_s = self.duration_ms / 1000
+        return {
+            "run_id": self.run_id,
+            "name": self.name,
+            "test_type": self.test_type,
+            "user_id": self.user_id,
+            "project_id": self.project_id,
+            "created_at": self.created_at,
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat() if self.started_at else None,
+            "duration_s": duration_s,
+            "max_users": self.max_users,
+            "slo_ms": self.slo_ms,
+            "total_requests": total,
+            "failed_requests": failed,
+            "pass_rate": round(1 - failed / total, 4) if total else None,
+            "throughput_rps": round(total / duration_s, 2) if duration_s else None,
+            "avg_response_ms": ms(sum(self.latency_sum) / total) if total else None,
+            "latency_ms": {**{f"p{pct}": ms(values[pct]) for pct in PERCENTILES}, "max": ms(maximum) if total else None},
+            "endpoint_count": len(self.endpoints),
+            "rejected_samples": self.rejected,
+        }
+
+    def listing(self) -> dict:
+        return {
+            "run_id": self.run_id,
+            "name": self.name,
+            "test_type": self.test_type,
+            "project_id": self.project_id,
+            "created_at": self.created_at,
+            "samples": len(self),
+            "endpoints": len(self.endpoints),
+        }
+
+    def report_chunks(self) -> Iterator[bytes]:
+        """The report as JSON: run totals, then one endpoint row at a time"""
+        with self.lock:
+            summary = dumps(self.summary())
+            endpoint_count = len(self.endpoints)
+        yield summary[:-1] + b',"endpoints":['
+        for endpoint_id in range(endpoint_count):
+            with self.lock:
+                row = dumps(self.endpoint_report(endpoint_id))
+            yield (b"," if endpoint_id else b"") + row
+        yield b"]}"
+
+    def _sample_rows(self) -> Iterator[tuple]:
+        """Chunks of sample columns, up to the length when the export began"""
+        size = len(self)
+        for start in range(0, size, EXPORT_ROWS):
+            stop = min(start + EXPORT_ROWS, size)
+            yield (
+                self.offsets[start:stop],
+                self.endpoint_ids[start:stop],
+                self.statuses[start:stop],
+                self.oks[start:stop],
+                self.latencies[start:stop],
+            )
+
+    def json_export(self, samples: bool = False) -> Iterator[bytes]:
+        yield b'{"report":'
+        yield from self.report_chunks()
+        if samples:
+            names = [(endpoint.name, endpoint.method, endpoint.path) for endpoint in self.endpoints]
+            yield b',"samples":{"columns":' + dumps(SAMPLE_COLUMNS) + b',"rows":['
+            first = True
+            for offsets, endpoint_ids, statuses, oks, latencies in self._sample_rows():
+                rows = [
+                    (offset, *names[endpoint_id], status, bool(ok), latency / 1000)
+                    for offset, endpoint_id, status, ok, latency in zip(offsets, endpoint_ids, statuses, oks, latencies)
+                ]
+                yield (b"" if first else b",") + dumps(rows)[1:-1]
+                first = False
+            yield b"]}"
+        yield b"}"
+
+    def csv_export(self, samples: bool = False) -> Iterator[bytes]:
+        """Endpoint rows as CSV, or every sample (in the format samples are sent in)"""
+        if not samples:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator="\n")
+            writer.writerow([
+                "API Name", "Method", "Endpoint", "Requests", "Failed", "Pass Rate", "Avg Response Time (ms)",
+                *(f"p{pct} (ms)" for pct in PERCENTILES), "Max (ms)", "Status",
+            ])
+            for endpoint_id in range(len(self.endpoints)):
+                with self.lock:
+                    row = self.endpoint_report(endpoint_id)
+                writer.writerow([
+                    row["api_name"], row["method"], row["endpoint"], row["requests"], row["failed"], row["pass_rate"],
+                    row["avg_ms"], *(row[f"p{pct}_ms"] for pct in PERCENTILES), row["max_ms"], row["status"],
+                ])
+            yield buffer.getvalue().encode("utf-8")
+            return
+
+        # The quoted "name,method,endpoint" of each endpoint, written once
+        prefixes = [csv_line((endpoint.name, endpoint.method, endpoint.path)) for endpoint in self.endpoints]
+        yield (csv_line(SAMPLE_COLUMNS) + "\n").encode("utf-8")
+        for offsets, endpoint_ids, statuses, oks, latencies in self._sample_rows():
+            lines = [
+                f"{offset},{prefixes[endpoint_id]},{status},{ok},{latency / 1000}\n"
+                for offset, endpoint_id, status, ok, latency in zip(offsets, endpoint_ids, statuses, oks, latencies)
+            ]
+            yield "".join(lines).encode("utf-8")
+
+
+class PerfStore:
+    """Runs by id, oldest first, bounded by run count and the memory max_samples samples take"""
+
+    def __init__(self, max_runs: int = MAX_RUNS, max_samples: int = MAX_SAMPLES):
+        self.max_runs = max_runs
+        self.max_samples = max_samples
+        self.max_bytes = max_samples * SAMPLE_BYTES
+        self._runs = OrderedDict()
+        self._lock = threading.Lock()  # batches are stored from worker threads
+        self.total_samples = 0
+        self.total_bytes = 0  # samples and histograms of every run
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._runs)
+
+    def create(self, **metadata) -> PerfRun:
+        run = PerfRun(f"run_{secrets.token_hex(8)}", **metadata)
+        with self._lock:
+            self._runs[run.run_id] = run
+            while len(self._runs) > self.max_runs:
+                self._evict()
+        return run
+
+    def get(self, run_id: str) -> Optional[PerfRun]:
+        return self._runs.get(run_id)
+
+    def delete(self, run_id: str) -> bool:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+            if run is None:
+                return False
+            self.total_samples -= len(run)
+            self.total_bytes -= run.nbytes
+            return True
+
+    def runs(self, user_id: Optional[str] = None, project_id: Optional[str] = None) -> list:
+        """A user's runs, newest first, optionally of one project"""
+        with self._lock:
+            runs = list(self._runs.values())
+        return [
+            run for run in reversed(runs)
+            if run.user_id == user_id and (project_id is None or run.project_id == project_id)
+        ]
+
+    def _evict(self):
+        _, run = self._runs.popitem(last=False)
+        self.total_samples -= len(run)
+        self.total_bytes -= run.nbytes
+        self.evicted += 1
+
+    def add(self, run: PerfRun, batch: SampleBatch):
+        """Store a batch in a run, dropping the oldest other runs to make room"""
+        keys = run.endpoint_keys(batch)
+        with self._lock:
+            growth = run.growth(batch, keys)
+            if run.nbytes + growth > self.max_bytes:
+                raise RunFull(
+                    f"A run can hold at most {self.max_samples} samples' worth of memory "
+                    f"({SAMPLE_BYTES} bytes a sample, {BUCKETS * 8 // 1024} KB an endpoint)"
+                )
+            if run.run_id not in self._runs:
+                raise SampleError("Run was deleted")
+            # The run being written is the last to go
+            self._runs.move_to_end(run.run_id)
+            while self.total_bytes + growth > self.max_bytes:
+                self._evict()
+            before = run.nbytes
+            with run.lock:
+                run.add(batch, keys)
+            self.total_samples += len(batch)
+            self.total_bytes += run.nbytes - before
+
+    def ingest(self, run: PerfRun, reader: SampleReader, lines: list) -> tuple:
+        """Parse and store lines of a sample body; (accepted, rejected)"""
+        batch, rejected = reader.parse(lines)
+        run.rejected += rejected
+        if batch is None:
+            return 0, rejected
+        self.add(run, batch)
+        return len(batch), rejected
+
+    def stats(self) -> dict:
+        with self._lock:
+            runs = len(self._runs)
+            samples = self.total_samples
+            nbytes = self.total_bytes
+        return {
+            "runs": runs,
+            "max_runs": self.max_runs,
+            "samples": samples,
+            "max_samples": self.max_samples,
+            "bytes": nbytes,
+            "max_bytes": self.max_bytes,
+            "evicted_runs": self.evicted,
+        }
+
+
+perf_runs = PerfStore()
@@ -0,0 +1,373 @@
+"""
+Incremental PRD text analysis
+
+PRDAnalyzer consumes the document in chunks and computes word count,
+character count and keyword matches in a single pass, so a large PRD can be
+analyzed while it streams in without ever holding the full text.
+
+Keywords come from a vocabulary of section -> terms (fixtures/prd_keywords.json
+by default, or the file named by MOCK_PRD_KEYWORDS). All terms are compiled
+into one trie-shaped regular expression, so a single scan finds every term;
+the cost does not grow with the number of terms the way one scan per term does.
+Chunks are lowercased once as they arrive and matched case-sensitively, which
+is several times faster than re.IGNORECASE.
+
+Results for uploaded text are cached by a hash of the normalized text
+(prd_cache), so re-uploading an unchanged PRD skips the analysis. Large
+documents are split into segments and analyzed in the job process pool.
+"""
+
+import asyncio
+import codecs
+import hashlib
+import json
+import os
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from mock_cache import LRUCache
+from mock_jobs import get_process_pool
+
+
+# Text is fed to the analyzer in slices of this many characters
+CHUNK_SIZE = 64 * 1024
+
+# Streamed PRDs longer than this are analyzed but their text is not stored
+MAX_STORED_TEXT_CHARS = int(os.environ.get("MOCK_PRD_STORE_LIMIT", 1024 * 1024))
+
+DEFAULT_VOCABULARY_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "fixtures", "prd_keywords.json"
+)
+
+# analysis flag -> keyword searched for (case-insensitive)
+KEYWORDS = {
+    "contains_features": "feature",
+    "contains_requirements": "requirement",
+    "contains_goals": "goal",
+}
+
+# Offsets kept per term; counts are always exact
+MAX_OFFSETS_PER_TERM = 20
+
+# Terms listed per extracted section, most frequent first
+MAX_SECTION_TERMS = 10
+
+# Documents up to this size are analyzed in a thread instead of the process pool
+INLINE_ANALYSIS_LIMIT = 256 * 1024
+
+# Target size of the segments a large document is split into for the pool
+SEGMENT_SIZE = 1024 * 1024
+
+# Two whitespace characters in a row never occur inside a term match
+_SEGMENT_BREAK = re.compile(r"\s\s")
+
+
+def normalize_term(term: str) -> str:
+    return " ".join(term.lower().split())
+
+
+def lower_same_length(text: str) -> str:
+    """Lowercase text without changing its length, so offsets stay valid"""
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # U+0130 is the only character whose lowercase form is two characters
+        lowered = text.replace("\u0130", "I").lower()
+    return lowered
+
+
+def _trie_pattern(node: dict) -> str:
+    """Render a character trie as a regex; shared prefixes are matched once"""
+    branches = []
+    for char in sorted(key for key in node if key):
+        piece = r"\s" if char == " " else re.escape(char)
+        branches.append(piece + _trie_pattern(node[char]))
+    if not branches:
+        return ""
+    terminal = "" in node
+    if len(branches) == 1 and not terminal:
+        return branches[0]
+    group = "(?:" + "|".join(branches) + ")"
+    # Greedy '?' tries the longer terms first and backtracks to this one
+    return group + "?" if terminal else group
+
+
+def compile_terms(terms: Iterable[str]) -> "re.Pattern":
+    """Compile lowercase terms into one pattern for lowercased text"""
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    # The lookahead lets the engine skip positions that cannot start a term
+    first_chars = "".join(re.escape(char) for char in sorted(trie))
+    # Whole words only, allowing a plural suffix
+    return re.compile(r"(?=[" + first_chars + r"])\b(" + _trie_pattern(trie) + r")(?:e?s)?\b")
+
+
+class KeywordMatcher:
+    """Compiled matcher for a vocabulary of section -> terms"""
+
+    def __init__(self, vocabulary: Dict[str, List[str]], extra_terms: Iterable[str] = ()):
+        self.vocabulary = vocabulary
+        self.sections = {}
+        for section, terms in vocabulary.items():
+            for term in terms:
+                self.sections.setdefault(normalize_term(term), []).append(section)
+        for term in extra_terms:
+            self.sections.setdefault(normalize_term(term), [])
+        self.pattern = compile_terms(self.sections)
+        # Identifies the vocabulary in cache keys
+        self.fingerprint = hashlib.blake2b(self.pattern.pattern.encode("utf-8"), digest_size=8).hexdigest()
+        # Longest possible match plus plural suffix and one char for the
+        # trailing word-boundary check
+        self.holdback = max(len(term) for term in self.sections) + 3
+
+    def group_by_section(self, counts: Dict[str, int], limit: int = MAX_SECTION_TERMS) -> Dict[str, List[str]]:
+        """Matched terms per vocabulary section, most frequent first"""
+        result = {section: [] for section in self.vocabulary}
+        for term, _ in sorted(counts.items(), key=lambda item: (-item[1], item[0])):
+            for section in self.sections.get(term, ()):
+                if len(result[section]) < limit:
+                    result[section].append(term)
+        return result
+
+    def scan(self) -> "KeywordScan":
+        """Start an incremental scan"""
+        return KeywordScan(self)
+
+    def match(self, text: str) -> "KeywordScan":
+        """Scan a complete text in one call"""
+        scan = KeywordScan(self)
+        scan.feed(text)
+        scan.finish()
+        return scan
+
+
+class KeywordScan:
+    """Match counts and offsets accumulated over a stream of chunks
+
+    Matches starting in the last `holdback` characters of the buffer are
+    deferred to the next chunk, so a term split across chunks is matched
+    exactly once and the buffer never grows beyond one chunk plus holdback.
+    """
+
+    def __init__(self, matcher: KeywordMatcher):
+        self._matcher = matcher
+        self._buffer = ""
+        self._buffer_offset = 0  # absolute offset of _buffer[0]
+        self._resume = 0  # position in _buffer where the next scan starts
+        self._finished = False
+        self.counts: Dict[str, int] = {}
+        self.offsets: Dict[str, List[int]] = {}
+
+    def feed(self, chunk: str):
+        if chunk:
+            self._buffer += lower_same_length(chunk)
+            self._scan(final=False)
+
+    def finish(self):
+        if not self._finished:
+            self._scan(final=True)
+            self._finished = True
+
+    def _scan(self, final: bool):
+        buffer = self._buffer
+        limit = len(buffer) if final else len(buffer) - self._matcher.holdback
+        position = self._resume
+        if limit > position:
+            counts = self.counts
+            offsets = self.offsets
+            sections = self._matcher.sections
+            base = self._buffer_offset
+            for match in self._matcher.pattern.finditer(buffer, position):
+                if match.start() >= limit:
+                    break
+                term = match.group(1)
+                if term not in sections:
+                    # Multi-word term split by a newline or tab
+                    term = normalize_term(term)
+                counts[term] = counts.get(term, 0) + 1
+                term_offsets = offsets.setdefault(term, [])
+                if len(term_offsets) < MAX_OFFSETS_PER_TERM:
+                    term_offsets.append(base + match.start())
+                position = match.end()
+        resume = max(position, limit)
+        # Keep one character before the resume point for the \b check
+        keep_from = max(0, resume - 1)
+        self._buffer = buffer[keep_from:]
+        self._buffer_offset += keep_from
+        self._resume = resume - keep_from
+
+    def sections(self, limit: int = MAX_SECTION_TERMS) -> Dict[str, List[str]]:
+        return self._matcher.group_by_section(self.counts, limit)
+
+
+def load_vocabulary(path: Optional[str] = None) -> Dict[str, List[str]]:
+    """Load a section -> terms vocabulary from a JSON file"""
+    path = path or os.environ.get("MOCK_PRD_KEYWORDS", DEFAULT_VOCABULARY_PATH)
+    with open(path, encoding="utf-8") as handle:
+        vocabulary = json.load(handle)
+    return {section: [str(term) for term in terms] for section, terms in vocabulary.items()}
+
+
+_default_matcher = None
+
+
+def get_matcher() -> KeywordMatcher:
+    """The shared matcher for the configured vocabulary, compiled on first use"""
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = KeywordMatcher(load_vocabulary(), extra_terms=KEYWORDS.values())
+    return _default_matcher
+
+
+def set_vocabulary(vocabulary: Dict[str, List[str]]):
+    """Replace the shared matcher's vocabulary"""
+    global _default_matcher
+    _default_matcher = KeywordMatcher(vocabulary, extra_terms=KEYWORDS.values())
+
+
+class PRDAnalyzer:
+    """Single-pass analysis over a stream of text chunks"""
+
+    def __init__(self, matcher: Optional[KeywordMatcher] = None):
+        self.char_count = 0
+        self.word_count = 0
+        self._in_word = False
+        self.keywords = (matcher or get_matcher()).scan()
+
+    def feed(self, chunk: str):
+        if not chunk:
+            return
+        self.char_count += len(chunk)
+
+        words = len(chunk.split())
+        # A word running across the chunk boundary was counted twice
+        if words and self._in_word and not chunk[0].isspace():
+            words -= 1
+        self.word_count += words
+        self._in_word = not chunk[-1].isspace()
+
+        self.keywords.feed(chunk)
+
+    @property
+    def is_empty(self) -> bool:
+        """True when the text was empty or whitespace only"""
+        return self.word_count == 0
+
+    def summary(self) -> dict:
+        """Everything derived from the text except its exact length"""
+        self.keywords.finish()
+        return summarize(self.word_count, self.keywords.counts)
+
+
+def summarize(word_count: int, counts: Dict[str, int], matcher: Optional[KeywordMatcher] = None) -> dict:
+    """Build the word count, analysis and extracted sections from raw counts"""
+    analysis = {flag: keyword in counts for flag, keyword in KEYWORDS.items()}
+    analysis["estimated_complexity"] = "medium" if word_count > 100 else "low"
+    analysis["keyword_counts"] = dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+    return {
+        "word_count": word_count,
+        "analysis": analysis,
+        "extracted_sections": (matcher or get_matcher()).group_by_section(counts),
+    }
+
+
+def utf8_decoder():
+    """Incremental UTF-8 decoder that tolerates characters split across chunks"""
+    return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
+def analyze_text(text: str) -> PRDAnalyzer:
+    """Analyze an in-memory PRD in fixed-size slices"""
+    analyzer = PRDAnalyzer()
+    for start in range(0, len(text), CHUNK_SIZE):
+        analyzer.feed(text[start:start + CHUNK_SIZE])
+    return analyzer
+
+
+prd_cache = LRUCache(
+    "prd_analysis",
+    max_entries=int(os.environ.get("MOCK_PRD_CACHE_ENTRIES", 1024)),
+    max_bytes=int(os.environ.get("MOCK_PRD_CACHE_BYTES", 64 * 1024 * 1024)),
+)
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for caching: unified line endings, no outer whitespace"""
+    return text.replace("\r\n", "\n").strip()
+
+
+def cache_key(normalized: str) -> str:
+    digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=20).hexdigest()
+    return f"{get_matcher().fingerprint}:{digest}"
+
+
+def _summary_size(summary: dict) -> int:
+    return len(json.dumps(summary))
+
+
+def split_segments(text: str, size: int = SEGMENT_SIZE) -> List[Tuple[int, int]]:
+    """Cut text into (start, end) ranges of roughly `size` characters
+
+    Cuts fall between two whitespace characters, so no word or keyword match
+    spans two segments and per-segment results simply add up.
+    """
+    bounds = []
+    start = 0
+    while len(text) - start > size:
+        found = _SEGMENT_BREAK.search(text, start + size)
+        if found is None:
+            break
+        cut = found.start() + 1
+        bounds.append((start, cut))
+        start = cut
+    bounds.append((start, len(text)))
+    return bounds
+
+
+def analyze_segment(text: str) -> Tuple[int, Dict[str, int]]:
+    """Word count and keyword counts of one segment (runs in a pool process)"""
+    analyzer = analyze_text(text)
+    analyzer.keywords.finish()
+    return analyzer.word_count, analyzer.keywords.counts
+
+
+async def analyze_in_pool(normalized: str, on_progress: Optional[Callable[[int, int], None]] = None) -> dict:
+    """Summary of a PRD, using the process pool for large documents"""
+    if len(normalized) <= INLINE_ANALYSIS_LIMIT:
+        summary = await asyncio.to_thread(lambda: analyze_text(normalized).summary())
+        if on_progress:
+            on_progress(1, 1)
+        return summary
+
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    segments = split_segments(normalized)
+    pending = [loop.run_in_executor(pool, analyze_segment, normalized[start:end]) for start, end in segments]
+
+    word_count = 0
+    counts = {}
+    try:
+        for done, finished in enumerate(asyncio.as_completed(pending), start=1):
+            segment_words, segment_counts = await finished
+            word_count += segment_words
+            for term, count in segment_counts.items():
+                counts[term] = counts.get(term, 0) + count
+            if on_progress:
+                on_progress(done, len(segments))
+    except BaseException:
+        for future in pending:
+            future.cancel()
+        raise
+    return summarize(word_count, counts)
+
+
+async def analyze_cached(normalized: str, on_progress: Optional[Callable[[int, int], None]] = None) -> dict:
+    """Summary of a normalized PRD, computed off the event loop at most once"""
+    return await prd_cache.get_or_compute(
+        cache_key(normalized),
+        lambda: analyze_in_pool(normalized, on_progress),
+        _summary_size,
+    )
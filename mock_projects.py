@@ -0,0 +1,288 @@
+"""
+Project listing with keyset pagination and substring search
+
+Each user's projects are held in a ProjectIndex, loaded from storage on first
+use and then updated in place on every create, rename and delete:
+
+- Projects are numbered in creation order (seq). Lists run newest first, and
+  a page cursor is the seq of the last project on the previous page, so
+  fetching any page is a binary search plus a slice however deep it is.
+- Every lowercased name is split into trigrams, and each trigram keeps an
+  ascending list of the seqs whose names contain it. A substring search walks
+  the shortest posting list of the query's trigrams from the cursor downwards
+  and keeps the names that really contain the query, stopping once the page
+  is full. Renames only add postings; stale ones fail that check.
+- Queries shorter than a trigram scan names newest first.
+"""
+
+import base64
+import binascii
+import bisect
+import secrets
+import threading
+from array import array
+from datetime import datetime, timezone
+from typing import Optional
+
+from mock_state import shared
+from mock_storage import storage
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# In-process change counts restart at zero; this tells one process's apart
+# from the last one's, so a restart never reuses a revision
+PROCESS_EPOCH = secrets.token_hex(8)
+
+# Sample projects every new user starts with
+SAMPLE_PROJECTS = [
+    {
+        "id": "proj_1",
+        "name": "E-commerce Platform",
+        "status": "in_progress",
+        "created_at": "2024-10-01T10:00:00Z"
+    },
+    {
+        "id": "proj_2",
+        "name": "Social Media App",
+        "status": "draft",
+        "created_at": "2024-10-05T15:30:00Z"
+    }
+]
+
+
+def trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def encode_cursor(seq: int) -> str:
+    return base64.urlsafe_b64encode(seq.to_bytes(8, "big")).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Seq from a cursor; ValueError if the cursor was not issued by us"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    except (binascii.Error, ValueError):
+        raise ValueError("invalid cursor")
+    if len(raw) != 8:
+        raise ValueError("invalid cursor")
+    return int.from_bytes(raw, "big")
+
+
+class ProjectIndex:
+    """One user's projects, ordered by creation, with a trigram name index"""
+
+    def __init__(self):
+        self._next_seq = 1
+        self._seqs = array("q")  # live seqs, ascending
+        self._projects = {}  # seq -> project dict
+        self._names = {}  # seq -> lowercased name
+        self._seq_of = {}  # project id -> seq
+        self._grams = {}  # trigram -> array of seqs, ascending, may hold stale seqs
+        self._lock = threading.Lock()
+        self.version = 0
+        self.shared_version = 0
+
+    def __len__(self) -> int:
+        return len(self._seqs)
+
+    def get(self, project_id: str) -> Optional[dict]:
+        seq = self._seq_of.get(project_id)
+        return None if seq is None else self._projects[seq]
+
+    def add(self, project: dict):
+        """Index a project as the newest one"""
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._seqs.append(seq)
+            self._projects[seq] = project
+            self._seq_of[project["id"]] = seq
+            self._index_name(seq, project["name"], previous="")
+            self.version += 1
+
+    def update(self, project: dict):
+        """Replace a project's fields, re-indexing its name if it changed"""
+        with self._lock:
+            seq = self._seq_of[project["id"]]
+            previous = self._names[seq]
+            self._projects[seq] = project
+            self._index_name(seq, project["name"], previous)
+            self.version += 1
+
+    def remove(self, project_id: str) -> Optional[dict]:
+        with self._lock:
+            seq = self._seq_of.pop(project_id, None)
+            if seq is None:
+                return None
+            del self._seqs[bisect.bisect_left(self._seqs, seq)]
+            del self._names[seq]
+            self.version += 1
+            return self._projects.pop(seq)
+
+    def _index_name(self, seq: int, name: str, previous: str):
+        lowered = name.lower()
+        self._names[seq] = lowered
+        if lowered == previous:
+            return
+        grams = self._grams
+        for gram in trigrams(lowered) - trigrams(previous):
+            postings = grams.get(gram)
+            if postings is None:
+                grams[gram] = array("q", (seq,))
+            elif postings[-1] < seq:
+                postings.append(seq)
+            else:
+                # Renamed project: insert in order unless a stale entry is still there
+                at = bisect.bisect_left(postings, seq)
+                if at == len(postings) or postings[at] != seq:
+                    postings.insert(at, seq)
+
+    def page(self, size: int, cursor: Optional[int] = None, search: Optional[str] = None, offset: int = 0):
+        """One page, newest first: (projects, seq of the last one or None, more follow)"""
+        query = (search or "").strip().lower()
+        with self._lock:
+            if query:
+                seqs, more = self._search(query, cursor, size, offset)
+            else:
+                end = len(self._seqs) if cursor is None else bisect.bisect_left(self._seqs, cursor)
+                stop = max(0, end - offset)
+                start = max(0, stop - size)
+                seqs = self._seqs[start:stop][::-1]
+                more = start > 0
+            projects = [self._projects[seq] for seq in seqs]
+        return projects, (seqs[-1] if seqs else None), more
+
+    def _search(self, query: str, cursor: Optional[int], size: int, offset: int):
+        if len(query) < 3:
+            candidates = self._seqs
+        else:
+            candidates = None
+            for gram in trigrams(query):
+                postings = self._grams.get(gram)
+                if postings is None:
+                    return [], False
+                if candidates is None or len(postings) < len(candidates):
+                    candidates = postings
+        position = len(candidates) if cursor is None else bisect.bisect_left(candidates, cursor)
+
+        names = self._names
+        found = []
+        skip = offset
+        previous = None
+        while position > 0:
+            position -= 1
+            seq = candidates[position]
+            if seq == previous:
+                continue
+            previous = seq
+            name = names.get(seq)
+            if name is None or query not in name:
+                continue
+            if skip:
+                skip -= 1
+                continue
+            if len(found) == size:
+                return found, True
+            found.append(seq)
+        return found, False
+
+
+class ProjectCatalog:
+    """Per-user project indexes, loaded from storage on first access
+
+    With a shared state backend every change also bumps a per-user counter
+    there. A worker whose index was built at an older count reloads it before
+    answering, so all workers list the same projects.
+    """
+
+    def __init__(self, store=storage, state=shared):
+        self.store = store
+        self.state = state
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def index(self, owner: Optional[str]) -> ProjectIndex:
+        owner = owner or ""
+        index = self._indexes.get(owner)
+        if self.state is None:
+            if index is not None:
+                return index
+        else:
+            current = self.state.version(f"projects:{owner}")
+            if index is not None and index.shared_version == current:
+                return index
+        with self._lock:
+            index = self._indexes.get(owner)
+            if index is None or (self.state is not None and index.shared_version != current):
+                index = self._load(owner)
+                if self.state is not None:
+                    index.shared_version = current
+                self._indexes[owner] = index
+        return index
+
+    def revision(self, index: ProjectIndex) -> str:
+        """Changes whenever the index contents change; the same across workers"""
+        if self.state is None:
+            return f"{PROCESS_EPOCH}.{index.version}"
+        return str(index.shared_version)
+
+    def _changed(self, owner: Optional[str], index: ProjectIndex):
+        if self.state is None:
+            return
+        version = self.state.bump(f"projects:{owner or ''}")
+        # Only skip the reload if nobody else changed the projects in between
+        if version == index.shared_version + 1:
+            index.shared_version = version
+
+    def _load(self, owner: str) -> ProjectIndex:
+        index = ProjectIndex()
+        saved = [data for _, data in self.store.items("projects", owner)]
+        if not saved:
+            for sample in SAMPLE_PROJECTS:
+                self.store.put("projects", owner, sample["id"], sample)
+            saved = [dict(sample) for sample in SAMPLE_PROJECTS]
+        saved.sort(key=lambda project: (project.get("created_at") or "", project["id"]))
+        for project in saved:
+            index.add(project)
+        return index
+
+    def create(self, owner: Optional[str], name: str, description: Optional[str] = None) -> dict:
+        now = datetime.now(timezone.utc).isoformat()
+        project = {
+            "id": f"proj_{secrets.token_hex(8)}",
+            "name": name,
+            "description": description,
+            "status": "draft",
+            "created_at": now,
+            "updated_at": now,
+        }
+        index = self.index(owner)
+        self.store.put("projects", owner, project["id"], project)
+        index.add(project)
+        self._changed(owner, index)
+        return project
+
+    def update(self, owner: Optional[str], project_id: str, **fields) -> Optional[dict]:
+        index = self.index(owner)
+        current = index.get(project_id)
+        if current is None:
+            return None
+        project = {**current, **fields, "updated_at": datetime.now(timezone.utc).isoformat()}
+        self.store.put("projects", owner, project_id, project)
+        index.update(project)
+        self._changed(owner, index)
+        return project
+
+    def delete(self, owner: Optional[str], project_id: str) -> bool:
+        index = self.index(owner)
+        if index.remove(project_id) is None:
+            return False
+        self.store.delete("projects", owner, project_id)
+        self._changed(owner, index)
+        return True
+
+
+projects = ProjectCatalog()
@@ -0,0 +1,270 @@
+"""
+Rate limiting and admission control
+
+Two checks run before a request reaches its handler:
+
+- RateLimiter: a token bucket per client and route class. Clients are
+  identified by the user of their session when their bearer token is one
+  the server issued, else by their address, so made-up tokens or user_id
+  parameters do not open fresh buckets. Each route class (auth, upload,
+  write, read) has its own rate and burst, so a script hammering upload_prd
+  uses up its upload bucket and nothing else. Over the limit, the answer is
+  429 with Retry-After set to when the next token arrives. Buckets live in a
+  bounded table in least-recently-used order; when it is full the bucket
+  idle the longest is dropped (a bucket idle for burst / rate seconds is full
+  again anyway).
+- AdmissionControl: a global cap on requests being handled. Requests over the
+  cap wait in a bounded FIFO queue for up to MOCK_ADMISSION_TIMEOUT seconds;
+  when the queue is full or the wait runs out the answer is 503 with
+  Retry-After, so overload turns into fast rejections instead of every
+  request getting slow.
+
+Health, stats, metrics and long-lived event streams are exempt. Under the
+limits a request costs a few dictionary operations and some arithmetic. With
+several workers every process keeps its own buckets and cap.
+
+MOCK_RATE_LIMIT=off disables both. MOCK_RATE_LIMITS overrides rates as
+`class=rate:burst` pairs, e.g. `upload=2:10,read=200:400`.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from mock_auth import scope_session
+from mock_responses import dumps
+
+
+ENABLED = os.environ.get("MOCK_RATE_LIMIT", "on").lower() not in ("0", "off", "false", "no")
+
+# Requests per second and burst size of each route class
+DEFAULT_LIMITS = {
+    "auth": (100.0, 200),
+    "upload": (10.0, 30),
+    "write": (20.0, 50),
+    "read": (100.0, 200),
+}
+MAX_BUCKETS = int(os.environ.get("MOCK_RATE_LIMIT_MAX_BUCKETS", 100_000))
+
+MAX_CONCURRENCY = int(os.environ.get("MOCK_MAX_CONCURRENCY", 128))
+MAX_QUEUE = int(os.environ.get("MOCK_ADMISSION_QUEUE", 512))
+ADMISSION_TIMEOUT_SECONDS = float(os.environ.get("MOCK_ADMISSION_TIMEOUT", 1.0))
+
+EXEMPT_PATHS = frozenset(("/", "/api/v1/health", "/api/v1/ready", "/metrics", "/docs", "/redoc", "/openapi.json"))
+EXEMPT_PREFIXES = ("/api/v1/stats/",)
+# Streams that stay open for minutes would hold a concurrency slot throughout
+STREAM_SUFFIXES = ("/events",)
+WRITE_METHODS = frozenset(("POST", "PUT", "PATCH", "DELETE"))
+
+
+def parse_limits(value: Optional[str]) -> dict:
+    """DEFAULT_LIMITS with `class=rate:burst` overrides applied"""
+    limits = dict(DEFAULT_LIMITS)
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        name, _, spec = item.partition("=")
+        rate, _, burst = spec.partition(":")
+        name = name.strip()
+        if name not in limits:
+            raise ValueError(f"MOCK_RATE_LIMITS: unknown route class {name!r}, expected one of {', '.join(limits)}")
+        rate = float(rate)
+        limits[name] = (rate, int(burst) if burst else max(1, int(rate)))
+    return limits
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    """The rate limit class of a request, or None when it is exempt"""
+    if method == "OPTIONS" or path in EXEMPT_PATHS or path.startswith(EXEMPT_PREFIXES):
+        return None
+    if path.endswith(STREAM_SUFFIXES):
+        return None
+    if path.startswith("/api/v1/auth/"):
+        return "auth"
+    if method in WRITE_METHODS:
+        if path.startswith("/api/upload_") or path == "/api/blobs":
+            return "upload"
+        return "write"
+    return "read"
+
+
+def client_identity(scope) -> str:
+    """The session's user for a token the server issued, else the client address
+
+    Unknown tokens and user_id parameters are accepted without a login, so a
+    client could make up a new one per request; they never get a bucket.
+    """
+    session = scope_session(scope)
+    if session is not None:
+        return "user:" + session.user_id
+    client = scope.get("client")
+    return "addr:" + (client[0] if client else "unknown")
+
+
+class RateLimiter:
+    """Token buckets per (route class, client) in a bounded LRU table"""
+
+    def __init__(self, limits: dict, max_buckets: int = MAX_BUCKETS):
+        self.limits = limits
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()  # (route class, client) -> [tokens, updated_at]
+        self.allowed = dict.fromkeys(limits, 0)
+        self.limited = dict.fromkeys(limits, 0)
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def check(self, name: str, client: str, now: float) -> float:
+        """Take a token; 0 when allowed, else seconds until the next token"""
+        rate, burst = self.limits[name]
+        key = (name, client)
+        buckets = self._buckets
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = [float(burst), now]
+            if len(buckets) > self.max_buckets:
+                buckets.popitem(last=False)
+                self.evicted += 1
+        else:
+            buckets.move_to_end(key)
+            tokens = bucket[0] + (now - bucket[1]) * rate
+            bucket[0] = tokens if tokens < burst else float(burst)
+            bucket[1] = now
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            self.allowed[name] += 1
+            return 0.0
+        self.limited[name] += 1
+        return (1.0 - bucket[0]) / rate
+
+    def stats(self) -> dict:
+        return {
+            "buckets": len(self),
+            "max_buckets": self.max_buckets,
+            "evicted": self.evicted,
+            "classes": {
+                name: {
+                    "rate_per_second": rate,
+                    "burst": burst,
+                    "allowed": self.allowed[name],
+                    "limited": self.limited[name],
+                }
+                for name, (rate, burst) in self.limits.items()
+            },
+        }
+
+
+class AdmissionControl:
+    """A cap on concurrent requests with a bounded, time-limited wait queue"""
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY, max_queue: int = MAX_QUEUE,
+                 timeout: float = ADMISSION_TIMEOUT_SECONDS):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.in_flight = 0
+        self._waiters = deque()  # futures of queued requests, oldest first
+        self.queued = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+
+    async def acquire(self) -> bool:
+        """Take a slot, waiting in the queue if needed; False when the request is shed"""
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.shed_queue_full += 1
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            # release() hands its slot straight to the waiter, so in_flight already counts it
+            await asyncio.wait_for(asyncio.shield(waiter), self.timeout)
+            return True
+        except asyncio.TimeoutError:
+            if waiter.done():  # the slot arrived just as the wait ran out
+                return True
+            self._abandon(waiter)
+            self.shed_timeout += 1
+            return False
+        except asyncio.CancelledError:
+            if waiter.done():
+                self.release()
+            else:
+                self._abandon(waiter)
+            raise
+
+    def _abandon(self, waiter):
+        waiter.cancel()
+        self._waiters.remove(waiter)
+
+    def release(self):
+        if self._waiters:
+            self._waiters.popleft().set_result(None)
+        else:
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "waiting": len(self._waiters),
+            "max_queue": self.max_queue,
+            "timeout_seconds": self.timeout,
+            "queued": self.queued,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_timeout": self.shed_timeout,
+        }
+
+
+async def reject(send, status: int, retry_after: float, detail: str):
+    body = dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode("latin-1")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class RateLimitMiddleware:
+    """Per-client token buckets, then the global admission cap"""
+
+    def __init__(self, app, limiter: RateLimiter, admission: AdmissionControl, enabled: bool = ENABLED):
+        self.app = app
+        self.limiter = limiter
+        self.admission = admission
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        name = route_class(scope["method"], scope["path"])
+        if name is None:
+            return await self.app(scope, receive, send)
+
+        wait = self.limiter.check(name, client_identity(scope), time.monotonic())
+        if wait:
+            scope["metrics_route"] = "rate_limited"
+            return await reject(send, 429, wait, f"Rate limit exceeded for {name} requests")
+        if not await self.admission.acquire():
+            scope["metrics_route"] = "shed"
+            return await reject(send, 503, self.admission.timeout, "Server is overloaded, retry later")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.admission.release()
+
+
+rate_limiter = RateLimiter(parse_limits(os.environ.get("MOCK_RATE_LIMITS")))
+admission = AdmissionControl()
@@ -0,0 +1,210 @@
+"""
+Pre-serialized JSON responses
+
+Catalog payloads (third-party APIs, mock personas, projects) are the same on
+every call, so they are encoded to bytes once and served as raw responses.
+Volatile top-level fields such as `analyzed_at` are left as gaps in the
+pre-encoded body and filled in per request.
+
+orjson is used for encoding when it is installed; otherwise the stdlib json
+module is used with compact separators.
+
+Read endpoints also support conditional GETs: every body carries an ETag that
+is computed once per version of the data, and a matching If-None-Match
+header is answered with an empty 304.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Callable, Iterable, Optional
+
+from fastapi import Response
+from starlette.datastructures import Headers
+
+import mock_compression
+from mock_compression import ENCODINGS, compress, compression_counters, deflate_chunk, gzip_stitched, negotiate, weaken_etag
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def dumps(data) -> bytes:
+    """Encode data as compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class JSONBytesResponse(Response):
+    """Response whose content is already encoded JSON"""
+
+    media_type = "application/json"
+
+
+def json_response(data, status_code: int = 200) -> JSONBytesResponse:
+    """Encode data with the fast encoder and wrap it in a response"""
+    return JSONBytesResponse(content=dumps(data), status_code=status_code)
+
+
+class PrecomputedBody:
+    """A JSON body encoded once, with placeholders for volatile fields
+
+    The body is split around each volatile field, so rendering is a join of
+    the static chunks with the freshly encoded values.
+    """
+
+    def __init__(self, data: dict, volatile: Iterable[str] = ()):
+        self.volatile = tuple(volatile)
+        self.version = 0
+        self.set(data)
+
+    def set(self, data: dict):
+        """Re-encode the body after the underlying data changed"""
+        self.data = data
+        placeholders = {}
+        template = dict(data)
+        for name in self.volatile:
+            placeholder = f"__volatile_{name}__"
+            template[name] = placeholder
+            placeholders[name] = dumps(placeholder)
+
+        encoded = dumps(template)
+        parts = []
+        fields = []
+        # Split at each placeholder in the order they appear in the body
+        for name, marker in sorted(placeholders.items(), key=lambda item: encoded.index(item[1])):
+            head, _, encoded = encoded.partition(marker)
+            parts.append(head)
+            fields.append(name)
+        parts.append(encoded)
+
+        self._parts = parts
+        self._fields = fields
+        self._compressed = {}  # encoding -> compressed body, when there are no volatile fields
+        self._deflated = None  # raw deflate blocks of the static parts, when there are
+        self.version += 1
+
+        # Volatile fields change on every render, so the tag is weak
+        digest = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            digest.update(part)
+        self.etag = format_etag(digest.hexdigest(), weak=bool(fields))
+
+    def render(self, **values) -> bytes:
+        """Return the body bytes with the given volatile values spliced in"""
+        parts = self._parts
+        if not self._fields:
+            return parts[0]
+        chunks = [parts[0]]
+        for index, name in enumerate(self._fields):
+            chunks.append(dumps(values[name]))
+            chunks.append(parts[index + 1])
+        return b"".join(chunks)
+
+    def response(self, **values) -> JSONBytesResponse:
+        return PrecomputedResponse(self, values)
+
+    def offered_encodings(self) -> tuple:
+        # Only gzip streams can be stitched around freshly compressed values
+        return ("gzip",) if self._fields else ENCODINGS
+
+    def compressed(self, encoding: str, values: dict, body: bytes) -> bytes:
+        """`body` (a render with `values`) compressed without recompressing the static bytes"""
+        if not self._fields:
+            cached = self._compressed.get(encoding)
+            if cached is None:
+                cached = self._compressed[encoding] = compress(body, encoding, static=True)
+            return cached
+        if self._deflated is None:
+            self._deflated = [deflate_chunk(part) for part in self._parts]
+        return gzip_stitched(self._deflated, [dumps(values[name]) for name in self._fields], body)
+
+
+class PrecomputedResponse(JSONBytesResponse):
+    """A PrecomputedBody render, sent compressed from the body's cached bytes"""
+
+    def __init__(self, source: PrecomputedBody, values: dict):
+        super().__init__(content=source.render(**values))
+        self.source = source
+        self.values = values
+
+    async def __call__(self, scope, receive, send):
+        if mock_compression.ENABLED and len(self.body) >= mock_compression.MIN_BYTES:
+            encoding = negotiate(Headers(scope=scope).get("accept-encoding"), self.source.offered_encodings())
+            if encoding is not None:
+                identity_size = len(self.body)
+                self.body = self.source.compressed(encoding, self.values, self.body)
+                compression_counters.record(encoding, identity_size, len(self.body), precompressed=True)
+                headers = self.headers
+                headers["content-encoding"] = encoding
+                headers["content-length"] = str(len(self.body))
+                headers.add_vary_header("Accept-Encoding")
+                if "etag" in headers:
+                    headers["etag"] = weaken_etag(headers["etag"])
+        await super().__call__(scope, receive, send)
+
+
+def format_etag(tag: str, weak: bool = False) -> str:
+    """Quote a raw hash for the ETag header"""
+    return f'W/"{tag}"' if weak else f'"{tag}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ETagCounters:
+    """Per-route counts of conditional GET hits (304) and misses (200)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, route: str, hit: bool):
+        with self._lock:
+            counts = self._routes.get(route)
+            if counts is None:
+                counts = self._routes[route] = {"hits": 0, "misses": 0}
+            counts["hits" if hit else "misses"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {route: dict(counts) for route, counts in self._routes.items()}
+
+
+etag_counters = ETagCounters()
+
+# Clients must revalidate before reusing a cached body
+CONDITIONAL_HEADERS = {"Cache-Control": "no-cache"}
+
+
+def conditional_response(
+    route: str,
+    if_none_match: Optional[str],
+    etag: str,
+    build: Callable[[], Response],
+) -> Response:
+    """Answer 304 when the client already has this version, otherwise build the body"""
+    if etag_matches(if_none_match, etag):
+        etag_counters.record(route, hit=True)
+        return Response(status_code=304, headers={"ETag": etag, **CONDITIONAL_HEADERS})
+    etag_counters.record(route, hit=False)
+    response = build()
+    response.headers["ETag"] = etag
+    response.headers.update(CONDITIONAL_HEADERS)
+    return response
@@ -0,0 +1,142 @@
+"""
+Typed upload schemas, validated and serialized by pydantic-core
+
+upload_userpersonas and upload_branddesign take the biggest request bodies
+the wizard sends, and they are mostly echoed back. Going through FastAPI's
+body parameters, every persona was parsed into a dict by json.loads, checked
+against an untyped `list`, copied into a fresh response dict, walked by
+jsonable_encoder and encoded again, twice (response and stored payload).
+
+Instead the handlers read the raw body and:
+
+- validate it with model_validate_json: pydantic-core parses the bytes
+  straight into the models below, with compiled validators and no
+  intermediate dict
+- serialize the validated personas (or design) once, with dump_json, and
+  use those bytes both as the stored payload and inside the response body,
+  which is spliced together from encoded JSON objects
+
+Personas and colors are strict: no coercion, so a number where a name or a
+color belongs is a 422 rather than a stringified save. Fields the frontend
+adds beyond the known ones are kept and echoed as sent.
+"""
+
+from typing import Optional
+
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError
+
+
+class Persona(BaseModel):
+    """A persona as listed by get_userpersonas; only the name is required"""
+
+    model_config = ConfigDict(strict=True, extra="allow")
+
+    id: Optional[str] = None
+    name: str
+    description: Optional[str] = None
+    goals: list[str] = []
+    painPoints: list[str] = []
+    keyFeatures: list[str] = []
+
+
+class BrandColors(BaseModel):
+    """The five theme colors the brand design editor picks"""
+
+    model_config = ConfigDict(strict=True, extra="allow")
+
+    primary: str
+    secondary: str
+    accent: str
+    background: str
+    foreground: str
+
+
+class UserPersonasUploadRequest(BaseModel):
+    selected_personas: list[Persona]
+    user_id: Optional[str] = None
+    project_id: Optional[str] = None
+
+
+class BrandDesign(BaseModel):
+    """A saved brand design, as stored and returned by get_branddesign"""
+
+    brandName: str
+    logoUrl: Optional[str] = None
+    colors: BrandColors
+    fontFamily: str
+    brandVoice: str
+    tone: str
+
+
+class BrandDesignUploadRequest(BrandDesign):
+    user_id: Optional[str] = None
+    project_id: Optional[str] = None
+
+
+PERSONAS = TypeAdapter(list[Persona])
+BRAND_DESIGN = TypeAdapter(BrandDesignUploadRequest)
+REQUEST_ONLY_FIELDS = frozenset(("user_id", "project_id"))
+
+
+def encode_personas(personas: list) -> bytes:
+    """The personas as JSON, with only the fields the client sent"""
+    return PERSONAS.dump_json(personas, exclude_unset=True)
+
+
+def encode_brand_design(design: BrandDesignUploadRequest) -> bytes:
+    """The design as JSON, without the request's user and project ids"""
+    return BRAND_DESIGN.dump_json(design, exclude=REQUEST_ONLY_FIELDS)
+
+
+async def read_model(request: Request, model: type):
+    """Validate the raw request body into `model`, failing like a FastAPI body parameter"""
+    body = await request.body()
+    try:
+        return model.model_validate_json(body)
+    except ValidationError as exc:
+        errors = []
+        for error in exc.errors(include_url=False):
+            error["loc"] = ("body", *error["loc"])
+            if error["type"] == "json_invalid":
+                error["input"] = {}  # not the whole body again
+            errors.append(error)
+        raise RequestValidationError(errors, body=body)
+
+
+def merge_objects(*objects: bytes) -> bytes:
+    """Concatenate the members of encoded JSON objects into one object"""
+    return b"{" + b",".join(encoded[1:-1] for encoded in objects if len(encoded) > 2) + b"}"
+
+
+def member(name: str, encoded: bytes) -> bytes:
+    """An encoded one-member object, {"name": <encoded>}"""
+    return b'{"' + name.encode("ascii") + b'":' + encoded + b"}"
+
+
+def body_schema(model: type) -> dict:
+    """openapi_extra documenting `model` as the JSON request body
+
+    Nested models are inlined, since the route does not register them as
+    OpenAPI components.
+    """
+    schema = model.model_json_schema()
+    definitions = schema.pop("$defs", {})
+
+    def inline(node):
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if ref is not None:
+                return inline(definitions[ref.rsplit("/", 1)[1]])
+            return {key: inline(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [inline(value) for value in node]
+        return node
+
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": inline(schema)}},
+        }
+    }
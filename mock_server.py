@@ -0,0 +1,354 @@
+"""
+Fast-starting entry point for the mock API
+
+Most of a cold start is spent importing FastAPI, pydantic and the app's
+routes and models (about 0.6 s of 0.85 s). None of that is needed to say
+the process is alive, so LazyApp binds the port first and loads the app in a
+background thread once the server is up:
+
+- GET /api/v1/health answers right away, with the same body the app gives
+- GET /api/v1/ready answers 503 until the app has loaded and run its
+  startup handlers, then the app answers it
+- any other request waits for the load and is then handled normally
+
+`python mock_backend.py` starts through here, so it never imports FastAPI
+before binding. Importing `mock_backend:app` directly (uvicorn --reload,
+tests, benchmarks) still loads everything eagerly.
+
+`--profile-startup` starts a server under `python -X importtime`, reports
+the time to the first health answer, to readiness and to the first real
+request, and breaks the import time down by top-level package.
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import traceback
+
+
+APP_IMPORT = "mock_backend:app"
+HEALTH_PATH = "/api/v1/health"
+READY_PATH = "/api/v1/ready"
+
+HEALTH_BODY = b'{"status":"healthy","service":"codebenders-api"}'
+STARTING_BODY = b'{"status":"starting"}'
+FAILED_BODY = b'{"status":"failed"}'
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# The first request that needs the full app, timed by --profile-startup
+FIRST_REQUEST_PATH = "/api/get_thirdparty?project_id=startup"
+
+
+async def send_bytes(send, status: int, body: bytes):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class LazyApp:
+    """ASGI app that answers health checks while the real app loads"""
+
+    def __init__(self, import_string: str = APP_IMPORT):
+        self.import_string = import_string
+        self.app = None
+        self._loading = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        app = self.app
+        if app is None:
+            path = scope.get("path")
+            if scope["type"] == "http" and path == HEALTH_PATH:
+                return await send_bytes(send, 200, HEALTH_BODY)
+            if scope["type"] == "http" and path == READY_PATH:
+                failed = self._loading is not None and self._loading.done()
+                return await send_bytes(send, 503, FAILED_BODY if failed else STARTING_BODY)
+            app = await self.load()
+        await app(scope, receive, send)
+
+    def start_loading(self):
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(self._load())
+
+    def load(self) -> asyncio.Future:
+        """The app, loading it on first call; every caller shares the one load"""
+        self.start_loading()
+        return asyncio.shield(self._loading)
+
+    async def _load(self):
+        module_name, _, attribute = self.import_string.partition(":")
+        try:
+            # In a thread, so the event loop keeps answering health checks meanwhile.
+            # __import__ rather than importlib.import_module, which -X importtime does not see
+            module = await asyncio.to_thread(__import__, module_name, fromlist=(attribute,))
+            app = getattr(module, attribute)
+            await app.router.startup()
+        except BaseException:
+            traceback.print_exc()
+            raise
+        self.app = app
+        return app
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.start_loading()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._loading is not None:
+                    try:
+                        app = await self._loading
+                    except BaseException:
+                        app = None
+                    if app is not None:
+                        await app.router.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+app = LazyApp()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="CodeBenders mock API server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("WEB_CONCURRENCY", 1)),
+        help="Worker processes (default: WEB_CONCURRENCY or 1); more than one shares state through SQLite",
+    )
+    parser.add_argument("--loop", choices=("auto", "uvloop", "asyncio"), default="auto")
+    parser.add_argument("--http", choices=("auto", "httptools", "h11"), default="auto")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument(
+        "--graceful-timeout",
+        type=float,
+        default=5.0,
+        help="Seconds shutdown waits for open requests before cancelling them (event streams never end on their own)",
+    )
+    parser.add_argument(
+        "--eager",
+        action="store_true",
+        help="Load the whole app before binding the port instead of in the background",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Start a server, report import time and time to the first requests, and exit",
+    )
+    parser.add_argument("--runs", type=int, default=1, help="Cold starts to measure with --profile-startup")
+    parser.add_argument("--top", type=int, default=15, help="Packages to list with --profile-startup")
+    parser.add_argument("--json", action="store_true", help="Print the --profile-startup report as JSON")
+    return parser.parse_args(argv)
+
+
+def resolve_server_impl(loop: str, http: str) -> tuple:
+    """Pick uvloop/httptools when installed, and fail loudly if asked for a missing one"""
+    def available(module):
+        try:
+            __import__(module)
+            return True
+        except ImportError:
+            return False
+
+    if loop == "auto":
+        loop = "uvloop" if available("uvloop") else "asyncio"
+    elif loop == "uvloop" and not available("uvloop"):
+        raise SystemExit("--loop uvloop requested but uvloop is not installed")
+    if http == "auto":
+        http = "httptools" if available("httptools") else "h11"
+    elif http == "httptools" and not available("httptools"):
+        raise SystemExit("--http httptools requested but httptools is not installed")
+    return loop, http
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get(port: int, path: str, timeout: float = 5.0) -> int:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        connection.request("GET", path)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+def _wait_for(port: int, path: str, started: float, deadline: float, interval: float) -> float:
+    """Seconds from `started` until `path` answers 200, polling every `interval` seconds"""
+    while True:
+        try:
+            if _get(port, path) == 200:
+                return time.perf_counter() - started
+        except OSError:
+            pass
+        if time.perf_counter() > deadline:
+            raise RuntimeError(f"server did not answer {path} with 200")
+        time.sleep(interval)
+
+
+def cold_start(eager: bool = False, importtime: bool = False, timeout: float = 60.0, env: dict = None) -> dict:
+    """Start a server process and time its first health check, readiness and first request
+
+    Times are in milliseconds from spawning the process. With `importtime`,
+    the result also holds the interpreter's raw `-X importtime` lines.
+    """
+    port = free_port()
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += [os.path.join(ROOT, "mock_backend.py"), "--port", str(port), "--host", "127.0.0.1", "--log-level", "warning"]
+    if eager:
+        command.append("--eager")
+    # The first request is anonymous; it times the app load, not a login
+    env = {**os.environ, "MOCK_LOG": "off", "MOCK_RATE_LIMIT": "off", "MOCK_AUTH_REQUIRED": "off", **(env or {})}
+
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE if importtime else subprocess.DEVNULL, text=True,
+    )
+    try:
+        deadline = started + timeout
+        health = _wait_for(port, HEALTH_PATH, started, deadline, 0.001)
+        # Less often: each poll takes the event loop (and the GIL) from the loading thread
+        ready = _wait_for(port, READY_PATH, started, deadline, 0.01)
+        request_started = time.perf_counter()
+        if _get(port, FIRST_REQUEST_PATH) != 200:
+            raise RuntimeError(f"{FIRST_REQUEST_PATH} failed")
+        first_request = time.perf_counter() - started
+        request = time.perf_counter() - request_started
+    finally:
+        server.terminate()
+        _, stderr = server.communicate()
+
+    result = {
+        "health_ms": round(health * 1000, 1),
+        "ready_ms": round(ready * 1000, 1),
+        "first_request_ms": round(first_request * 1000, 1),
+        "request_ms": round(request * 1000, 2),
+    }
+    if importtime:
+        result["importtime"] = stderr
+    return result
+
+
+def import_breakdown(importtime_output: str) -> dict:
+    """Self import time in milliseconds per top-level package, largest first"""
+    totals = {}
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        totals[package] = totals.get(package, 0) + int(self_us)
+    return {package: round(us / 1000, 1) for package, us in sorted(totals.items(), key=lambda item: -item[1])}
+
+
+def profile_startup(args):
+    runs = [cold_start(eager=args.eager, importtime=True) for _ in range(max(1, args.runs))]
+    # The median run by time to readiness, so its import breakdown fits its timings
+    run = sorted(runs, key=lambda item: item["ready_ms"])[len(runs) // 2]
+    packages = import_breakdown(run.pop("importtime"))
+    for other in runs:
+        other.pop("importtime", None)
+    report = {
+        "mode": "eager" if args.eager else "lazy",
+        "runs": len(runs),
+        **run,
+        "import_ms": round(sum(packages.values()), 1),
+        "packages": packages,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Startup profile ({report['mode']}, median of {report['runs']} run(s), -X importtime adds overhead)")
+    print(f"  first /api/v1/health   {report['health_ms']:8.1f} ms")
+    print(f"  app ready              {report['ready_ms']:8.1f} ms")
+    print(f"  first request done     {report['first_request_ms']:8.1f} ms  ({report['request_ms']:.1f} ms itself)")
+    print(f"  imports (self time)    {report['import_ms']:8.1f} ms")
+    print()
+    print(f"{'package':<30} {'ms':>8} {'share':>7}")
+    for package, ms in list(packages.items())[:args.top]:
+        share = ms / report["import_ms"] * 100 if report["import_ms"] else 0
+        print(f"{package:<30} {ms:8.1f} {share:6.1f}%")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.profile_startup:
+        return profile_startup(args)
+
+    import uvicorn
+
+    loop, http = resolve_server_impl(args.loop, args.http)
+    workers = max(1, args.workers)
+    if workers > 1:
+        # Workers import the app afresh and read these on import
+        os.environ["MOCK_STATE_BACKEND"] = "sqlite"
+        os.environ["WEB_CONCURRENCY"] = str(workers)
+    state_backend = "sqlite" if workers > 1 else os.environ.get("MOCK_STATE_BACKEND", "memory").lower()
+    database = os.environ.get("MOCK_DB_PATH", os.path.join(ROOT, "mock_backend.db"))
+
+    print("=" * 60)
+    print("🚀 CodeBenders Mock API Server Starting...")
+    print("=" * 60)
+    print(f"📍 Server URL: http://localhost:{args.port}")
+    print(f"📚 API Docs: http://localhost:{args.port}/docs")
+    print(f"📊 Health Check: http://localhost:{args.port}/api/v1/health")
+    print(f"🔐 Login: POST http://localhost:{args.port}/api/v1/auth/login")
+    print(f"📝 PRD Upload: POST http://localhost:{args.port}/api/upload_prd")
+    print(f"📄 Get PRD: GET http://localhost:{args.port}/api/get_prd")
+    print(f"🗄️  Database: {database}")
+    print(f"📂 Projects: GET http://localhost:{args.port}/api/v1/projects")
+    print(f"👥 Get Personas: GET http://localhost:{args.port}/api/get_userpersonas")
+    print(f"💾 Save Personas: POST http://localhost:{args.port}/api/upload_userpersonas")
+    print(f"🎨 Get Brand Design: GET http://localhost:{args.port}/api/get_branddesign")
+    print(f"💾 Save Brand Design: POST http://localhost:{args.port}/api/upload_branddesign")
+    print(f"🔌 Get Third-Party APIs: GET http://localhost:{args.port}/api/get_thirdparty")
+    print(f"📡 Project Events: GET http://localhost:{args.port}/api/v1/projects/{{project_id}}/events")
+    print(f"⚙️  Workers: {workers} (state: {state_backend}), loop: {loop}, http: {http}")
+    print("=" * 60)
+    print("\n⚡ Starting server...\n")
+
+    if args.eager:
+        target = APP_IMPORT if workers > 1 else __import__("mock_backend").app
+    else:
+        # An import string in either case: workers import it themselves
+        target = "mock_server:app"
+    uvicorn.run(
+        target,
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        log_level=args.log_level,
+        timeout_graceful_shutdown=args.graceful_timeout
+    )
+
+
+if __name__ == "__main__":
+    main()
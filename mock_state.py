@@ -0,0 +1,248 @@
+"""
+Process-shared state
+
+With several uvicorn workers every process has its own memory, so state
+that must look the same from every worker goes through a state backend:
+
+- memory (default): plain in-process structures, the fastest choice for a
+  single worker
+- sqlite: tables in the same WAL database as the stored documents, which
+  every worker process opens. Used automatically when mock_backend.py is
+  started with --workers > 1
+
+SharedState holds the tables of the sqlite backend: bearer tokens (with an
+expires_at index so expired ones are swept in order), PRD job snapshots so
+any worker can answer for a job, responses stored under idempotency keys,
+per-key change counters that tell a worker its in-memory copy of
+something (e.g. a user's project index) is out of date, and a log of project
+change events that every worker relays to its own subscribers.
+
+Derived caches such as the PRD analysis cache stay per process: every worker
+computes the same result, so they can never disagree, only miss more often.
+"""
+
+import json
+import os
+import time
+from typing import Optional
+
+from mock_storage import Storage, storage
+
+
+STATE_BACKEND = os.environ.get("MOCK_STATE_BACKEND", "memory").lower()
+if STATE_BACKEND not in ("memory", "sqlite"):
+    raise ValueError(f"MOCK_STATE_BACKEND must be 'memory' or 'sqlite', not {STATE_BACKEND!r}")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    token TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    email TEXT NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_tokens_expires_at ON tokens (expires_at);
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    snapshot TEXT NOT NULL,
+    updated_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_jobs_updated_at ON jobs (updated_at);
+CREATE TABLE IF NOT EXISTS versions (
+    key TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS idempotency (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    status INTEGER,
+    headers TEXT,
+    body BLOB,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_idempotency_expires_at ON idempotency (expires_at);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic TEXT NOT NULL,
+    type TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+_TOKEN_INSERT = "INSERT INTO tokens (token, user_id, email, expires_at) VALUES (?, ?, ?, ?)"
+_TOKEN_SELECT = "SELECT user_id, email, expires_at FROM tokens WHERE token = ?"
+_TOKEN_DELETE = "DELETE FROM tokens WHERE token = ?"
+_TOKEN_COUNT = "SELECT COUNT(*) FROM tokens"
+_TOKEN_SWEEP = "DELETE FROM tokens WHERE token IN (SELECT token FROM tokens WHERE expires_at <= ? ORDER BY expires_at LIMIT ?)"
+_TOKEN_EVICT = "DELETE FROM tokens WHERE token IN (SELECT token FROM tokens ORDER BY expires_at LIMIT ?)"
+
+_JOB_UPSERT = """
+INSERT INTO jobs (job_id, snapshot, updated_at) VALUES (?, ?, ?)
+ON CONFLICT (job_id) DO UPDATE SET snapshot = excluded.snapshot, updated_at = excluded.updated_at
+"""
+_JOB_SELECT = "SELECT snapshot FROM jobs WHERE job_id = ?"
+_JOB_PRUNE = "DELETE FROM jobs WHERE updated_at < ?"
+
+_VERSION_SELECT = "SELECT version FROM versions WHERE key = ?"
+_VERSION_BUMP = """
+INSERT INTO versions (key, version) VALUES (?, 1)
+ON CONFLICT (key) DO UPDATE SET version = version + 1
+RETURNING version
+"""
+
+# A claim is a row without a status; it expires like a stored response
+_IDEM_CLAIM = """
+INSERT INTO idempotency (key, fingerprint, expires_at) VALUES (?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET fingerprint = excluded.fingerprint, expires_at = excluded.expires_at
+WHERE idempotency.expires_at <= ?
+"""
+_IDEM_SELECT = "SELECT fingerprint, status, headers, body, expires_at FROM idempotency WHERE key = ?"
+_IDEM_COMPLETE = "UPDATE idempotency SET fingerprint = ?, status = ?, headers = ?, body = ?, expires_at = ? WHERE key = ?"
+_IDEM_DELETE = "DELETE FROM idempotency WHERE key = ?"
+_IDEM_COUNT = "SELECT COUNT(*) FROM idempotency"
+_IDEM_SWEEP = "DELETE FROM idempotency WHERE key IN (SELECT key FROM idempotency WHERE expires_at <= ? ORDER BY expires_at LIMIT ?)"
+# Stored responses only; evicting a claim would let a duplicate of a running request run
+_IDEM_EVICT = """
+DELETE FROM idempotency WHERE key IN (
+    SELECT key FROM idempotency WHERE status IS NOT NULL ORDER BY expires_at LIMIT ?
+)
+"""
+
+_EVENT_APPEND = "INSERT INTO events (topic, type, data, created_at) VALUES (?, ?, ?, ?) RETURNING seq"
+_EVENT_SINCE = "SELECT seq, topic, type, data FROM events WHERE seq > ? ORDER BY seq LIMIT ?"
+_EVENT_LAST = "SELECT COALESCE(MAX(seq), 0) FROM events"
+_EVENT_PRUNE = "DELETE FROM events WHERE seq IN (SELECT seq FROM events WHERE created_at < ? ORDER BY seq LIMIT ?)"
+
+# Rows removed per sweep statement, so a sweep never holds the write lock for long
+SWEEP_BATCH = 1000
+
+
+class SharedState:
+    """Cross-process tables next to the document store"""
+
+    def __init__(self, store: Storage = storage):
+        self.store = store
+        self._ready = False
+
+    def _connection(self):
+        if not self._ready:
+            with self.store._connection() as conn:
+                conn.executescript(_SCHEMA)
+            self._ready = True
+        return self.store._connection()
+
+    # Tokens
+
+    def token_put(self, token: str, user_id: str, email: str, expires_at: float):
+        with self._connection() as conn:
+            conn.execute(_TOKEN_INSERT, (token, user_id, email, expires_at))
+
+    def token_get(self, token: str) -> Optional[tuple]:
+        """(user_id, email, expires_at) for a token, or None"""
+        with self._connection() as conn:
+            return conn.execute(_TOKEN_SELECT, (token,)).fetchone()
+
+    def token_delete(self, token: str) -> bool:
+        with self._connection() as conn:
+            return conn.execute(_TOKEN_DELETE, (token,)).rowcount > 0
+
+    def token_count(self) -> int:
+        with self._connection() as conn:
+            return conn.execute(_TOKEN_COUNT).fetchone()[0]
+
+    def token_sweep(self, now: float, limit: int = SWEEP_BATCH) -> int:
+        """Delete up to `limit` expired tokens, oldest first"""
+        with self._connection() as conn:
+            return conn.execute(_TOKEN_SWEEP, (now, limit)).rowcount
+
+    def token_evict(self, count: int) -> int:
+        """Delete the `count` tokens closest to expiry"""
+        with self._connection() as conn:
+            return conn.execute(_TOKEN_EVICT, (count,)).rowcount
+
+    # Jobs
+
+    def job_put(self, job_id: str, snapshot: dict):
+        with self._connection() as conn:
+            conn.execute(_JOB_UPSERT, (job_id, json.dumps(snapshot, default=str), time.time()))
+
+    def job_get(self, job_id: str) -> Optional[dict]:
+        with self._connection() as conn:
+            row = conn.execute(_JOB_SELECT, (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def job_prune(self, older_than: float) -> int:
+        with self._connection() as conn:
+            return conn.execute(_JOB_PRUNE, (older_than,)).rowcount
+
+    # Idempotency keys
+
+    def idempotency_claim(self, key: str, fingerprint: str, until: float) -> bool:
+        """Take a key for a request about to run; False while another claim or response is live"""
+        with self._connection() as conn:
+            return conn.execute(_IDEM_CLAIM, (key, fingerprint, until, time.time())).rowcount > 0
+
+    def idempotency_get(self, key: str) -> Optional[tuple]:
+        """(fingerprint, status, headers, body, expires_at); status is None while claimed"""
+        with self._connection() as conn:
+            row = conn.execute(_IDEM_SELECT, (key,)).fetchone()
+        if row is None:
+            return None
+        fingerprint, status, headers, body, expires_at = row
+        return fingerprint, status, json.loads(headers) if headers else None, body, expires_at
+
+    def idempotency_complete(self, key: str, fingerprint: str, status: int, headers: list, body: bytes, expires_at: float):
+        with self._connection() as conn:
+            conn.execute(_IDEM_COMPLETE, (fingerprint, status, json.dumps(headers), body, expires_at, key))
+
+    def idempotency_delete(self, key: str) -> bool:
+        with self._connection() as conn:
+            return conn.execute(_IDEM_DELETE, (key,)).rowcount > 0
+
+    def idempotency_count(self) -> int:
+        with self._connection() as conn:
+            return conn.execute(_IDEM_COUNT).fetchone()[0]
+
+    def idempotency_sweep(self, now: float, limit: int = SWEEP_BATCH) -> int:
+        with self._connection() as conn:
+            return conn.execute(_IDEM_SWEEP, (now, limit)).rowcount
+
+    def idempotency_evict(self, count: int) -> int:
+        """Delete the `count` stored responses closest to expiry"""
+        with self._connection() as conn:
+            return conn.execute(_IDEM_EVICT, (count,)).rowcount
+
+    # Project change events
+
+    def event_append(self, topic: str, event_type: str, data: str) -> int:
+        """Log an event and return its sequence number"""
+        with self._connection() as conn:
+            return conn.execute(_EVENT_APPEND, (topic, event_type, data, time.time())).fetchone()[0]
+
+    def events_since(self, seq: int, limit: int = SWEEP_BATCH) -> list:
+        """(seq, topic, type, data) of up to `limit` events after `seq`, oldest first"""
+        with self._connection() as conn:
+            return conn.execute(_EVENT_SINCE, (seq, limit)).fetchall()
+
+    def event_last_seq(self) -> int:
+        with self._connection() as conn:
+            return conn.execute(_EVENT_LAST).fetchone()[0]
+
+    def event_prune(self, older_than: float, limit: int = SWEEP_BATCH) -> int:
+        with self._connection() as conn:
+            return conn.execute(_EVENT_PRUNE, (older_than, limit)).rowcount
+
+    # Change counters
+
+    def version(self, key: str) -> int:
+        with self._connection() as conn:
+            row = conn.execute(_VERSION_SELECT, (key,)).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, key: str) -> int:
+        with self._connection() as conn:
+            return conn.execute(_VERSION_BUMP, (key,)).fetchone()[0]
+
+
+# None with the memory backend, so callers can skip the shared tables entirely
+shared = SharedState() if STATE_BACKEND == "sqlite" else None
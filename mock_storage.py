@@ -0,0 +1,253 @@
+"""
+Persistent storage for the mock backend
+
+Every saved document (PRD, selected user personas, brand design, project) is
+stored as a JSON payload keyed by (user_id, project_id) in a local SQLite
+database.
+
+- WAL journal mode so readers never block on the writer
+- A connection pool per process, sized to the threads that may read at once
+  (the event loop plus asyncio.to_thread's default executor) by default
+- Fixed SQL strings so sqlite3's per-connection statement cache reuses the
+  prepared statements on every call
+- Composite primary keys (user_id, project_id) plus a project_id index
+- A content hash (ETag) computed once per write, readable without the payload
+- put_many upserts a batch in one transaction, for the write-behind buffer
+  (mock_writes.py)
+
+MOCK_DB_SYNCHRONOUS sets PRAGMA synchronous: NORMAL (the default) syncs the
+WAL at checkpoints only, FULL on every commit.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_backend.db")
+
+# One table per document kind; the names are fixed so they are safe to format into SQL
+TABLES = ("prds", "user_personas", "brand_designs", "projects")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    user_id TEXT NOT NULL,
+    project_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    updated_at TEXT NOT NULL,
+    etag TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (user_id, project_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_{table}_project_id ON {table} (project_id);
+"""
+
+_SELECT = "SELECT payload, version, updated_at, etag FROM {table} WHERE user_id = ? AND project_id = ?"
+
+_SELECT_USER = "SELECT project_id, payload FROM {table} WHERE user_id = ?"
+
+_SELECT_ETAG = "SELECT etag FROM {table} WHERE user_id = ? AND project_id = ?"
+
+_UPSERT = """
+INSERT INTO {table} (user_id, project_id, payload, version, updated_at, etag)
+VALUES (?, ?, ?, 1, ?, ?)
+ON CONFLICT (user_id, project_id) DO UPDATE SET
+    payload = excluded.payload,
+    version = {table}.version + 1,
+    updated_at = excluded.updated_at,
+    etag = excluded.etag
+RETURNING version
+"""
+
+_DELETE = "DELETE FROM {table} WHERE user_id = ? AND project_id = ?"
+
+_COUNT = "SELECT COUNT(*) FROM {table}"
+
+
+SYNCHRONOUS = os.environ.get("MOCK_DB_SYNCHRONOUS", "NORMAL").upper()
+if SYNCHRONOUS not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+    raise ValueError(f"MOCK_DB_SYNCHRONOUS must be OFF, NORMAL, FULL or EXTRA, not {SYNCHRONOUS!r}")
+
+
+def _default_pool_size() -> int:
+    """One connection per thread that may use the store at once
+
+    The event loop reads directly, and get_wizard_state and the write-behind
+    flusher run in asyncio.to_thread, whose default executor has
+    min(32, cpu_count + 4) threads. The loop gets one more, so it never
+    blocks in pool.get() while every worker thread holds a connection.
+    """
+    return min(32, (os.cpu_count() or 1) + 4) + 1
+
+
+def _key(user_id: Optional[str], project_id: Optional[str]) -> tuple:
+    # The frontend sends null for anonymous users / unsaved projects
+    return (user_id or "", project_id or "")
+
+
+def content_etag(payload: str, updated_at: str) -> str:
+    """Hash of the stored payload and its save time"""
+    digest = hashlib.blake2b(payload.encode("utf-8"), digest_size=16)
+    digest.update(updated_at.encode("ascii"))
+    return digest.hexdigest()
+
+
+class StoredRecord:
+    """A stored payload together with its write version, timestamp and ETag"""
+
+    __slots__ = ("data", "version", "updated_at", "etag")
+
+    def __init__(self, data, version: int, updated_at: str, etag: str):
+        self.data = data
+        self.version = version
+        self.updated_at = updated_at
+        self.etag = etag
+
+
+class Storage:
+    """SQLite-backed document store keyed by (user_id, project_id)"""
+
+    def __init__(self, path: Optional[str] = None, pool_size: Optional[int] = None):
+        self.path = path or os.environ.get("MOCK_DB_PATH", DEFAULT_DB_PATH)
+        self.pool_size = pool_size or int(os.environ.get("MOCK_DB_POOL_SIZE", _default_pool_size()))
+        self._pool = queue.LifoQueue(maxsize=self.pool_size)
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            isolation_level=None,  # autocommit; single writes are single statements
+            cached_statements=64,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={SYNCHRONOUS}")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def _ensure_initialized(self):
+        if self._initialized:
+            return
+        with self._init_lock:
+            if self._initialized:
+                return
+            conn = self._connect()
+            for table in TABLES:
+                conn.executescript(_SCHEMA.format(table=table))
+                self._migrate(conn, table)
+            self._pool.put(conn)
+            for _ in range(self.pool_size - 1):
+                self._pool.put(self._connect())
+            self._initialized = True
+
+    def _migrate(self, conn: sqlite3.Connection, table: str):
+        """Add columns introduced after a database file was first created"""
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if "etag" not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN etag TEXT NOT NULL DEFAULT ''")
+            rows = conn.execute(f"SELECT user_id, project_id, payload, updated_at FROM {table}").fetchall()
+            conn.executemany(
+                f"UPDATE {table} SET etag = ? WHERE user_id = ? AND project_id = ?",
+                ((content_etag(payload, updated_at), user_id, project_id)
+                 for user_id, project_id, payload, updated_at in rows),
+            )
+
+    @contextmanager
+    def _connection(self):
+        self._ensure_initialized()
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def get(self, table: str, user_id: Optional[str], project_id: Optional[str]) -> Optional[StoredRecord]:
+        """Return the stored record for the key, or None if nothing was saved"""
+        with self._connection() as conn:
+            row = conn.execute(_SELECT.format(table=table), _key(user_id, project_id)).fetchone()
+        if row is None:
+            return None
+        return StoredRecord(json.loads(row[0]), row[1], row[2], row[3])
+
+    def items(self, table: str, user_id: Optional[str]) -> list:
+        """Return (project_id, data) for every record saved by one user"""
+        with self._connection() as conn:
+            rows = conn.execute(_SELECT_USER.format(table=table), (user_id or "",)).fetchall()
+        return [(project_id, json.loads(payload)) for project_id, payload in rows]
+
+    def get_etag(self, table: str, user_id: Optional[str], project_id: Optional[str]) -> Optional[str]:
+        """Return only the ETag of the stored record, without loading the payload"""
+        with self._connection() as conn:
+            row = conn.execute(_SELECT_ETAG.format(table=table), _key(user_id, project_id)).fetchone()
+        return row[0] if row else None
+
+    def put(self, table: str, user_id: Optional[str], project_id: Optional[str], data) -> StoredRecord:
+        """Insert or replace the payload for the key and return the new record"""
+        return self.put_encoded(table, user_id, project_id, json.dumps(data, separators=(",", ":")), data)
+
+    def put_encoded(self, table: str, user_id: Optional[str], project_id: Optional[str], payload,
+                    data=None) -> StoredRecord:
+        """put() for a payload that is already encoded JSON (str or UTF-8 bytes)"""
+        if isinstance(payload, bytes):
+            payload = payload.decode("utf-8")
+        updated_at = datetime.now().isoformat()
+        etag = content_etag(payload, updated_at)
+        with self._connection() as conn:
+            version = conn.execute(
+                _UPSERT.format(table=table),
+                (*_key(user_id, project_id), payload, updated_at, etag),
+            ).fetchone()[0]
+        return StoredRecord(data, version, updated_at, etag)
+
+    def put_many(self, writes: list) -> list:
+        """Upsert (table, user_id, project_id, payload, updated_at, etag) rows in one transaction
+
+        Returns the new version of each row, in order. Nothing is written if
+        any row fails.
+        """
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                versions = [
+                    conn.execute(
+                        _UPSERT.format(table=table),
+                        (*_key(user_id, project_id), payload, updated_at, etag),
+                    ).fetchone()[0]
+                    for table, user_id, project_id, payload, updated_at, etag in writes
+                ]
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        return versions
+
+    def delete(self, table: str, user_id: Optional[str], project_id: Optional[str]) -> bool:
+        with self._connection() as conn:
+            cursor = conn.execute(_DELETE.format(table=table), _key(user_id, project_id))
+        return cursor.rowcount > 0
+
+    def count(self, table: str) -> int:
+        with self._connection() as conn:
+            return conn.execute(_COUNT.format(table=table)).fetchone()[0]
+
+    def close(self):
+        """Close every pooled connection"""
+        with self._init_lock:
+            while True:
+                try:
+                    self._pool.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._initialized = False
+
+
+# Shared instance used by the API handlers
+storage = Storage()
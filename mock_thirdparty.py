@@ -0,0 +1,296 @@
+"""
+Third-party API catalog with indexed filters and running summaries
+
+get_thirdparty serves a catalog of providers (fixtures/thirdparty_catalog.json
+by default, or the file named by MOCK_THIRDPARTY_CATALOG) that clients filter
+by category, required flag and feature keywords, one page at a time:
+
+- Providers are numbered in catalog order (seq). Each category, the required
+  and the optional providers, and each word of a provider's name and
+  features keep an ascending posting list of seqs. A filtered page starts
+  from the filter with the fewest seqs and checks the other filters per
+  provider. A keyword matches every indexed word it starts ("auth" finds
+  "authentication"); the words are kept sorted, so that is a binary search.
+- add (which also replaces a provider) and remove keep the posting lists
+  exact, so the summary (total, required, optional, providers per category)
+  is read off their lengths. Its encoding is cached until the next change;
+  no request counts providers.
+- Every provider is encoded to JSON once, when it is added. A filtered page
+  body is those bytes joined around the cached summary. The unfiltered first
+  page is a PrecomputedBody, so it can also be served pre-compressed.
+
+The catalog revision is a hash chained through every change. Workers that
+load the same file agree on it, and it changes with the content, so it keys
+the ETags of every page.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import re
+import threading
+from array import array
+from typing import Iterable, Optional
+
+from mock_projects import encode_cursor
+from mock_responses import PrecomputedBody, dumps
+
+
+DEFAULT_CATALOG_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "fixtures", "thirdparty_catalog.json"
+)
+
+# Words too common in feature names to narrow anything down
+STOP_WORDS = frozenset(("a", "an", "and", "as", "by", "etc", "for", "in", "of", "on", "or", "the", "to", "with"))
+WORD = re.compile(r"[a-z0-9]+")
+
+
+def split_words(text: str) -> list:
+    """Lowercased words of `text`, in order, without stop words"""
+    return [word for word in WORD.findall(text.lower()) if word not in STOP_WORDS]
+
+
+def _insert(postings: array, seq: int):
+    if not postings or postings[-1] < seq:
+        postings.append(seq)
+    else:
+        postings.insert(bisect.bisect_left(postings, seq), seq)
+
+
+def _discard(postings: array, seq: int):
+    at = bisect.bisect_left(postings, seq)
+    if at < len(postings) and postings[at] == seq:
+        del postings[at]
+
+
+class Provider:
+    """One catalog entry, with what the filters check and its encoded JSON"""
+
+    __slots__ = ("data", "encoded", "category", "required", "words")
+
+    def __init__(self, data: dict):
+        self.data = data
+        self.encoded = dumps(data)
+        self.category = str(data.get("category") or "other").lower()
+        self.required = bool(data.get("required"))
+        words = split_words(str(data.get("name") or ""))
+        for feature in data.get("features") or ():
+            words.extend(split_words(str(feature)))
+        self.words = frozenset(words)
+
+    def has_word(self, prefix: str) -> bool:
+        return any(word.startswith(prefix) for word in self.words)
+
+
+class ThirdPartyCatalog:
+    """Providers in catalog order, with posting lists per filter value"""
+
+    def __init__(self, prd_version: str = "1.0.0"):
+        self.prd_version = prd_version
+        self._next_seq = 1
+        self._seqs = array("q")  # live seqs, ascending
+        self._providers = {}  # seq -> Provider
+        self._seq_of = {}  # lowercased name -> seq
+        self._categories = {}  # category -> array of seqs, in order of first appearance
+        self._required = array("q")
+        self._optional = array("q")
+        self._words = {}  # word -> array of seqs
+        self._vocabulary = []  # indexed words, sorted, for prefix lookups
+        self._lock = threading.Lock()
+        self._summary = None  # encoded summary, until the next change
+        self._first_page = None  # (size, PrecomputedBody) of the unfiltered first page
+        self.revision = hashlib.blake2b(digest_size=16).hexdigest()
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "ThirdPartyCatalog":
+        """Build a catalog from a {"prd_version", "providers": [...]} JSON file"""
+        path = path or os.environ.get("MOCK_THIRDPARTY_CATALOG", DEFAULT_CATALOG_PATH)
+        with open(path, encoding="utf-8") as handle:
+            document = json.load(handle)
+        catalog = cls(prd_version=document.get("prd_version", "1.0.0"))
+        for provider in document.get("providers", ()):
+            catalog.add(provider)
+        return catalog
+
+    def __len__(self) -> int:
+        return len(self._seqs)
+
+    def get(self, name: str) -> Optional[dict]:
+        seq = self._seq_of.get(name.lower())
+        return None if seq is None else self._providers[seq].data
+
+    def add(self, data: dict):
+        """Append a provider, or replace the one with the same name in place"""
+        provider = Provider(data)
+        key = str(data["name"]).lower()
+        with self._lock:
+            seq = self._seq_of.get(key)
+            if seq is None:
+                seq = self._next_seq
+                self._next_seq += 1
+                self._seqs.append(seq)
+                self._seq_of[key] = seq
+            else:
+                self._unindex(seq, self._providers[seq])
+            self._providers[seq] = provider
+            self._index(seq, provider)
+            self._changed(b"add", provider.encoded)
+
+    def remove(self, name: str) -> Optional[dict]:
+        with self._lock:
+            seq = self._seq_of.pop(name.lower(), None)
+            if seq is None:
+                return None
+            provider = self._providers.pop(seq)
+            _discard(self._seqs, seq)
+            self._unindex(seq, provider)
+            self._changed(b"remove", name.lower().encode("utf-8"))
+            return provider.data
+
+    def _index(self, seq: int, provider: Provider):
+        postings = self._categories.get(provider.category)
+        if postings is None:
+            postings = self._categories[provider.category] = array("q")
+        _insert(postings, seq)
+        _insert(self._required if provider.required else self._optional, seq)
+        for word in provider.words:
+            postings = self._words.get(word)
+            if postings is None:
+                postings = self._words[word] = array("q")
+                bisect.insort(self._vocabulary, word)
+            _insert(postings, seq)
+
+    def _unindex(self, seq: int, provider: Provider):
+        postings = self._categories[provider.category]
+        _discard(postings, seq)
+        if not postings:
+            del self._categories[provider.category]
+        _discard(self._required if provider.required else self._optional, seq)
+        for word in provider.words:
+            postings = self._words[word]
+            _discard(postings, seq)
+            if not postings:
+                del self._words[word]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, word)]
+
+    def _changed(self, operation: bytes, payload: bytes):
+        digest = hashlib.blake2b(self.revision.encode("ascii"), digest_size=16)
+        digest.update(operation)
+        digest.update(payload)
+        self.revision = digest.hexdigest()
+        self._summary = None
+        self._first_page = None
+
+    def summary(self) -> dict:
+        return {
+            "total": len(self._seqs),
+            "required": len(self._required),
+            "optional": len(self._optional),
+            "categories": list(self._categories),
+            "category_counts": {category: len(postings) for category, postings in self._categories.items()},
+        }
+
+    def encoded_summary(self) -> bytes:
+        summary = self._summary
+        if summary is None:
+            with self._lock:
+                summary = self._summary = dumps(self.summary())
+        return summary
+
+    def _prefixed(self, prefix: str) -> list:
+        """Posting lists of every indexed word that starts with `prefix`"""
+        vocabulary = self._vocabulary
+        at = bisect.bisect_left(vocabulary, prefix)
+        found = []
+        while at < len(vocabulary) and vocabulary[at].startswith(prefix):
+            found.append(self._words[vocabulary[at]])
+            at += 1
+        return found
+
+    def match(
+        self,
+        categories: Optional[Iterable[str]] = None,
+        required: Optional[bool] = None,
+        words: Iterable[str] = (),
+    ):
+        """Ascending seqs of the providers that pass every filter
+
+        Categories are alternatives; keywords must all match.
+        """
+        wanted = None if categories is None else frozenset(category.lower() for category in categories)
+        with self._lock:
+            # Each filter as the posting lists whose union it allows, and a per-provider check
+            filters = []
+            if wanted is not None:
+                filters.append((
+                    [self._categories[category] for category in wanted if category in self._categories],
+                    lambda provider: provider.category in wanted,
+                ))
+            if required is not None:
+                filters.append((
+                    [self._required if required else self._optional],
+                    lambda provider: provider.required == required,
+                ))
+            for word in words:
+                filters.append((self._prefixed(word), lambda provider, word=word: provider.has_word(word)))
+            if not filters:
+                return self._seqs
+            # The candidates pass the filter they come from; only the others are checked
+            start = min(range(len(filters)), key=lambda at: sum(map(len, filters[at][0])))
+            lists = filters[start][0]
+            if not lists:
+                return array("q")
+            candidates = lists[0] if len(lists) == 1 else sorted(set().union(*lists))
+            providers = self._providers
+            checks = []
+            for at, (others, check) in enumerate(filters):
+                if at == start:
+                    continue
+                if sum(map(len, others)) <= 4 * len(candidates):
+                    # Cheaper to look seqs up in the filter's own postings
+                    checks.append(frozenset().union(*others).__contains__)
+                else:
+                    checks.append(lambda seq, check=check: check(providers[seq]))
+            if not checks:
+                return candidates if isinstance(candidates, array) else array("q", candidates)
+            return array("q", (seq for seq in candidates if all(check(seq) for check in checks)))
+
+    def page(self, seqs: array, size: int, after: Optional[int] = None):
+        """Up to `size` of `seqs` after the cursor seq: (providers, cursor of the next page or None)"""
+        start = 0 if after is None else bisect.bisect_right(seqs, after)
+        chosen = seqs[start:start + size]
+        providers = [self._providers[seq] for seq in chosen if seq in self._providers]
+        more = start + size < len(seqs)
+        return providers, (encode_cursor(chosen[-1]) if more else None)
+
+    def render(self, providers: list, matched: int, next_cursor: Optional[str], analyzed_at: str) -> bytes:
+        """A get_thirdparty body, joined from the pre-encoded providers and summary"""
+        return b"".join((
+            b'{"apis":[', b",".join(provider.encoded for provider in providers),
+            b'],"summary":', self.encoded_summary(),
+            b',"matched":', dumps(matched),
+            b',"next_cursor":', dumps(next_cursor),
+            b',"analyzed_at":', dumps(analyzed_at),
+            b',"prd_version":', dumps(self.prd_version), b"}",
+        ))
+
+    def first_page(self, size: int) -> PrecomputedBody:
+        """The unfiltered first page, encoded once per revision"""
+        cached = self._first_page
+        if cached is not None and cached[0] == size:
+            return cached[1]
+        providers, next_cursor = self.page(self._seqs, size)
+        body = PrecomputedBody({
+            "apis": [provider.data for provider in providers],
+            "summary": self.summary(),
+            "matched": len(self._seqs),
+            "next_cursor": next_cursor,
+            "analyzed_at": None,
+            "prd_version": self.prd_version,
+        }, volatile=("analyzed_at",))
+        self._first_page = (size, body)
+        return body
+
+
+thirdparty = ThirdPartyCatalog.load()
@@ -0,0 +1,293 @@
+"""
+Write-behind buffer for upload saves
+
+upload_userpersonas and upload_branddesign used to commit every save in its
+own SQLite transaction, on the event loop, so saves could go no faster than
+commits (or than fsyncs, with MOCK_DB_SYNCHRONOUS=FULL). They now go through
+WriteBehind:
+
+- A save is buffered under its (table, user_id, project_id) key. A later save
+  to the same key replaces it, so only the last one is written.
+- A flusher task commits the buffer in one transaction (Storage.put_many), in
+  a worker thread, once MOCK_WRITE_BATCH_SIZE keys are waiting or the oldest
+  has waited MOCK_WRITE_FLUSH_MS. Saves that arrive during a flush go into
+  the next batch. The default interval is 0: a batch is whatever arrived
+  while the previous one was committing, so a lone save is not held back,
+  and batches grow with the load. A longer interval coalesces more, at the
+  cost of that much latency in "commit" mode.
+- MOCK_WRITE_DURABILITY picks when a save is acknowledged. With "commit" (the
+  default) the response waits for the batch to commit. With "buffer" it is
+  sent as soon as the save is buffered, and a crash loses the saves of the
+  last flush interval. A "commit" response carries the saved_at and ETag of
+  the row that was committed, which for a save replaced by a later one are
+  the later save's. A "buffer" response carries the save's own, which a
+  later save to the same key can replace before they are ever committed.
+- get and get_etag look in the buffer first, so a client reads its own saves
+  before they are committed. Other workers see them once they are.
+- Change events are published when a save is committed, with the committed
+  version. A save replaced before its commit publishes nothing; the save that
+  replaced it does.
+- On shutdown the buffer is flushed before the database is closed.
+
+If a flush fails, "commit" saves get the error. "buffer" saves are already
+acknowledged, so they stay buffered and are retried. When more than
+MAX_PENDING_BATCHES batches' worth of keys are buffered, "buffer" saves also
+wait for a commit, so a database that falls behind slows uploads down instead
+of growing the buffer.
+"""
+
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import Callable, Optional
+
+from mock_logging import get_logger
+from mock_storage import StoredRecord, content_etag, storage
+
+
+DURABILITY_MODES = ("commit", "buffer")
+DURABILITY = os.environ.get("MOCK_WRITE_DURABILITY", "commit").lower()
+if DURABILITY not in DURABILITY_MODES:
+    raise ValueError(f"MOCK_WRITE_DURABILITY must be one of {', '.join(DURABILITY_MODES)}, not {DURABILITY!r}")
+BATCH_SIZE = int(os.environ.get("MOCK_WRITE_BATCH_SIZE", 256))
+FLUSH_INTERVAL_SECONDS = float(os.environ.get("MOCK_WRITE_FLUSH_MS", 0)) / 1000
+
+MAX_PENDING_BATCHES = 8
+# Pause after a failed flush before trying again, and tries left at shutdown
+RETRY_SECONDS = 0.5
+SHUTDOWN_ATTEMPTS = 3
+
+
+class PendingWrite:
+    """A buffered save, with the futures of every save it replaced"""
+
+    __slots__ = ("table", "user_id", "project_id", "payload", "updated_at", "etag", "on_commit", "waiters")
+
+    def __init__(self, table: str, user_id: Optional[str], project_id: Optional[str], payload: str,
+                 on_commit: Optional[Callable]):
+        self.table = table
+        self.user_id = user_id
+        self.project_id = project_id
+        self.payload = payload
+        self.updated_at = datetime.now().isoformat()
+        self.etag = content_etag(payload, self.updated_at)
+        self.on_commit = on_commit
+        self.waiters = []
+
+    def row(self) -> tuple:
+        return (self.table, self.user_id, self.project_id, self.payload, self.updated_at, self.etag)
+
+
+def _key(table: str, user_id: Optional[str], project_id: Optional[str]) -> tuple:
+    return (table, user_id or "", project_id or "")
+
+
+class WriteBehind:
+    """Coalescing buffer in front of Storage, committed in batches by one task"""
+
+    def __init__(self, store=storage, durability: str = DURABILITY, batch_size: int = BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL_SECONDS):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability must be one of {', '.join(DURABILITY_MODES)}, not {durability!r}")
+        self.store = store
+        self.durability = durability
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.0, flush_interval)
+        self.max_pending = self.batch_size * MAX_PENDING_BATCHES
+        self._pending = {}  # key -> PendingWrite, waiting for the next flush
+        self._flushing = {}  # key -> PendingWrite, in the transaction running now
+        self._flusher = None
+        self._wakeup = None
+        self._full = None
+        self._closing = False
+        self._oldest = 0.0  # loop time when the buffer last became non-empty
+        self.saves = 0
+        self.coalesced = 0
+        self.written_through = 0
+        self.backpressure_waits = 0
+        self.batches = 0
+        self.rows_committed = 0
+        self.largest_batch = 0
+        self.failures = 0
+
+    def start(self):
+        """Start the flusher; until then (and after stop) saves are written through"""
+        if self._flusher is not None:
+            return
+        self._closing = False
+        self._wakeup = asyncio.Event()
+        self._full = asyncio.Event()
+        self._flusher = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Commit whatever is buffered; later saves are written through"""
+        flusher = self._flusher
+        if flusher is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        self._full.set()
+        await flusher
+        self._flusher = None
+
+    async def save(self, table: str, user_id: Optional[str], project_id: Optional[str], payload,
+                   on_commit: Optional[Callable] = None) -> StoredRecord:
+        """Store an encoded JSON payload (str or UTF-8 bytes) for the key
+
+        on_commit(record) is called once the payload is committed. The
+        returned record has no data. When the save waited for its commit it
+        is the committed record: that of a later save to the key if one
+        replaced this one. When it was acknowledged before the commit, its
+        version is None and its timestamp and ETag are this save's.
+        """
+        if isinstance(payload, bytes):
+            payload = payload.decode("utf-8")
+        self.saves += 1
+        if self._flusher is None or self._flusher.done():
+            self.written_through += 1
+            record = self.store.put_encoded(table, user_id, project_id, payload)
+            if on_commit is not None:
+                on_commit(record)
+            return record
+
+        write = PendingWrite(table, user_id, project_id, payload, on_commit)
+        key = _key(table, user_id, project_id)
+        pending = self._pending
+        replaced = pending.get(key)
+        if replaced is not None:
+            self.coalesced += 1
+            write.waiters = replaced.waiters
+        elif not pending:
+            self._oldest = asyncio.get_running_loop().time()
+            self._wakeup.set()
+        pending[key] = write
+        if len(pending) >= self.batch_size:
+            self._full.set()
+
+        if self.durability == "commit" or len(pending) > self.max_pending:
+            if self.durability != "commit":
+                self.backpressure_waits += 1
+            committed = asyncio.get_running_loop().create_future()
+            write.waiters.append(committed)
+            return await committed
+        return StoredRecord(None, None, write.updated_at, write.etag)
+
+    def _buffered(self, table: str, user_id: Optional[str], project_id: Optional[str]) -> Optional[PendingWrite]:
+        # The flusher moves a batch to _flushing before it empties _pending
+        key = _key(table, user_id, project_id)
+        write = self._pending.get(key)
+        return write if write is not None else self._flushing.get(key)
+
+    def get(self, table: str, user_id: Optional[str], project_id: Optional[str]) -> Optional[StoredRecord]:
+        """Storage.get, seeing buffered saves"""
+        write = self._buffered(table, user_id, project_id)
+        if write is None:
+            return self.store.get(table, user_id, project_id)
+        return StoredRecord(json.loads(write.payload), None, write.updated_at, write.etag)
+
+    def get_etag(self, table: str, user_id: Optional[str], project_id: Optional[str]) -> Optional[str]:
+        """Storage.get_etag, seeing buffered saves"""
+        write = self._buffered(table, user_id, project_id)
+        return write.etag if write is not None else self.store.get_etag(table, user_id, project_id)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        failed = 0
+        while True:
+            await self._wakeup.wait()
+            wait = self._oldest + self.flush_interval - loop.time()
+            if wait > 0 and not self._closing and len(self._pending) < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._full.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+            self._full.clear()
+            if await self._flush():
+                failed = 0
+            else:
+                failed += 1
+                if self._closing and failed >= SHUTDOWN_ATTEMPTS:
+                    get_logger("write_behind").error("unflushed", rows=len(self._pending))
+                    error = RuntimeError("shut down before the save was committed")
+                    for write in self._pending.values():
+                        for waiter in write.waiters:
+                            if not waiter.done():
+                                waiter.set_exception(error)
+                    return
+                # Only a "buffer" batch stays behind to retry; "commit" saves got the error
+                if self._pending:
+                    await asyncio.sleep(RETRY_SECONDS)
+            if self._pending:
+                self._wakeup.set()
+            elif self._closing:
+                return
+
+    async def _flush(self) -> bool:
+        """Commit everything buffered so far in one transaction; False if it failed"""
+        batch = self._pending
+        if not batch:
+            return True
+        self._flushing = batch
+        self._pending = {}
+        writes = list(batch.values())
+        try:
+            versions = await asyncio.to_thread(self.store.put_many, [write.row() for write in writes])
+        except Exception as exc:
+            self.failures += 1
+            get_logger("write_behind").error("flush_failed", rows=len(writes), error=f"{type(exc).__name__}: {exc}")
+            if self.durability == "commit":
+                for write in writes:
+                    for waiter in write.waiters:
+                        if not waiter.done():
+                            waiter.set_exception(exc)
+            else:
+                # Retry the batch, except keys saved again since; those waiters follow the newer save
+                for key, write in batch.items():
+                    newer = self._pending.get(key)
+                    if newer is None:
+                        self._pending[key] = write
+                    else:
+                        newer.waiters = write.waiters + newer.waiters
+            self._flushing = {}
+            return False
+        self._flushing = {}
+
+        self.batches += 1
+        self.rows_committed += len(writes)
+        self.largest_batch = max(self.largest_batch, len(writes))
+        for write, version in zip(writes, versions):
+            record = StoredRecord(None, version, write.updated_at, write.etag)
+            for waiter in write.waiters:
+                if not waiter.done():
+                    waiter.set_result(record)
+            if write.on_commit is not None:
+                try:
+                    write.on_commit(record)
+                except Exception as exc:
+                    get_logger("write_behind").error("on_commit_failed", table=write.table, error=str(exc))
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "durability": self.durability,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": self.flush_interval * 1000,
+            "running": self._flusher is not None,
+            "pending": len(self._pending),
+            "flushing": len(self._flushing),
+            "saves": self.saves,
+            "coalesced": self.coalesced,
+            "written_through": self.written_through,
+            "backpressure_waits": self.backpressure_waits,
+            "batches": self.batches,
+            "rows_committed": self.rows_committed,
+            "mean_batch": round(self.rows_committed / self.batches, 2) if self.batches else 0,
+            "largest_batch": self.largest_batch,
+            "failures": self.failures,
+        }
+
+
+# Shared instance used by the upload handlers
+write_behind = WriteBehind()
@@ -1,4 +1,5 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
+import { apiClient, API_ENDPOINTS } from '../Context';
 import {ExportIcon, PrintIcon, TestInformationIcon, OptimizeResponseTimeIcon, MonitorPerformanceIcon, ScaleInfrastructureIcon, MaxUsersIcon, AvgResponseTimeIcon, PassRateIcon, TotalRequestsIcon , PerformanceReport } from '../icons';
 
 // Main App component
@@ -63,56 +64,87 @@ export default function App() {
   );
 }
 
+// Latency as the report cards show it: seconds from one second up
+const formatMs = (ms) => {
+  if (ms === null || ms === undefined) return '—';
+  return ms >= 1000 ? `${(ms / 1000).toFixed(2)}s` : `${Math.round(ms)} ms`;
+};
+
+const formatPercent = (rate) => (rate === null || rate === undefined ? '—' : `${Math.round(rate * 1000) / 10} %`);
+
+// Circumferences of the pass rate rings (r = 91 and r = 71)
+const OUTER_RING = 571.5;
+const INNER_RING = 446.1;
+
+const STATUS_COLORS = {
+  Pass: 'rgba(139, 208, 55, 1)',
+  Fair: 'rgba(208, 93, 29, 1)',
+  Fail: 'rgba(206, 24, 24, 1)',
+};
+
 // Main content area component
 const MainContent = () => {
   const [showExportModal, setShowExportModal] = React.useState(false);
   const [selectedFormat, setSelectedFormat] = React.useState('PDF');
   const [isExportHovered, setIsExportHovered] = React.useState(false);
   const [isPrintHovered, setIsPrintHovered] = React.useState(false);
-  
-  const exportAsJSON = () => {
-    const reportData = {
-      totalRequests: 15,
-      avgResponseTime: '5.32s',
-      passRate: '100%',
-      maxUsers: '~150 VUs',
-      testInformation: {
-        testType: 'pure_npl_nfr',
-        timestamp: '28/9/25, 27:45:09 am',
-        apiTested: '28/9/25',
-        authTime: '2.711'
-      },
-      apiPerformance: [
-        { apiName: 'GET SIZES', endpoint: '/api/get_sizes', avgResponseTime: '6.80s', status: 'Fail' }
-      ]
+  const [report, setReport] = React.useState(null);
+  const [isLoading, setIsLoading] = React.useState(true);
+  const [error, setError] = React.useState(null);
+
+  // The newest load-test run of the current project, reported by the backend
+  useEffect(() => {
+    const fetchReport = async () => {
+      try {
+        const project = JSON.parse(localStorage.getItem('currentProject') || '{}');
+        const params = project.id ? { project_id: project.id } : {};
+        const runs = (await apiClient.get(API_ENDPOINTS.PERF_RUNS, { params })).data.runs || [];
+        if (runs.length === 0) {
+          setReport(null);
+          return;
+        }
+        const response = await apiClient.get(API_ENDPOINTS.PERF_REPORT(runs[0].run_id));
+        setReport(response.data);
+      } catch (err) {
+        setError(err.response?.data?.detail || err.message || 'Failed to load the performance report');
+        console.error('Error fetching performance report:', err);
+      } finally {
+        setIsLoading(false);
+      }
     };
-    
-    const dataStr = JSON.stringify(reportData, null, 2);
-    const dataBlob = new Blob([dataStr], { type: 'application/json' });
-    const url = URL.createObjectURL(dataBlob);
-    const link = document.createElement('a');
-    link.href = url;
-    link.download = 'performance-report.json';
-    link.click();
-    URL.revokeObjectURL(url);
-    setShowExportModal(false);
-  };
+    fetchReport();
+  }, []);
 
-  const exportAsCSV = () => {
-    const csvContent = `API Name,Endpoint,Avg Response Time,Status
-GET SIZES,/api/get_sizes,6.80s,Fail
-GET SIZES,/api/get_sizes,6.80s,Fail`;
-    
-    const dataBlob = new Blob([csvContent], { type: 'text/csv' });
-    const url = URL.createObjectURL(dataBlob);
-    const link = document.createElement('a');
-    link.href = url;
-    link.download = 'performance-report.csv';
-    link.click();
-    URL.revokeObjectURL(url);
+  const endpoints = report?.endpoints || [];
+  const slowest = Math.max(1, ...endpoints.map((endpoint) => endpoint.avg_ms || 0));
+  const passRate = report?.pass_rate ?? 0;
+  const failRate = report?.total_requests ? 1 - passRate : 0;
+  const failing = endpoints.filter((endpoint) => endpoint.status !== 'Pass');
+
+  // The server writes the file; the browser only saves it
+  const downloadExport = async (format) => {
+    try {
+      const response = await apiClient.get(API_ENDPOINTS.PERF_EXPORT(report.run_id), {
+        params: { format },
+        responseType: 'blob',
+      });
+      const url = URL.createObjectURL(response.data);
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = `performance-report-${report.run_id}.${format}`;
+      link.click();
+      URL.revokeObjectURL(url);
+    } catch (err) {
+      setError(err.message || 'Failed to export the performance report');
+      console.error('Error exporting performance report:', err);
+    }
     setShowExportModal(false);
   };
 
+  const exportAsJSON = () => downloadExport('json');
+
+  const exportAsCSV = () => downloadExport('csv');
+
   const exportAsPDF = () => {
     window.print();
     setShowExportModal(false);
@@ -121,6 +153,8 @@ GET SIZES,/api/get_sizes,6.80s,Fail`;
   const handleExport = () => {
     if (selectedFormat === 'PDF') {
       exportAsPDF();
+    } else if (!report) {
+      setShowExportModal(false);
     } else if (selectedFormat === 'JSON') {
       exportAsJSON();
     } else if (selectedFormat === 'CSV') {
@@ -140,395 +174,272 @@ GET SIZES,/api/get_sizes,6.80s,Fail`;
           <PerformanceReport />
         </div>
 
-        {/* Metric Cards */}
-        <div style={styles.metricsGrid}>
-          {/* Total Requests Card */}
-          <div style={styles.metricCard}>
-            <TotalRequestsIcon />
-            <div style={styles.metricContent}>
-              <span style={styles.metricLabel}>Total Requests</span>
-              <span style={styles.metricValue}>15</span>
-            </div>
-          </div>
-
-          {/* Avg Response Time Card */}
-          <div style={styles.metricCard}>
-            <AvgResponseTimeIcon />
-            <div style={styles.metricContent}>
-              <span style={styles.metricLabel}>Avg. Response time</span>
-              <span style={styles.metricValue}>5.32s</span>
-            </div>
-          </div>
-
-          {/* Pass Rate Card */}
-          <div style={styles.metricCard}>
-            <PassRateIcon />
-            <div style={styles.metricContent}>
-              <span style={styles.metricLabel}>Pass Rate</span>
-              <span style={styles.metricValue}>100 %</span>
-            </div>
-          </div>
-
-          {/* Max Users Card */}
-          <div style={styles.metricCard}>
-            <MaxUsersIcon />
-            <div style={styles.metricContent}>
-              <span style={styles.metricLabel}>Max Users</span>
-              <span style={styles.metricValue}>~150 VUs</span>
-            </div>
-          </div>
-        </div>
+        {isLoading && <p style={styles.statusMessage}>Loading performance report...</p>}
+        {error && <p style={{...styles.statusMessage, color: 'rgba(206, 24, 24, 1)'}}>{error}</p>}
+        {!isLoading && !error && !report && (
+          <p style={styles.statusMessage}>
+            No load-test runs yet. Record one with load_test.py --samples-out and send the samples to /api/v1/perf/runs.
+          </p>
+        )}
 
-        {/* Two Column Section: Response Time + Pass Rate */}
-        <div style={styles.twoColumnContainer}>
-          {/* LEFT: Response Time Comparison */}
-          <div style={styles.responseTimeContainer}>
-            <h2 style={styles.sectionHeading}>Response Time Comparison</h2>
-            
-            <div style={styles.barsContainer}>
-              {/* Get Sizes */}
-              <div style={styles.barRow}>
-                <span style={styles.barLabel}>Get Sizes</span>
-                <div style={styles.barBackground}>
-                  <div style={{...styles.barFill, width: '73%'}}></div>
+        {report && (
+          <>
+            {/* Metric Cards */}
+            <div style={styles.metricsGrid}>
+              {/* Total Requests Card */}
+              <div style={styles.metricCard}>
+                <TotalRequestsIcon />
+                <div style={styles.metricContent}>
+                  <span style={styles.metricLabel}>Total Requests</span>
+                  <span style={styles.metricValue}>{report.total_requests.toLocaleString()}</span>
                 </div>
-                <span style={styles.barValue}>6.80s</span>
               </div>
 
-              {/* Get Crust */}
-              <div style={styles.barRow}>
-                <span style={styles.barLabel}>Get Crust</span>
-                <div style={styles.barBackground}>
-                  <div style={{...styles.barFill, width: '73%'}}></div>
+              {/* Avg Response Time Card */}
+              <div style={styles.metricCard}>
+                <AvgResponseTimeIcon />
+                <div style={styles.metricContent}>
+                  <span style={styles.metricLabel}>Avg. Response time</span>
+                  <span style={styles.metricValue}>{formatMs(report.avg_response_ms)}</span>
                 </div>
-                <span style={styles.barValue}>6.80s</span>
               </div>
 
-              {/* Get Toppings */}
-              <div style={styles.barRow}>
-                <span style={styles.barLabel}>Get Toppings</span>
-                <div style={styles.barBackground}>
-                  <div style={{...styles.barFill, width: '30%'}}></div>
+              {/* Pass Rate Card */}
+              <div style={styles.metricCard}>
+                <PassRateIcon />
+                <div style={styles.metricContent}>
+                  <span style={styles.metricLabel}>Pass Rate</span>
+                  <span style={styles.metricValue}>{formatPercent(report.pass_rate)}</span>
                 </div>
-                <span style={styles.barValue}>6.80s</span>
               </div>
 
-              {/* Get Pizzas */}
-              <div style={styles.barRow}>
-                <span style={styles.barLabel}>Get Pizzas</span>
-                <div style={styles.barBackground}>
-                  <div style={{...styles.barFill, width: '30%'}}></div>
+              {/* Max Users Card */}
+              <div style={styles.metricCard}>
+                <MaxUsersIcon />
+                <div style={styles.metricContent}>
+                  <span style={styles.metricLabel}>Max Users</span>
+                  <span style={styles.metricValue}>{report.max_users ? `~${report.max_users} VUs` : '—'}</span>
                 </div>
-                <span style={styles.barValue}>6.80s</span>
               </div>
+            </div>
 
-              {/* User Profile */}
-              <div style={styles.barRow}>
-                <span style={styles.barLabel}>User Profile</span>
-                <div style={styles.barBackground}>
-                  <div style={{...styles.barFill, width: '73%'}}></div>
+            {/* Two Column Section: Response Time + Pass Rate */}
+            <div style={styles.twoColumnContainer}>
+              {/* LEFT: Response Time Comparison */}
+              <div style={styles.responseTimeContainer}>
+                <h2 style={styles.sectionHeading}>Response Time Comparison</h2>
+                
+                <div style={styles.barsContainer}>
+                  {endpoints.map((endpoint) => (
+                    <div key={`${endpoint.method} ${endpoint.endpoint}`} style={styles.barRow}>
+                      <span style={styles.barLabel}>{endpoint.api_name}</span>
+                      <div style={styles.barBackground}>
+                        <div style={{...styles.barFill, width: `${Math.round((endpoint.avg_ms / slowest) * 100)}%`}}></div>
+                      </div>
+                      <span style={styles.barValue}>{formatMs(endpoint.avg_ms)}</span>
+                    </div>
+                  ))}
                 </div>
-                <span style={styles.barValue}>6.80s</span>
               </div>
 
-              {/* Get Cart */}
-              <div style={styles.barRow}>
-                <span style={styles.barLabel}>Get Cart</span>
-                <div style={styles.barBackground}>
-                  <div style={{...styles.barFill, width: '27%'}}></div>
+              {/* RIGHT: Pass Rate */}
+              <div style={styles.passRateContainer}>
+                <div style={styles.passRateLegend}>
+                  <div style={styles.legendItem}>
+                    <div style={{...styles.legendDot, backgroundColor: 'rgba(91, 166, 1, 1)'}}></div>
+                    <span style={styles.legendText}>Pass Rate: {formatPercent(passRate)}</span>
+                  </div>
+                  
+                  <div style={styles.legendItem}>
+                    <div style={{...styles.legendDot, backgroundColor: 'rgba(206, 24, 24, 1)'}}></div>
+                    <span style={styles.legendText}>Fail Rate: {formatPercent(failRate)}</span>
+                  </div>
                 </div>
-                <span style={styles.barValue}>6.80s</span>
-              </div>
-            </div>
-          </div>
-
-          {/* RIGHT: Pass Rate */}
-          <div style={styles.passRateContainer}>
-            <div style={styles.passRateLegend}>
-              {/* Green dot - Input: 90% */}
-              <div style={styles.legendItem}>
-                <div style={{...styles.legendDot, backgroundColor: 'rgba(91, 166, 1, 1)'}}></div>
-                <span style={styles.legendText}>Input: 90%</span>
-              </div>
-              
-              {/* Red dot - Fail Rate: 10% */}
-              <div style={styles.legendItem}>
-                <div style={{...styles.legendDot, backgroundColor: 'rgba(206, 24, 24, 1)'}}></div>
-                <span style={styles.legendText}>Fail Rate: 10%</span>
-              </div>
-            </div>
-            
-            <div style={styles.circularChartContainer}>
-              <svg width="210" height="210" viewBox="0 0 210 210" style={styles.circularChart}>
-                {/* Outer ring background (gray) */}
-                <circle
-                  cx="105"
-                  cy="105"
-                  r="91"
-                  fill="none"
-                  stroke="rgba(45, 45, 45, 1)"
-                  strokeWidth="12"
-                />
                 
-                {/* Outer ring progress (90% green) */}
-                <circle
-                  cx="105"
-                  cy="105"
-                  r="91"
-                  fill="none"
-                  stroke="rgba(91, 166, 1, 1)"
-                  strokeWidth="12"
-                  strokeDasharray="571.5"
-                  strokeDashoffset="57.15"
-                  strokeLinecap="round"
-                  transform="rotate(-90 105 105)"
-                />
-                
-                {/* Inner ring background (gray) */}
-                <circle
-                  cx="105"
-                  cy="105"
-                  r="71"
-                  fill="none"
-                  stroke="rgba(45, 45, 45, 1)"
-                  strokeWidth="12"
-                />
-                
-                {/* Inner ring progress (10% red) */}
-                <circle
-                  cx="105"
-                  cy="105"
-                  r="71"
-                  fill="none"
-                  stroke="rgba(206, 24, 24, 1)"
-                  strokeWidth="12"
-                  strokeDasharray="446.1"
-                  strokeDashoffset="401.49"
-                  strokeLinecap="round"
-                  transform="rotate(-90 105 105)"
-                />
-              </svg>
-              
-              {/* Center text */}
-              <div style={styles.circleTextContainer}>
-                <div style={styles.circleMainText}>90 %</div>
-                <div style={styles.circleSubText}>Pass Rate</div>
+                <div style={styles.circularChartContainer}>
+                  <svg width="210" height="210" viewBox="0 0 210 210" style={styles.circularChart}>
+                    {/* Outer ring background (gray) */}
+                    <circle
+                      cx="105"
+                      cy="105"
+                      r="91"
+                      fill="none"
+                      stroke="rgba(45, 45, 45, 1)"
+                      strokeWidth="12"
+                    />
+                    
+                    {/* Outer ring progress (pass rate, green) */}
+                    <circle
+                      cx="105"
+                      cy="105"
+                      r="91"
+                      fill="none"
+                      stroke="rgba(91, 166, 1, 1)"
+                      strokeWidth="12"
+                      strokeDasharray={OUTER_RING}
+                      strokeDashoffset={OUTER_RING * (1 - passRate)}
+                      strokeLinecap="round"
+                      transform="rotate(-90 105 105)"
+                    />
+                    
+                    {/* Inner ring background (gray) */}
+                    <circle
+                      cx="105"
+                      cy="105"
+                      r="71"
+                      fill="none"
+                      stroke="rgba(45, 45, 45, 1)"
+                      strokeWidth="12"
+                    />
+                    
+                    {/* Inner ring progress (fail rate, red) */}
+                    <circle
+                      cx="105"
+                      cy="105"
+                      r="71"
+                      fill="none"
+                      stroke="rgba(206, 24, 24, 1)"
+                      strokeWidth="12"
+                      strokeDasharray={INNER_RING}
+                      strokeDashoffset={INNER_RING * (1 - failRate)}
+                      strokeLinecap="round"
+                      transform="rotate(-90 105 105)"
+                    />
+                  </svg>
+                  
+                  {/* Center text */}
+                  <div style={styles.circleTextContainer}>
+                    <div style={styles.circleMainText}>{formatPercent(passRate)}</div>
+                    <div style={styles.circleSubText}>Pass Rate</div>
+                  </div>
+                </div>
               </div>
             </div>
-          </div>
-        </div>
-        <div style={styles.sectionDivider}></div>
-
-        {/* API Performance Details Section */}
-        <div style={styles.apiPerformanceSection}>
-          <h2 style={styles.apiSectionHeading}>API Performance Details</h2>
-
-          <div style={styles.tableContainer}>
-            {/* Table Header */}
-            <div style={styles.tableHeader}>
-              <div style={styles.tableHeaderCell}>API Name</div>
-              <div style={styles.tableHeaderCell}>Endpoint</div>
-              <div style={styles.tableHeaderCell}>Avg. Response Time</div>
-              <div style={styles.tableHeaderCell}>Status</div>
-            </div>
-
-            {/* Table Rows */}
-            <div style={styles.tableRow}>
-              <div style={styles.tableCell}>GET SIZES</div>
-              <div style={{...styles.tableCell, ...styles.endpointCell}}>/api/get_sizes</div>
-              <div style={{...styles.tableCell, textAlign: 'center'}}>6.80s</div>
-              <div style={{...styles.tableCell, ...styles.statusCell}}>Fair</div>
-            </div>
-
-            <div style={styles.tableRow}>
-              <div style={styles.tableCell}>GET SIZES</div>
-              <div style={{...styles.tableCell, ...styles.endpointCell}}>/api/get_sizes</div>
-              <div style={{...styles.tableCell, textAlign: 'center'}}>6.80s</div>
-              <div style={{...styles.tableCell, ...styles.statusCell}}>Fair</div>
-            </div>
-
-            <div style={styles.tableRow}>
-              <div style={styles.tableCell}>GET SIZES</div>
-              <div style={{...styles.tableCell, ...styles.endpointCell}}>/api/get_sizes</div>
-              <div style={{...styles.tableCell, textAlign: 'center'}}>6.80s</div>
-              <div style={{...styles.tableCell, ...styles.statusCell}}>Fair</div>
-            </div>
-
-            <div style={styles.tableRow}>
-              <div style={styles.tableCell}>GET SIZES</div>
-              <div style={{...styles.tableCell, ...styles.endpointCell}}>/api/get_sizes</div>
-              <div style={{...styles.tableCell, textAlign: 'center'}}>6.80s</div>
-              <div style={{...styles.tableCell, ...styles.statusCell}}>Fair</div>
-            </div>
-          </div>
-        </div>
-        <div style={styles.sectionDivider}></div>
+            <div style={styles.sectionDivider}></div>
 
-        {/* Recommendations Section */}
-        <div style={styles.recommendationsSection}>
-          <h2 style={styles.recommendationsHeading}>Recommendations</h2>
-
-          {/* Recommendation Card 1 */}
-          <div style={styles.recommendationCard}>
-            <OptimizeResponseTimeIcon />
-            <div style={styles.recommendationContent}>
-              <h3 style={styles.recommendationTitle}>Optimize Response Times</h3>
-              <p style={styles.recommendationText}>
-                Average response times exceed 5 seconds, which could affect user experience. Consider optimizing database queries and implementing caching.
-              </p>
-            </div>
-          </div>
-
-          {/* Recommendation Card 2 */}
-          <div style={styles.recommendationCard}>
-            <MonitorPerformanceIcon />
-            <div style={styles.recommendationContent}>
-              <h3 style={styles.recommendationTitle}>Monitor Performance</h3>
-              <p style={styles.recommendationText}>
-                Average response times exceed 5 seconds, which could affect user experience. Consider optimizing database queries and implementing caching.
-              </p>
-            </div>
-          </div>
+            {/* API Performance Details Section */}
+            <div style={styles.apiPerformanceSection}>
+              <h2 style={styles.apiSectionHeading}>API Performance Details</h2>
 
-          {/* Recommendation Card 3 */}
-          <div style={styles.recommendationCard}>
-            <ScaleInfrastructureIcon />
-            <div style={styles.recommendationContent}>
-              <h3 style={styles.recommendationTitle}>Scale Infrastructure</h3>
-              <p style={styles.recommendationText}>
-                Average response times exceed 5 seconds, which could affect user experience. Consider optimizing database queries and implementing caching.
-              </p>
-            </div>
-          </div>
-        </div>
-        <div style={styles.sectionDivider}></div>
+              <div style={styles.tableContainer}>
+                {/* Table Header */}
+                <div style={styles.tableHeader}>
+                  <div style={styles.tableHeaderCell}>API Name</div>
+                  <div style={styles.tableHeaderCell}>Endpoint</div>
+                  <div style={styles.tableHeaderCell}>Avg. Response Time</div>
+                  <div style={styles.tableHeaderCell}>Status</div>
+                </div>
 
-        {/* Test Information Section */}
-        <div style={styles.testInformationContainer}>
-          <TestInformationIcon />
-          <div style={styles.testInformationContent}>
-            <h3 style={styles.testInformationTitle}>Test Information</h3>
-            <div style={styles.testInfoGrid}>
-              <div style={styles.testInfoItem}>
-                <span style={styles.testInfoLabel}>Test Type: </span>
-                <span style={styles.testInfoValue}>pure_npl_nfr</span>
-              </div>
-              <div style={styles.testInfoItem}>
-                <span style={styles.testInfoLabel}>Timestamp: </span>
-                <span style={styles.testInfoValue}>28/9/25, 27:45:09 am</span>
-              </div>
-              <div style={styles.testInfoItem}>
-                <span style={styles.testInfoLabel}>API Tested: </span>
-                <span style={styles.testInfoValue}>28/9/25</span>
-              </div>
-              <div style={styles.testInfoItem}>
-                <span style={styles.testInfoLabel}>Auth Time: </span>
-                <span style={styles.testInfoValue}>2.711</span>
+                {/* Table Rows */}
+                {endpoints.map((endpoint) => (
+                  <div key={`${endpoint.method} ${endpoint.endpoint}`} style={styles.tableRow}>
+                    <div style={styles.tableCell}>{endpoint.api_name}</div>
+                    <div style={{...styles.tableCell, ...styles.endpointCell}}>{endpoint.endpoint}</div>
+                    <div style={{...styles.tableCell, textAlign: 'center'}}>{formatMs(endpoint.avg_ms)}</div>
+                    <div style={{...styles.tableCell, ...styles.statusCell, color: STATUS_COLORS[endpoint.status]}}>
+                      {endpoint.status}
+                    </div>
+                  </div>
+                ))}
               </div>
             </div>
-          </div>
-        </div>
-        <div style={styles.sectionDivider}></div>
+            <div style={styles.sectionDivider}></div>
 
-        {/* System Resource Usage Section */}
-        <div style={styles.systemResourceSection}>
-          <h2 style={styles.systemResourceHeading}>System Resource Usage</h2>
+            {/* Recommendations Section */}
+            <div style={styles.recommendationsSection}>
+              <h2 style={styles.recommendationsHeading}>Recommendations</h2>
 
-          <div style={styles.resourceCardsGrid}>
-            {/* Get Sizes Card */}
-            <div style={styles.resourceCard}>
-              <h4 style={styles.resourceCardTitle}>Get Sizes</h4>
-              <div style={styles.resourceMetrics}>
-                <div style={styles.resourceMetricRow}>
-                  <span style={styles.resourceLabel}>CPU Memory:</span>
-                  <span style={{...styles.resourceValue, color: 'rgba(139, 208, 55, 1)'}}>12.9%</span>
-                </div>
-                <div style={styles.resourceMetricRow}>
-                  <span style={styles.resourceLabel}>Memory:</span>
-                  <span style={{...styles.resourceValue, color: 'rgba(208, 93, 29, 1)'}}>12.9%</span>
-                </div>
-                <div style={styles.resourceMetricRow}>
-                  <span style={styles.resourceLabel}>Disk:</span>
-                  <span style={{...styles.resourceValue, color: 'rgba(139, 208, 55, 1)'}}>12.9%</span>
-                </div>
-                <div style={styles.resourceMetricRow}>
-                  <span style={styles.resourceLabel}>Network:</span>
-                  <span style={{...styles.resourceValue, color: 'rgba(208, 93, 29, 1)'}}>12.9%</span>
+              {/* Recommendation Card 1 */}
+              <div style={styles.recommendationCard}>
+                <OptimizeResponseTimeIcon />
+                <div style={styles.recommendationContent}>
+                  <h3 style={styles.recommendationTitle}>Optimize Response Times</h3>
+                  <p style={styles.recommendationText}>
+                    {failing.length > 0
+                      ? `${failing.length} of ${endpoints.length} endpoints miss the ${formatMs(report.slo_ms)} p95 target or fail too often: ${failing.map((endpoint) => endpoint.endpoint).join(', ')}. Consider optimizing their database queries and caching their responses.`
+                      : `Every endpoint keeps its p95 latency within ${formatMs(report.slo_ms)}.`}
+                  </p>
                 </div>
               </div>
-            </div>
 
-            {/* Get Crusts Card */}
-            <div style={styles.resourceCard}>
-              <h4 style={styles.resourceCardTitle}>Get Crusts</h4>
-              <div style={styles.resourceMetrics}>
-                <div style={styles.resourceMetricRow}>
-                  <span style={styles.resourceLabel}>CPU Memory:</span>
-                  <span style={{...styles.resourceValue, color: 'rgba(139, 208, 55, 1)'}}>12.9%</span>
-                </div>
-                <div style={styles.resourceMetricRow}>
-                  <span style={styles.resourceLabel}>Memory:</span>
-                  <span style={{...styles.resourceValue, color: 'rgba(139, 208, 55, 1)'}}>12.9%</span>
+              {/* Recommendation Card 2 */}
+              <div style={styles.recommendationCard}>
+                <MonitorPerformanceIcon />
+                <div style={styles.recommendationContent}>
+                  <h3 style={styles.recommendationTitle}>Monitor Performance</h3>
+                  <p style={styles.recommendationText}>
+                    {`p95 latency was ${formatMs(report.latency_ms?.p95)} and p99 ${formatMs(report.latency_ms?.p99)} across ${report.total_requests.toLocaleString()} requests, with ${report.failed_requests.toLocaleString()} failed. Track these between runs to catch regressions early.`}
+                  </p>
                 </div>
-                <div style={styles.resourceMetricRow}>
-                  <span style={styles.resourceLabel}>Disk:</span>
-                  <span style={{...styles.resourceValue, color: 'rgba(139, 208, 55, 1)'}}>12.9%</span>
-                </div>
-                <div style={styles.resourceMetricRow}>
-                  <span style={styles.resourceLabel}>Network:</span>
-                  <span style={{...styles.resourceValue, color: 'rgba(208, 93, 29, 1)'}}>12.9%</span>
+              </div>
+
+              {/* Recommendation Card 3 */}
+              <div style={styles.recommendationCard}>
+                <ScaleInfrastructureIcon />
+                <div style={styles.recommendationContent}>
+                  <h3 style={styles.recommendationTitle}>Scale Infrastructure</h3>
+                  <p style={styles.recommendationText}>
+                    {report.throughput_rps
+                      ? `The run sustained ${report.throughput_rps.toLocaleString()} requests per second${report.max_users ? ` with ~${report.max_users} virtual users` : ''}. Test above that load before adding capacity.`
+                      : 'Run a longer test to measure sustained throughput before sizing the infrastructure.'}
+                  </p>
                 </div>
               </div>
             </div>
+            <div style={styles.sectionDivider}></div>
 
-            {/* Get Toppings Card */}
-            <div style={styles.resourceCard}>
-              <h4 style={styles.resourceCardTitle}>Get Toppings</h4>
-              <div style={styles.resourceMetrics}>
-                <div style={styles.resourceMetricRow}>
-                  <span style={styles.resourceLabel}>CPU Memory:</span>
-                  <span style={{...styles.resourceValue, color: 'rgba(139, 208, 55, 1)'}}>12.9%</span>
-                </div>
-                <div style={styles.resourceMetricRow}>
-                  <span style={styles.resourceLabel}>Memory:</span>
-                  <span style={{...styles.resourceValue, color: 'rgba(208, 93, 29, 1)'}}>12.9%</span>
-                </div>
-                <div style={styles.resourceMetricRow}>
-                  <span style={styles.resourceLabel}>Disk:</span>
-                  <span style={{...styles.resourceValue, color: 'rgba(208, 93, 29, 1)'}}>12.9%</span>
-                </div>
-                <div style={styles.resourceMetricRow}>
-                  <span style={styles.resourceLabel}>Network:</span>
-                  <span style={{...styles.resourceValue, color: 'rgba(139, 208, 55, 1)'}}>12.9%</span>
+            {/* Test Information Section */}
+            <div style={styles.testInformationContainer}>
+              <TestInformationIcon />
+              <div style={styles.testInformationContent}>
+                <h3 style={styles.testInformationTitle}>Test Information</h3>
+                <div style={styles.testInfoGrid}>
+                  <div style={styles.testInfoItem}>
+                    <span style={styles.testInfoLabel}>Test Type: </span>
+                    <span style={styles.testInfoValue}>{report.test_type || report.name}</span>
+                  </div>
+                  <div style={styles.testInfoItem}>
+                    <span style={styles.testInfoLabel}>Timestamp: </span>
+                    <span style={styles.testInfoValue}>{new Date(report.started_at || report.created_at).toLocaleString()}</span>
+                  </div>
+                  <div style={styles.testInfoItem}>
+                    <span style={styles.testInfoLabel}>APIs Tested: </span>
+                    <span style={styles.testInfoValue}>{report.endpoint_count}</span>
+                  </div>
+                  <div style={styles.testInfoItem}>
+                    <span style={styles.testInfoLabel}>Duration: </span>
+                    <span style={styles.testInfoValue}>{report.duration_s}s</span>
+                  </div>
                 </div>
               </div>
             </div>
+            <div style={styles.sectionDivider}></div>
 
-            {/* Get Pizzas Card */}
-            <div style={styles.resourceCard}>
-              <h4 style={styles.resourceCardTitle}>Get Pizzas</h4>
-              <div style={styles.resourceMetrics}>
-                <div style={styles.resourceMetricRow}>
-                  <span style={styles.resourceLabel}>CPU Memory:</span>
-                  <span style={{...styles.resourceValue, color: 'rgba(139, 208, 55, 1)'}}>12.9%</span>
-                </div>
-                <div style={styles.resourceMetricRow}>
-                  <span style={styles.resourceLabel}>Memory:</span>
-                  <span style={{...styles.resourceValue, color: 'rgba(139, 208, 55, 1)'}}>12.9%</span>
-                </div>
-                <div style={styles.resourceMetricRow}>
-                  <span style={styles.resourceLabel}>Disk:</span>
-                  <span style={{...styles.resourceValue, color: 'rgba(208, 93, 29, 1)'}}>12.9%</span>
-                </div>
-                <div style={styles.resourceMetricRow}>
-                  <span style={styles.resourceLabel}>Network:</span>
-                  <span style={{...styles.resourceValue, color: 'rgba(139, 208, 55, 1)'}}>12.9%</span>
-                </div>
+            {/* Latency Percentiles Section */}
+            <div style={styles.systemResourceSection}>
+              <h2 style={styles.systemResourceHeading}>Latency Percentiles</h2>
+
+              <div style={styles.resourceCardsGrid}>
+                {endpoints.map((endpoint) => (
+                  <div key={`${endpoint.method} ${endpoint.endpoint}`} style={styles.resourceCard}>
+                    <h4 style={styles.resourceCardTitle}>{endpoint.api_name}</h4>
+                    <div style={styles.resourceMetrics}>
+                      {[['p50', endpoint.p50_ms], ['p95', endpoint.p95_ms], ['p99', endpoint.p99_ms], ['Max', endpoint.max_ms]].map(([label, ms]) => (
+                        <div key={label} style={styles.resourceMetricRow}>
+                          <span style={styles.resourceLabel}>{label}:</span>
+                          <span style={{...styles.resourceValue, color: ms <= report.slo_ms ? STATUS_COLORS.Pass : STATUS_COLORS.Fair}}>
+                            {formatMs(ms)}
+                          </span>
+                        </div>
+                      ))}
+                    </div>
+                  </div>
+                ))}
               </div>
             </div>
-          </div>
-        </div>
-        <div style={styles.sectionDivider}></div>
+            <div style={styles.sectionDivider}></div>
+          </>
+        )}
 
         {/* Action Buttons */}
         <div className="action-buttons" style={styles.actionButtonsContainer}>
@@ -952,6 +863,12 @@ const styles = {
     color: 'rgba(208, 93, 29, 1)',
     textAlign: 'center',
   },
+  statusMessage: {
+    fontFamily: "'Nunito', sans-serif",
+    fontSize: '16px',
+    color: 'rgba(163, 163, 163, 0.98)',
+    margin: '0 0 24px 0',
+  },
   recommendationsSection: {
     width: '100%',
     marginBottom: '40px',
@@ -1,31 +1,61 @@
 import React, { useState, useEffect } from 'react';
 import { apiClient, API_ENDPOINTS } from '../Context';
 
+// Cards fetched per request; "Load more" asks for the next slice
+const PAGE_SIZE = 12;
+
 export default function ThirdPartyAPI() {
   const [thirdPartyData, setThirdPartyData] = useState(null);
+  const [apis, setApis] = useState([]);
+  const [filters, setFilters] = useState({ category: '', requiredOnly: false, keywords: '' });
+  const [keywordInput, setKeywordInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [error, setError] = useState(null);
   const [lastFetched, setLastFetched] = useState(null);
 
-  const fetchThirdPartyAPIs = async () => {
-    setIsLoading(true);
+  // Only the slice on screen is fetched; the server filters and counts
+  const fetchThirdPartyAPIs = async (cursor = null) => {
+    if (cursor) {
+      setIsLoadingMore(true);
+    } else {
+      setIsLoading(true);
+    }
     setError(null);
     
     try {
-      const response = await apiClient.get(API_ENDPOINTS.GET_THIRD_PARTY);
-      setThirdPartyData(response.data);
+      const params = { size: PAGE_SIZE };
+      if (filters.category) params.category = filters.category;
+      if (filters.requiredOnly) params.required = true;
+      if (filters.keywords) params.keywords = filters.keywords;
+      if (cursor) params.cursor = cursor;
+      const response = await apiClient.get(API_ENDPOINTS.GET_THIRD_PARTY, { params });
+      const data = response.data;
+      const page = Array.isArray(data) ? data : (data?.apis || data?.thirdPartyApis || []);
+      setThirdPartyData(data);
+      setApis((previous) => (cursor ? [...previous, ...page] : page));
       setLastFetched(new Date().toLocaleString());
     } catch (err) {
       setError(err.response?.data?.message || err.message || 'Failed to fetch third-party API data');
       console.error('Error fetching third-party APIs:', err);
     } finally {
       setIsLoading(false);
+      setIsLoadingMore(false);
     }
   };
 
   useEffect(() => {
     fetchThirdPartyAPIs();
-  }, []);
+  }, [filters]);
+
+  const applyKeywords = (event) => {
+    event.preventDefault();
+    setFilters((previous) => ({ ...previous, keywords: keywordInput.trim() }));
+  };
+
+  const toggleCategory = (category) => {
+    setFilters((previous) => ({ ...previous, category: previous.category === category ? '' : category }));
+  };
 
   // Map API categories to appropriate icon emojis
   const getAPIIcon = (category) => {
@@ -46,16 +76,19 @@ export default function ThirdPartyAPI() {
     return iconMap[category?.toLowerCase()] || iconMap.default;
   };
 
-  const isEmpty = !thirdPartyData || 
+  const isFiltered = Boolean(filters.category || filters.requiredOnly || filters.keywords);
+
+  const isEmpty = !isFiltered && (!thirdPartyData || 
     (Array.isArray(thirdPartyData) && thirdPartyData.length === 0) ||
-    (typeof thirdPartyData === 'object' && Object.keys(thirdPartyData).length === 0);
+    (typeof thirdPartyData === 'object' && Object.keys(thirdPartyData).length === 0));
 
-  const apiList = Array.isArray(thirdPartyData) 
-    ? thirdPartyData 
-    : (thirdPartyData?.apis || thirdPartyData?.thirdPartyApis || []);
+  const apiList = apis;
+  const summary = thirdPartyData?.summary;
+  const matched = thirdPartyData?.matched ?? apiList.length;
+  const nextCursor = thirdPartyData?.next_cursor;
 
   // Loading State
-  if (isLoading) {
+  if (isLoading && !thirdPartyData) {
     return (
       <>
         <style>{styles.cssStyles}</style>
@@ -85,7 +118,7 @@ export default function ThirdPartyAPI() {
               <button
                 className="api-retry-button"
                 style={styles.retryButton}
-                onClick={fetchThirdPartyAPIs}
+                onClick={() => fetchThirdPartyAPIs()}
               >
                 Try Again
               </button>
@@ -112,7 +145,7 @@ export default function ThirdPartyAPI() {
               <button
                 className="api-retry-button"
                 style={styles.retryButton}
-                onClick={fetchThirdPartyAPIs}
+                onClick={() => fetchThirdPartyAPIs()}
               >
                 Refresh Analysis
               </button>
@@ -139,7 +172,7 @@ export default function ThirdPartyAPI() {
           <button
             className="api-refresh-button"
             style={styles.refreshButton}
-            onClick={fetchThirdPartyAPIs}
+            onClick={() => fetchThirdPartyAPIs()}
           >
             <svg width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" strokeWidth="2" strokeLinecap="round" strokeLinejoin="round">
               <path d="M21.5 2v6h-6M2.5 22v-6h6M2 11.5a10 10 0 0 1 18.8-4.3M22 12.5a10 10 0 0 1-18.8 4.2"/>
@@ -149,29 +182,68 @@ export default function ThirdPartyAPI() {
         </div>
 
         {/* Summary Card */}
-        {apiList.length > 0 && (
+        {summary && (
           <div className="fade-in-up" style={styles.summaryCard}>
             <div style={styles.summaryContent}>
               <div style={styles.summaryIcon}>🔌</div>
               <div style={styles.summaryText}>
                 <h3 style={styles.summaryTitle}>
-                  Found {apiList.length} Third-Party API{apiList.length !== 1 ? 's' : ''}
+                  Found {matched} Third-Party API{matched !== 1 ? 's' : ''}
                 </h3>
                 <p style={styles.summaryDescription}>
-                  These external services have been identified as necessary for your project
+                  Showing {apiList.length} of {matched} · {summary.total} providers in the catalog, {summary.required} required
                 </p>
               </div>
             </div>
           </div>
         )}
 
+        {/* Filters */}
+        <div style={styles.filterBar}>
+          <form onSubmit={applyKeywords} style={styles.searchForm}>
+            <input
+              type="search"
+              value={keywordInput}
+              onChange={(event) => setKeywordInput(event.target.value)}
+              placeholder="Search features, e.g. webhook"
+              style={styles.searchInput}
+            />
+          </form>
+          <label style={styles.requiredToggle}>
+            <input
+              type="checkbox"
+              checked={filters.requiredOnly}
+              onChange={(event) => setFilters((previous) => ({ ...previous, requiredOnly: event.target.checked }))}
+            />
+            Required only
+          </label>
+          <div style={styles.categoryChips}>
+            {(summary?.categories || []).map((category) => (
+              <button
+                key={category}
+                type="button"
+                className="api-chip"
+                style={filters.category === category ? { ...styles.categoryChip, ...styles.categoryChipActive } : styles.categoryChip}
+                onClick={() => toggleCategory(category)}
+              >
+                {getAPIIcon(category)} {category}
+                <span style={styles.chipCount}>{summary.category_counts?.[category]}</span>
+              </button>
+            ))}
+          </div>
+        </div>
+
+        {isFiltered && apiList.length === 0 && (
+          <p style={styles.noMatches}>No providers match these filters.</p>
+        )}
+
         {/* API Cards Grid */}
         <div style={styles.cardsGrid}>
           {apiList.map((api, index) => (
             <div 
               key={index}
               className="api-card fade-in-up"
-              style={{...styles.apiCard, animationDelay: `${index * 0.1}s`}}
+              style={{...styles.apiCard, animationDelay: `${(index % PAGE_SIZE) * 0.1}s`}}
             >
               {/* Card Header */}
               <div style={styles.cardHeader}>
@@ -260,6 +332,20 @@ export default function ThirdPartyAPI() {
           ))}
         </div>
 
+        {/* Next slice */}
+        {nextCursor && (
+          <div style={styles.loadMoreContainer}>
+            <button
+              className="api-refresh-button"
+              style={styles.refreshButton}
+              onClick={() => fetchThirdPartyAPIs(nextCursor)}
+              disabled={isLoadingMore}
+            >
+              {isLoadingMore ? 'Loading...' : `Load more (${matched - apiList.length} left)`}
+            </button>
+          </div>
+        )}
+
         {/* Raw JSON Debug */}
         {thirdPartyData && (
           <details style={styles.debugSection}>
@@ -339,6 +425,14 @@ const styles = {
       box-shadow: 0 6px 16px rgba(232, 115, 50, 0.35);
     }
 
+    .api-chip {
+      transition: all 0.2s ease;
+    }
+
+    .api-chip:hover {
+      border-color: rgba(209, 96, 33, 0.4) !important;
+    }
+
     .api-docs-link {
       transition: all 0.2s ease;
     }
@@ -532,6 +626,85 @@ const styles = {
     margin: '0',
   },
 
+  // Filters
+  filterBar: {
+    display: 'flex',
+    flexWrap: 'wrap',
+    alignItems: 'center',
+    gap: '16px',
+    marginBottom: '32px',
+  },
+
+  searchForm: {
+    flex: '1 1 260px',
+  },
+
+  searchInput: {
+    width: '100%',
+    boxSizing: 'border-box',
+    padding: '12px 16px',
+    background: 'rgba(255, 255, 255, 0.05)',
+    border: '1px solid rgba(255, 255, 255, 0.1)',
+    borderRadius: '10px',
+    color: '#f9fafb',
+    fontSize: '14px',
+    fontFamily: "'Montserrat', sans-serif",
+  },
+
+  requiredToggle: {
+    display: 'flex',
+    alignItems: 'center',
+    gap: '8px',
+    fontSize: '14px',
+    color: 'rgba(255, 255, 255, 0.7)',
+    cursor: 'pointer',
+  },
+
+  categoryChips: {
+    display: 'flex',
+    flexWrap: 'wrap',
+    gap: '8px',
+    flexBasis: '100%',
+  },
+
+  categoryChip: {
+    display: 'flex',
+    alignItems: 'center',
+    gap: '6px',
+    padding: '6px 12px',
+    background: 'rgba(255, 255, 255, 0.04)',
+    border: '1px solid rgba(255, 255, 255, 0.1)',
+    borderRadius: '999px',
+    color: 'rgba(255, 255, 255, 0.7)',
+    fontSize: '12px',
+    textTransform: 'capitalize',
+    cursor: 'pointer',
+    fontFamily: "'Montserrat', sans-serif",
+  },
+
+  categoryChipActive: {
+    background: 'rgba(209, 96, 33, 0.15)',
+    borderColor: 'rgba(209, 96, 33, 0.5)',
+    color: '#f9fafb',
+  },
+
+  chipCount: {
+    fontSize: '11px',
+    color: 'rgba(255, 255, 255, 0.4)',
+  },
+
+  noMatches: {
+    fontSize: '14px',
+    color: 'rgba(255, 255, 255, 0.5)',
+    marginBottom: '32px',
+  },
+
+  loadMoreContainer: {
+    display: 'flex',
+    justifyContent: 'center',
+    marginBottom: '40px',
+  },
+
   // Cards Grid
   cardsGrid: {
     display: 'grid',
@@ -40,6 +40,11 @@ apiClient.interceptors.response.use(
     if (error.response) {
       // Server responded with error
       console.error('API Error:', error.response.data);
+      // The token is unknown or expired (e.g. the mock server restarted): log in again
+      if (error.response.status === 401 && window.location.pathname !== '/login') {
+        localStorage.removeItem('token');
+        window.location.assign('/login');
+      }
     } else if (error.request) {
       // Request made but no response
       console.error('Network Error:', error.message);
@@ -93,6 +98,11 @@ export const API_ENDPOINTS = {
   // Third Party APIs
   GET_THIRD_PARTY: '/api/get_thirdparty',
   
+  // Performance Reports
+  PERF_RUNS: '/api/v1/perf/runs',
+  PERF_REPORT: (runId) => `/api/v1/perf/runs/${runId}/report`,
+  PERF_EXPORT: (runId) => `/api/v1/perf/runs/${runId}/export`,
+  
   // Health Check
   HEALTH: '/api/v1/health',
   AUTH_HEALTH: '/api/v1/auth/health',